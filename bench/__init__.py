@@ -0,0 +1,13 @@
+"""
+Benchmarks für Indizierung und Suche auf einem synthetischen Katalog.
+
+    bench/catalog.py   erzeugt appdetails-JSON in beliebiger Größe aus steamID.csv
+    bench/run.py       misst Indizierung, Suchlatenzen, Dokumentabrufe und Karten-HTML, Ergebnis als JSON
+    bench/compare.py   vergleicht zwei Ergebnis-Dateien
+    bench/loadtest.py  gleichzeitige Sessions gegen einen lokalen Streamlit-Server (web.py)
+
+Aufruf aus dem Projektordner, z. B.:
+    python -m bench.run --spiele 100000 --ausgabe ergebnis.json
+    python -m bench.compare vorher.json ergebnis.json
+    python -m bench.loadtest --sitzungen 1,4,16 --spiele 100000
+"""
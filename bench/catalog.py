@@ -0,0 +1,169 @@
+"""
+Synthetischer Steam-Katalog für Benchmarks (die echte data.txt darf nicht weitergegeben werden).
+
+Erzeugt pro Steam-ID aus steamID.csv eine Zeile im Format der appdetails-API, wie sie getjason.py
+speichert: {"<appid>": {"success": true, "data": {...}}}. Gebraucht werden dieselben Felder wie in
+indexing.extract_fields, mit realistischen Verteilungen: Titel aus 1-5 Wörtern (teils mit Untertitel,
+Fortsetzungsnummer oder ™), HTML-Beschreibungen von einigen KB, 1-4 Genres mit Steam-Häufigkeiten,
+wenige sehr beliebte und viele kaum bewertete Spiele und ein Anteil fehlgeschlagener Antworten.
+
+Jedes Spiel hängt nur von `seed` und seiner Position ab: ein Katalog mit 10k Spielen ist der Anfang
+des Katalogs mit 100k Spielen. Gibt es mehr Spiele als IDs in der CSV, werden IDs oberhalb der
+größten Steam-ID vergeben.
+
+Beispiel:
+    python -m bench.catalog --spiele 100000 --ausgabe bench/katalog-100k.txt
+"""
+
+import argparse
+import json
+import random
+
+from getjason import STEAM_ID_CSV, load_app_ids
+
+SEED = 1
+FEHLERQUOTE = 0.05      # Anteil der IDs ohne Daten ({"success": false})
+
+# Steam-Genres mit ungefährem Anteil an allen Spielen
+GENRES = {
+    "Indie": 0.62, "Action": 0.40, "Casual": 0.38, "Adventure": 0.37, "Simulation": 0.20,
+    "Strategy": 0.19, "RPG": 0.18, "Early Access": 0.10, "Free To Play": 0.08, "Sports": 0.05,
+    "Racing": 0.04, "Massively Multiplayer": 0.03,
+}
+GENRE_IDS = {genre: str(i) for i, genre in enumerate(GENRES, 1)}
+
+WOERTER = (
+    "dark soul star dragon legend hero quest kingdom empire space galaxy farm city world war night "
+    "shadow light blood iron steel forest sea ocean island sky tower dungeon castle knight wizard "
+    "witch hunter survivor zombie robot cyber neon racer drift tavern village dynasty medieval crusader "
+    "pirate thief raft valley garden cooking chef overcooked chained together craft builder tycoon "
+    "simulator manager defense battle arena tactics chronicles saga odyssey frontier horizon eclipse "
+    "phantom spirit ancient lost forgotten eternal last final super mega tiny little grand royal"
+).split()
+UNTERTITEL = ["Remastered", "Definitive Edition", "Deluxe", "Origins", "Reloaded", "The Lost Chapter",
+              "Gold Edition", "Director's Cut", "VR", "Online"]
+PUBLISHER = [f"{w.capitalize()} {s}" for w in WOERTER[:40] for s in ("Games", "Studios", "Interactive")]
+MONATE = ["Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
+
+
+def make_title(rng: random.Random) -> str:
+    words = [rng.choice(WOERTER).capitalize() for _ in range(rng.choices([1, 2, 3, 4, 5], [15, 40, 25, 12, 8])[0])]
+    if rng.random() < 0.15:
+        words.insert(0, "The")
+    title = " ".join(words)
+    r = rng.random()
+    if r < 0.10:
+        title += f" {rng.randint(2, 5)}"
+    elif r < 0.20:
+        title += f": {rng.choice(UNTERTITEL)}"
+    elif r < 0.25:
+        title += f": {' '.join(rng.choice(WOERTER).capitalize() for _ in range(2))}"
+    if rng.random() < 0.08:
+        title += rng.choice(["™", "®"])
+    return title
+
+
+def make_text(rng: random.Random, n: int) -> str:
+    return " ".join(rng.choices(WOERTER, k=n))
+
+
+def make_description(rng: random.Random, title: str) -> str:
+    """HTML wie auf Steam: Überschriften, Absätze, Listen und Bilder, zusammen etwa 1-8 KB."""
+    parts = [f"<h1>About {title}</h1>"]
+    for _ in range(rng.randint(2, 8)):
+        r = rng.random()
+        if r < 0.6:
+            parts.append(f"<p class=\"bb_paragraph\">{make_text(rng, rng.randint(30, 120))}</p>")
+        elif r < 0.8:
+            items = "".join(f"<li>{make_text(rng, rng.randint(3, 10))}</li>" for _ in range(rng.randint(3, 6)))
+            parts.append(f"<h2 class=\"bb_tag\">{make_text(rng, 2).title()}</h2><ul class=\"bb_ul\">{items}</ul>")
+        else:
+            parts.append(f"<img class=\"bb_img\" src=\"https://shared.example/images/{rng.getrandbits(48):x}.gif\">")
+    return "".join(parts)
+
+
+def make_release_date(rng: random.Random) -> dict:
+    r = rng.random()
+    if r < 0.05:
+        return {"coming_soon": True, "date": rng.choice(["Coming soon", "To be announced", f"Q{rng.randint(1, 4)} 2027", "2027"])}
+    day, month, year = rng.randint(1, 28), rng.choice(MONATE), rng.randint(1998, 2026)
+    fmt = f"{day} {month}, {year}" if r < 0.7 else f"{month} {day}, {year}"
+    return {"coming_soon": False, "date": fmt}
+
+
+def make_app(app_id: int, rng: random.Random) -> dict:
+    """Eine appdetails-Antwort für `app_id`."""
+    if rng.random() < FEHLERQUOTE:
+        return {str(app_id): {"success": False}}
+
+    title = make_title(rng)
+    genres = [g for g, share in GENRES.items() if rng.random() < share] or [rng.choice(list(GENRES))]
+    genres = genres[:4]
+    publisher = rng.choice(PUBLISHER)
+    data = {
+        "type": "game",
+        "name": title,
+        "steam_appid": app_id,
+        "is_free": "Free To Play" in genres,
+        "detailed_description": make_description(rng, title),
+        "short_description": make_text(rng, rng.randint(15, 40)).capitalize() + ".",
+        "developers": [publisher if rng.random() < 0.6 else rng.choice(PUBLISHER)],
+        "publishers": [publisher],
+        "platforms": {"windows": True, "mac": rng.random() < 0.3, "linux": rng.random() < 0.2},
+        "genres": [{"id": GENRE_IDS[g], "description": g} for g in genres],
+        "header_image": f"https://shared.example/store_item_assets/steam/apps/{app_id}/header.jpg",
+        "website": f"https://www.{title.split()[0].lower()}-game.example" if rng.random() < 0.5 else None,
+        "release_date": make_release_date(rng),
+    }
+    if rng.random() < 0.6:
+        data["movies"] = [{
+            "id": app_id * 10 + i,
+            "name": f"{title} Trailer {i + 1}",
+            "thumbnail": f"https://video.example/{app_id}/{i}/movie.jpg",
+            "hls_h264": f"https://video.example/{app_id}/{i}/hls_264_master.m3u8",
+            "highlight": i == 0 or rng.random() < 0.3,
+        } for i in range(rng.randint(1, 3))]
+    # Beliebtheit: wenige Spiele mit sehr vielen Reviews, die meisten mit wenigen oder keinen
+    reviews = int(rng.paretovariate(0.9) * 5) - 5
+    if reviews > 0:
+        data["recommendations"] = {"total": min(reviews, 2_000_000)}
+    return {str(app_id): {"success": True, "data": data}}
+
+
+def app_ids(n: int, csv: str = STEAM_ID_CSV) -> list[int]:
+    """Die ersten `n` Steam-IDs aus der CSV, bei Bedarf mit neuen IDs aufgefüllt."""
+    ids = list(dict.fromkeys(load_app_ids(csv)))[:n]
+    next_id = max(ids, default=0) + 10
+    while len(ids) < n:
+        ids.append(next_id)
+        next_id += 10
+    return ids
+
+
+def iter_catalog(n: int, seed: int = SEED, csv: str = STEAM_ID_CSV):
+    """Die Zeilen eines Katalogs mit `n` Spielen."""
+    for pos, app_id in enumerate(app_ids(n, csv)):
+        rng = random.Random(seed * 1_000_003 + pos)
+        yield json.dumps(make_app(app_id, rng), ensure_ascii=False)
+
+
+def write_catalog(path: str, n: int, seed: int = SEED, csv: str = STEAM_ID_CSV) -> str:
+    with open(path, "w", encoding="UTF-8") as f:
+        for line in iter_catalog(n, seed, csv):
+            f.write(line + "\n")
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Erzeugt einen synthetischen Steam-Katalog (appdetails-JSON).")
+    parser.add_argument("--spiele", type=int, default=10_000, help="Anzahl Spiele (10k bis 1M)")
+    parser.add_argument("--ausgabe", default="bench/katalog.txt")
+    parser.add_argument("--seed", type=int, default=SEED)
+    parser.add_argument("--csv", default=STEAM_ID_CSV)
+    args = parser.parse_args()
+    write_catalog(args.ausgabe, args.spiele, args.seed, args.csv)
+    print(f"{args.spiele} Spiele nach {args.ausgabe} geschrieben.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""
+Vergleicht zwei Ergebnis-Dateien von bench/run.py.
+
+Für jede Kennzahl, die in beiden Läufen vorkommt, werden alter und neuer Wert und das Verhältnis
+neu/alt ausgegeben (< 1 ist bei Latenzen und Laufzeiten besser, bei "spiele_pro_s" schlechter).
+
+Beispiel:
+    python -m bench.compare vorher.json nachher.json
+"""
+
+import argparse
+import json
+
+SKIP = {"meta"}
+KENNZAHLEN = {"p50", "p95", "p99", "mittel", "sekunden", "spiele_pro_s", "index_bytes"}
+
+
+def flatten(result: dict, prefix: str = "") -> dict[str, float]:
+    """Verschachtelte Ergebnisse als {"suche.titel.suche.p95": wert, ...}."""
+    values = {}
+    for key, value in result.items():
+        if not prefix and key in SKIP:
+            continue
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            values.update(flatten(value, name + "."))
+        elif isinstance(value, (int, float)) and (key in KENNZAHLEN or prefix.startswith("aufbau.")):
+            values[name] = value
+    return values
+
+
+def compare(old: dict, new: dict) -> list[tuple[str, float, float, float | None]]:
+    a, b = flatten(old), flatten(new)
+    return [(name, a[name], b[name], b[name] / a[name] if a[name] else None) for name in a if name in b]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Vergleicht zwei Benchmark-Ergebnisse.")
+    parser.add_argument("vorher")
+    parser.add_argument("nachher")
+    args = parser.parse_args()
+
+    with open(args.vorher, encoding="UTF-8") as f:
+        old = json.load(f)
+    with open(args.nachher, encoding="UTF-8") as f:
+        new = json.load(f)
+
+    rows = compare(old, new)
+    width = max((len(name) for name, *_ in rows), default=0)
+    for name, a, b, ratio in rows:
+        print(f"{name:<{width}}  {a:>12.3f}  {b:>12.3f}  {'' if ratio is None else f'{ratio:6.2f}x'}")
+
+
+if __name__ == "__main__":
+    main()
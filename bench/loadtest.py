@@ -0,0 +1,313 @@
+"""
+Lasttest mit vielen gleichzeitigen Sessions gegen einen lokalen Streamlit-Server (web.py).
+
+AppTest führt Skripte nicht threadsicher aus (gemeinsame Runtime, paralleles Kompilieren bricht ab),
+deshalb spricht der Lasttest das Protokoll des Browsers: jede simulierte Session ist eine eigene
+WebSocket-Verbindung zu /_stcore/stream und schickt BackMsg.rerun_script mit Query-String und
+Widget-Zuständen, wie es das Frontend tut. Ein Rerun gilt als fertig, wenn der Server
+script_finished meldet (Reruns, die das Skript selbst per st.rerun auslöst, zählen mit).
+
+Ablauf einer Session (wird wiederholt, bis die Messdauer um ist):
+    start       Startseite öffnen
+    suche       Suchtext eingeben
+    pill        eine Genre-Pill wählen
+    detail      eine Karte öffnen
+    zurueck     "Back to Overview"
+    picks       Editor's picks öffnen
+
+Pro Stufe (Anzahl gleichzeitiger Sessions) werden Durchsatz (Reruns/s), Latenzen pro Schritt und
+insgesamt (p50/p95/p99) sowie der Speicher des Server-Prozesses pro Session ausgegeben, als JSON
+wie bench/run.py. Der Server wird mit dem angegebenen Index (Standard: neu) gestartet, mit
+--spiele N stattdessen mit einem synthetischen Index (bench/catalog.py).
+
+Beispiel:
+    python -m bench.loadtest --sitzungen 1,4,16,32 --dauer 30 --ausgabe last.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import re
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+from streamlit.proto.WidgetStates_pb2 import WidgetState
+from websockets.asyncio.client import connect
+
+from bench.catalog import SEED, write_catalog
+from bench.run import ARBEIT, meta, summary
+
+SITZUNGEN = "1,2,4,8"   # Stufen der Nebenläufigkeit
+DAUER = 20.0            # Sekunden Messung pro Stufe
+TIMEOUT = 60.0          # Sekunden, bis ein Rerun als fehlgeschlagen gilt
+QUERIES = ["sea", "witcher", "farm simulator", "dark soul", "dragn", "kingdom", "raft", "star", "tavern", "racer"]
+GENRES = ["Action", "Adventure", "Casual", "Indie", "RPG", "Simulation", "Strategy"]
+DETAIL_LINK = re.compile(r"\?view=detail&amp;app=(\d+)|\?view=detail&app=(\d+)")
+FINISHED_EARLY = ForwardMsg.ScriptFinishedStatus.FINISHED_EARLY_FOR_RERUN
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def rss_bytes(pid: int) -> int | None:
+    """Aktueller Speicher (RSS) eines Prozesses, nur unter Linux."""
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return None
+
+
+def start_server(port: int, index_path: str) -> subprocess.Popen:
+    """Startet web.py über startup.py (vorgewärmt) mit dem Index unter `index_path` und wartet, bis der Server antwortet."""
+    env = dict(os.environ, INDEX_PATH=index_path, THUMBNAILS="0")
+    server = subprocess.Popen(
+        [sys.executable, "startup.py", "--server.headless", "true",
+         "--server.port", str(port), "--server.fileWatcherType", "none",
+         "--browser.gatherUsageStats", "false"],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.monotonic() + TIMEOUT
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError("Streamlit-Server konnte nicht gestartet werden.")
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/_stcore/health", timeout=1) as r:
+                if r.status == 200:
+                    return server
+        except OSError:
+            time.sleep(0.2)
+    server.kill()
+    raise RuntimeError("Streamlit-Server antwortet nicht.")
+
+
+class Session:
+    """Eine simulierte Browser-Session über die WebSocket-Verbindung des Frontends."""
+
+    def __init__(self, url: str, rng: random.Random):
+        self.url = url
+        self.rng = rng
+        self.ws = None
+        self.query_string = ""
+        self.page_hash = ""
+        self.pages: dict[str, str] = {}             # Seitenname -> page_script_hash
+        self.widgets: dict[str, str] = {}           # key -> Widget-id
+        self.options: dict[str, list[str]] = {}     # key -> angezeigte Optionen (Pills)
+        self.states: dict[str, WidgetState] = {}    # Widget-id -> letzter Zustand
+        self.detail_ids: list[int] = []
+        self.errors = 0
+
+    async def open(self):
+        self.ws = await connect(self.url, subprotocols=["streamlit"], max_size=None, open_timeout=TIMEOUT)
+
+    async def close(self):
+        if self.ws is not None:
+            await self.ws.close()
+
+    async def rerun(self, trigger: WidgetState | None = None) -> float:
+        """Schickt einen Rerun und wartet auf das Ende; liefert die Dauer in Sekunden."""
+        msg = BackMsg()
+        msg.rerun_script.query_string = self.query_string
+        msg.rerun_script.page_script_hash = self.page_hash
+        states = list(self.states.values()) + ([trigger] if trigger is not None else [])
+        msg.rerun_script.widget_states.widgets.extend(states)
+        self.detail_ids = []
+
+        start = time.perf_counter()
+        await self.ws.send(msg.SerializeToString())
+        while True:
+            fm = ForwardMsg()
+            fm.ParseFromString(await asyncio.wait_for(self.ws.recv(), TIMEOUT))
+            kind = fm.WhichOneof("type")
+            if kind == "delta":
+                self._read_delta(fm.delta)
+            elif kind == "page_info_changed":
+                self.query_string = fm.page_info_changed.query_string
+            elif kind == "navigation":
+                self.pages = {p.page_name: p.page_script_hash for p in fm.navigation.app_pages}
+                self.page_hash = fm.navigation.page_script_hash
+            elif kind == "script_finished" and fm.script_finished != FINISHED_EARLY:
+                return time.perf_counter() - start
+
+    def _read_delta(self, delta):
+        if delta.WhichOneof("type") != "new_element":
+            return
+        element = delta.new_element
+        kind = element.WhichOneof("type")
+        if kind == "exception":
+            self.errors += 1
+        elif kind == "markdown":
+            self.detail_ids += [int(a or b) for a, b in DETAIL_LINK.findall(element.markdown.body)]
+        else:
+            widget = getattr(element, kind)
+            widget_id = getattr(widget, "id", "")
+            if widget_id.startswith("$$ID-"):
+                self.widgets[widget_id.rsplit("-", 1)[1]] = widget_id
+                if kind == "button_group":
+                    self.options[widget_id.rsplit("-", 1)[1]] = [o.content for o in widget.options]
+
+    def _state(self, key: str) -> WidgetState:
+        state = WidgetState()
+        state.id = self.widgets[key]
+        return state
+
+    # Schritte einer Session
+
+    async def start(self) -> float:
+        self.query_string, self.page_hash, self.states = "", "", {}
+        return await self.rerun()
+
+    async def search(self) -> float:
+        state = self._state("search_input")
+        state.string_value = self.rng.choice(QUERIES)
+        self.states[state.id] = state
+        return await self.rerun()
+
+    async def pill(self) -> float:
+        options = [o for o in self.options.get("genres_pills", []) if o.split(" (")[0] in GENRES]
+        state = self._state("genres_pills")
+        state.string_array_value.data.append(self.rng.choice(options))
+        self.states[state.id] = state
+        return await self.rerun()
+
+    async def detail(self) -> float:
+        steam_id = self.rng.choice(self.detail_ids) if self.detail_ids else 10
+        q = dict(p.split("=", 1) for p in self.query_string.split("&") if "=" in p).get("q", "")
+        self.query_string = f"view=detail&app={steam_id}&q={q}"
+        return await self.rerun()
+
+    async def back(self) -> float:
+        trigger = self._state("back")
+        trigger.trigger_value = True
+        return await self.rerun(trigger)
+
+    async def picks(self) -> float:
+        self.page_hash = self.pages.get("Editor's picks", self.page_hash)
+        self.query_string = ""
+        return await self.rerun()
+
+    FLOW = ("start", "search", "pill", "detail", "back", "picks")
+    NAMES = {"start": "start", "search": "suche", "pill": "pill", "detail": "detail", "back": "zurueck", "picks": "picks"}
+
+
+async def drive(session: Session, until: float, think: float, latencies: dict[str, list[float]]):
+    """Wiederholt den Ablauf einer Session bis `until` (Zeitpunkt von time.monotonic)."""
+    while time.monotonic() < until:
+        for step in Session.FLOW:
+            try:
+                seconds = await getattr(session, step)()
+            except (KeyError, IndexError, asyncio.TimeoutError):
+                # Widget fehlt (z. B. Suche ohne Treffer) oder Server hängt: Ablauf neu beginnen
+                session.errors += 1
+                break
+            latencies[Session.NAMES[step]].append(seconds * 1000)
+            if think:
+                await asyncio.sleep(session.rng.uniform(0, 2 * think))
+            if time.monotonic() >= until:
+                break
+
+
+async def run_level(url: str, n: int, dauer: float, think: float, seed: int, pid: int | None) -> dict:
+    sessions = [Session(url, random.Random(seed * 1000 + i)) for i in range(n)]
+    await asyncio.gather(*(s.open() for s in sessions))
+    latencies: dict[str, list[float]] = {name: [] for name in Session.NAMES.values()}
+    start = time.monotonic()
+    await asyncio.gather(*(drive(s, start + dauer, think, latencies) for s in sessions))
+    elapsed = time.monotonic() - start
+    rss = rss_bytes(pid) if pid else None           # gemessen, solange alle Sessions offen sind
+    await asyncio.gather(*(s.close() for s in sessions))
+
+    total = [ms for values in latencies.values() for ms in values]
+    return {
+        "sitzungen": n,
+        "reruns": len(total),
+        "reruns_pro_s": round(len(total) / elapsed, 2),
+        "rerun": summary(total),
+        "schritte": {name: summary(values) for name, values in latencies.items()},
+        "fehler": sum(s.errors for s in sessions),
+        "rss_bytes": rss,
+    }
+
+
+async def run_levels(url: str, levels: list[int], dauer: float, think: float, seed: int,
+                     pid: int | None) -> list[dict]:
+    # Aufwärmen: Index öffnen und die abgeleiteten Strukturen bauen, danach Grundlinie für den Speicher
+    await run_level(url, 1, min(dauer, 5.0), 0.0, seed, None)
+    baseline = rss_bytes(pid) if pid else None
+    results = []
+    for n in levels:
+        result = await run_level(url, n, dauer, think, seed, pid)
+        if baseline is not None and result["rss_bytes"] is not None:
+            result["bytes_pro_sitzung"] = round((result["rss_bytes"] - baseline) / n)
+        result["rss_grundlinie_bytes"] = baseline
+        results.append(result)
+        print(f"{n:>4} Sessions: {result['reruns_pro_s']:8.2f} Reruns/s, p95 {result['rerun'].get('p95')} ms, "
+              f"{result['fehler']} Fehler", file=sys.stderr)
+    return results
+
+
+def prepare_index(args) -> str:
+    if not args.spiele:
+        return args.index
+    import indexing
+
+    os.makedirs(args.arbeit, exist_ok=True)
+    quelle = os.path.join(args.arbeit, f"katalog-{args.spiele}-{args.seed}.txt")
+    index_path = os.path.join(args.arbeit, f"index-{args.spiele}-{args.seed}")
+    if not os.path.exists(quelle):
+        write_catalog(quelle, args.spiele, args.seed)
+    if not os.path.exists(os.path.join(index_path, "meta.json")):
+        indexing.run(quelle, index_path, voll=True, quiet=True)
+    return os.path.abspath(index_path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Lasttest mit gleichzeitigen Sessions gegen web.py (Ergebnis als JSON).")
+    parser.add_argument("--sitzungen", default=SITZUNGEN, help="Stufen, z. B. 1,4,16")
+    parser.add_argument("--dauer", type=float, default=DAUER, help="Sekunden pro Stufe")
+    parser.add_argument("--denkzeit", type=float, default=0.0, help="mittlere Pause zwischen zwei Schritten (s)")
+    parser.add_argument("--index", default="neu", help="Index für den Server")
+    parser.add_argument("--spiele", type=int, default=0, help="stattdessen synthetischen Index mit N Spielen bauen")
+    parser.add_argument("--arbeit", default=ARBEIT, help="Ordner für Katalog und Index")
+    parser.add_argument("--url", default=None, help="laufenden Server verwenden, z. B. ws://localhost:8501/_stcore/stream")
+    parser.add_argument("--seed", type=int, default=SEED)
+    parser.add_argument("--ausgabe", default=None, help="JSON-Datei (Standard: stdout)")
+    args = parser.parse_args()
+    levels = [int(n) for n in args.sitzungen.split(",")]
+
+    server = None
+    if args.url:
+        url, pid = args.url, None
+    else:
+        port = free_port()
+        server = start_server(port, prepare_index(args))
+        url, pid = f"ws://127.0.0.1:{port}/_stcore/stream", server.pid
+    try:
+        result = {"meta": meta(args), "stufen": asyncio.run(run_levels(url, levels, args.dauer, args.denkzeit, args.seed, pid))}
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    output = json.dumps(result, indent=2, ensure_ascii=False)
+    if args.ausgabe:
+        with open(args.ausgabe, "w", encoding="UTF-8") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
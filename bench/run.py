@@ -0,0 +1,280 @@
+"""
+Wiederholbare Benchmarks auf einem synthetischen Katalog (siehe bench/catalog.py).
+
+Gemessen wird, was ein Rerun der Seiten kostet:
+
+    indizierung     indexing.run auf dem Katalog (Spiele/s, Größe des Index)
+    aehnlich        similar.build, die Nachbarn aller Spiele für die Detailseite
+    aufbau          Index öffnen und die pro Generation abgeleiteten Strukturen bauen
+    suche           search_page und facet_counts (wie ein Rerun von home.py) über einen festen Mix
+                    aus Titeln, Tippfehlern, angefangenen Wörtern und Genre-Kombinationen, jeweils mit
+                    leerem und mit gefülltem QueryCache, dazu dieselben Anfragen über die Engine,
+                    sortiert nach Erscheinungsdatum, mit einem Jahresbereich und als Volltextsuche
+                    (mit Snippets, leerer Cache)
+    vorschlaege     search.suggest für angefangene Eingaben
+    dokumente       get_doc (Detailseite), ähnliche Spiele, get_docs und Karten für eine Seite
+    karten_html     render.grid_html für eine und vier Seiten
+
+Latenzen stehen als p50/p95/p99 in Millisekunden in der JSON-Ausgabe. Der Anfrage-Mix hängt nur
+von --seed und dem Katalog ab, zwei Läufe mit denselben Parametern sind also vergleichbar
+(bench/compare.py).
+
+Beispiel:
+    python -m bench.run --spiele 100000 --ausgabe ergebnis.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from importlib import metadata
+
+import indexing
+import render
+import search
+import searchindex
+import similar
+import thumbnails
+from bench.catalog import SEED, write_catalog
+from search import PAGE_SIZE
+
+ARBEIT = "bench/arbeit"         # Katalog und Index der Benchmarks
+ANFRAGEN = 50                   # Anfragen pro Kategorie
+WIEDERHOLUNGEN = 3              # Messungen pro Anfrage
+GENRE_OPT = ["Action", "Adventure", "Casual", "Indie", "Racing", "RPG", "Simulation", "Strategy"]
+MODUS_OPT = ["Multiplayer", "Free to play"]
+
+
+def timed(fn) -> float:
+    """Laufzeit eines Aufrufs in Millisekunden."""
+    start = time.perf_counter()
+    fn()
+    return (time.perf_counter() - start) * 1000
+
+
+def summary(samples: list[float]) -> dict:
+    """Kennzahlen einer Messreihe in Millisekunden."""
+    if not samples:
+        return {"n": 0}
+    q = statistics.quantiles(samples, n=100, method="inclusive") if len(samples) > 1 else samples * 99
+    return {
+        "n": len(samples),
+        "p50": round(q[49], 4),
+        "p95": round(q[94], 4),
+        "p99": round(q[98], 4),
+        "mittel": round(statistics.fmean(samples), 4),
+        "max": round(max(samples), 4),
+    }
+
+
+def dir_size(path: str) -> int:
+    return sum(os.path.getsize(os.path.join(root, f)) for root, _, files in os.walk(path) for f in files)
+
+
+def typo(rng: random.Random, word: str) -> str:
+    """Ein Tippfehler: Buchstabe vertauscht, ausgelassen, verdoppelt oder ersetzt."""
+    i = rng.randrange(1, len(word) - 1)
+    kind = rng.randrange(4)
+    if kind == 0:
+        return word[:i - 1] + word[i] + word[i - 1] + word[i + 1:]
+    if kind == 1:
+        return word[:i] + word[i + 1:]
+    if kind == 2:
+        return word[:i] + word[i] + word[i:]
+    return word[:i] + rng.choice("aeiourstnl") + word[i + 1:]
+
+
+def query_mix(titles: list[str], seed: int, n: int = ANFRAGEN) -> dict[str, list[tuple]]:
+    """Fester Anfrage-Mix (Suchtext, Genres, Modus) pro Kategorie."""
+    rng = random.Random(seed)
+    titles = [t for t in titles if t.split()]
+    sample = lambda: rng.choice(titles).lower()
+    genres = lambda k: rng.sample(GENRE_OPT, k)
+
+    mix: dict[str, list[tuple]] = {"titel": [], "tippfehler": [], "anfang": [], "genres": [], "titel+genres": []}
+    for _ in range(n):
+        mix["titel"].append((sample(), [], []))
+
+        words = sample().split()
+        long_words = [i for i, w in enumerate(words) if len(w) >= 4]
+        if long_words:
+            i = rng.choice(long_words)
+            words[i] = typo(rng, words[i])
+        mix["tippfehler"].append((" ".join(words), [], []))
+
+        word = max(sample().split(), key=len)
+        mix["anfang"].append((word[:rng.randint(3, max(3, len(word) - 1))], [], []))
+
+        mix["genres"].append(("", genres(rng.randint(1, 3)), rng.sample(MODUS_OPT, rng.randint(0, 1))))
+
+        mix["titel+genres"].append((rng.choice(sample().split()), genres(1), []))
+    return mix
+
+
+def bench_indexing(quelle: str, index_path: str, worker: int, threads: int) -> dict:
+    start = time.perf_counter()
+    stats = indexing.run(quelle, index_path, voll=True, threads=threads, worker=worker, quiet=True)
+    seconds = time.perf_counter() - start
+    games = stats.get("neu", 0)
+    return {
+        "sekunden": round(seconds, 3),
+        "spiele": games,
+        "spiele_pro_s": round(games / seconds, 1) if seconds else None,
+        "fehler": stats.get("fehler", 0),
+        "index_bytes": dir_size(index_path),
+    }
+
+
+def bench_open(index_path: str) -> tuple[dict, "searchindex.Snapshot"]:
+    """Index öffnen und alle abgeleiteten Strukturen einmal bauen (wie der erste Rerun nach dem Start)."""
+    result = {}
+    searchindex.INDEX_PATH = index_path
+    searchindex._shared.pop(index_path, None)
+    result["oeffnen"] = round(timed(lambda: searchindex.get(index_path)), 3)
+    snapshot = searchindex.get(index_path)
+    for name in ("id_map", "cards", "titles", "facets", "suggestions", "release"):
+        result[name] = round(timed(lambda: getattr(snapshot, name)), 3)
+    result["genre_bitsets"] = round(timed(lambda: snapshot.facets.filter(GENRE_OPT + MODUS_OPT)), 3)
+    return {"ms": result, "dokumente": snapshot.searcher.num_docs}, snapshot
+
+
+def bench_queries(snapshot, mix: dict[str, list[tuple]], repeat: int) -> dict:
+    options = GENRE_OPT + MODUS_OPT
+    # mittleres Drittel der Erscheinungsjahre im Katalog
+    bounds = search.release_years()
+    years = (bounds[0] + (bounds[1] - bounds[0]) // 3, bounds[1] - (bounds[1] - bounds[0]) // 3) if bounds else None
+    results = {}
+    for category, queries in mix.items():
+        cold, warm, counts, engine, newest, in_years, fulltext, hits = [], [], [], [], [], [], [], []
+        for q, genres, modus in queries:
+            for _ in range(repeat):
+                search.cache.clear()
+                cold.append(timed(lambda: search.search_page(q, genres, modus)))
+                warm.append(timed(lambda: search.search_page(q, genres, modus)))
+                search.cache.clear()
+                counts.append(timed(lambda: search.facet_counts(q, genres, modus, options)))
+                search.cache.clear()
+                newest.append(timed(lambda: search.search_page(q, genres, modus, newest=True)))
+                search.cache.clear()
+                in_years.append(timed(lambda: search.search_page(q, genres, modus, years=years)))
+                search.cache.clear()
+                fulltext.append(timed(lambda: search.search_page(q, genres, modus, fulltext=True)))
+                query = search.build_query(snapshot.index, q, genres, modus)
+                engine.append(timed(lambda: snapshot.searcher.search(query, PAGE_SIZE, count=True)))
+            hits.append(search.search_page(q, genres, modus)[1])
+        results[category] = {
+            "suche": summary(cold),
+            "suche_cache": summary(warm),
+            "zaehler": summary(counts),
+            "engine": summary(engine),
+            "neueste": summary(newest),
+            "jahre": summary(in_years),
+            "volltext": summary(fulltext),
+            "treffer_median": statistics.median(hits),
+        }
+    return results
+
+
+def bench_suggest(titles: list[str], seed: int, repeat: int) -> dict:
+    rng = random.Random(seed + 1)
+    prefixes = [rng.choice(titles).lower()[:rng.randint(1, 6)] for _ in range(ANFRAGEN)]
+    samples = [timed(lambda: search.suggest(p)) for p in prefixes for _ in range(repeat)]
+    return summary(samples)
+
+
+def bench_docs(snapshot, seed: int, repeat: int) -> dict:
+    rng = random.Random(seed + 2)
+    ids = sorted(snapshot.id_map)
+    pages = [rng.sample(ids, min(PAGE_SIZE, len(ids))) for _ in range(ANFRAGEN)]
+    return {
+        "get_doc": summary([timed(lambda: search.get_doc(page[0])) for page in pages for _ in range(repeat)]),
+        "aehnliche": summary([timed(lambda: search.similar_cards(page[0])) for page in pages for _ in range(repeat)]),
+        "get_docs_seite": summary([timed(lambda: search.get_docs(page)) for page in pages for _ in range(repeat)]),
+        "karten_seite": summary([timed(lambda: search.get_cards(page)) for page in pages for _ in range(repeat)]),
+    }
+
+
+def bench_cards_html(snapshot, seed: int, repeat: int) -> dict:
+    rng = random.Random(seed + 3)
+    ids = sorted(snapshot.id_map)
+    result = {}
+    for seiten in (1, 4):
+        pages = [search.get_cards(rng.sample(ids, min(PAGE_SIZE * seiten, len(ids)))) for _ in range(ANFRAGEN)]
+        samples = [timed(lambda: render.grid_html(cards, "witcher", ["Action"], [])) for cards in pages for _ in range(repeat)]
+        result[f"{seiten * PAGE_SIZE}_karten"] = summary(samples)
+    return result
+
+
+def meta(args) -> dict:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True).stdout.strip()
+    except OSError:
+        commit = ""
+    return {
+        "zeit": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "tantivy": metadata.version("tantivy"),
+        "system": platform.platform(),
+        "cpus": os.cpu_count(),
+        "parameter": vars(args),
+    }
+
+
+def run(args) -> dict:
+    # Die Bilder des Katalogs liegen auf shared.example: während der Messung nichts herunterladen
+    thumbnails.cache.fetch = False
+    os.makedirs(args.arbeit, exist_ok=True)
+    quelle = args.katalog or os.path.join(args.arbeit, f"katalog-{args.spiele}-{args.seed}.txt")
+    if not os.path.exists(quelle):
+        print(f"Erzeuge Katalog mit {args.spiele} Spielen ...", file=sys.stderr)
+        write_catalog(quelle, args.spiele, args.seed)
+
+    result = {"meta": meta(args)}
+    index_path = args.index or os.path.join(args.arbeit, "index")
+    if not args.index:
+        print("Indiziere ...", file=sys.stderr)
+        result["indizierung"] = bench_indexing(quelle, index_path, args.worker, args.threads)
+        print("Ähnliche Spiele ...", file=sys.stderr)
+        result["aehnlich"] = similar.build(index_path, quiet=True)
+
+    print("Suche ...", file=sys.stderr)
+    result["aufbau"], snapshot = bench_open(index_path)
+    titles = [card["title"] for card in search.get_cards(sorted(snapshot.id_map))]
+    mix = query_mix(titles, args.seed)
+    result["suche"] = bench_queries(snapshot, mix, args.wiederholungen)
+    result["vorschlaege"] = bench_suggest(titles, args.seed, args.wiederholungen)
+    result["dokumente"] = bench_docs(snapshot, args.seed, args.wiederholungen)
+    result["karten_html"] = bench_cards_html(snapshot, args.seed, args.wiederholungen)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks für Indizierung und Suche (Ergebnis als JSON).")
+    parser.add_argument("--spiele", type=int, default=10_000, help="Größe des synthetischen Katalogs")
+    parser.add_argument("--seed", type=int, default=SEED)
+    parser.add_argument("--katalog", default=None, help="vorhandene Rohdaten statt eines erzeugten Katalogs")
+    parser.add_argument("--index", default=None, help="vorhandenen Index messen (ohne Indizierung)")
+    parser.add_argument("--arbeit", default=ARBEIT, help="Ordner für Katalog und Index")
+    parser.add_argument("--worker", type=int, default=indexing.WORKER, help="Parse-Prozesse beim Indizieren")
+    parser.add_argument("--threads", type=int, default=0, help="Indexing-Threads des Writers (0 = automatisch)")
+    parser.add_argument("--wiederholungen", type=int, default=WIEDERHOLUNGEN)
+    parser.add_argument("--ausgabe", default=None, help="JSON-Datei (Standard: stdout)")
+    args = parser.parse_args()
+
+    result = json.dumps(run(args), indent=2, ensure_ascii=False)
+    if args.ausgabe:
+        with open(args.ausgabe, "w", encoding="UTF-8") as f:
+            f.write(result + "\n")
+    else:
+        print(result)
+
+
+if __name__ == "__main__":
+    main()
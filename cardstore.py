@@ -0,0 +1,159 @@
+"""
+Kompakte Karten-Daten für das Ergebnis-Raster, getrennt vom Tantivy-Docstore.
+
+Für eine Karte braucht das Raster nur Titel, Bild, Kurzbeschreibung und Genres (dazu kommt die
+Anzahl der Steam-Reviews als Beliebtheit für die Vorschläge in suggest.py). Diese Felder
+werden beim Indizieren zusätzlich in eine eigene Datei im Index-Ordner geschrieben:
+
+    cards.jsonl   eine JSON-Zeile pro Spiel (wird beim Indizieren nur angehängt)
+    cards.idx     Tabelle aus int64-Offsets, Position = Feld "id" (-1 = kein Spiel)
+
+Geänderte und gelöschte Spiele lassen ihre alte Zeile als toten Eintrag zurück. Ist mehr als
+COMPACT_SHARE der Datei tot, schreibt `CardWriter.close` beide Dateien neu (`compact_cards`, auch
+von indexpflege.py aufgerufen). Laufende Leser behalten per mmap die alten Dateien; neue Leser
+öffnen die Karten erst nach dem Commit des Index, dann sind beide Dateien schon ausgetauscht.
+
+Beide Dateien werden per mmap gelesen, eine Karte kostet also einen Offset-Lookup und ein kleines
+json.loads statt eines kompletten (komprimierten) Dokuments mit der großen HTML-Beschreibung.
+Das vollständige Dokument wird nur noch für die Detailseite aus dem Index geladen.
+"""
+
+import json
+import mmap
+import os
+import struct
+from array import array
+
+CARDS_FILE = "cards.jsonl"
+OFFSETS_FILE = "cards.idx"
+COMPACT_SHARE = 0.5             # Anteil toter Bytes, ab dem die Karten-Datei neu geschrieben wird
+COMPACT_MIN = 1_000_000         # ... aber erst ab so vielen toten Bytes
+
+
+def card_from_fields(fields: dict[str, list], doc_id: int) -> dict:
+    """Karte aus den Feldern von indexing.extract_fields."""
+    return {
+        "id": doc_id,
+        "steamId": fields["steamId"][0],
+        "title": fields.get("title", [""])[0],
+        "image": fields.get("image", [""])[0],
+        "description_short": fields.get("description_short", [""])[0],
+        "genres": fields.get("genres", []),
+        "recommendations": fields.get("recommendations", [0])[0],
+    }
+
+
+class CardWriter:
+    """Schreibt Karten beim Indizieren. Bestehende Karten bleiben erhalten (inkrementeller Modus)."""
+
+    def __init__(self, index_path: str):
+        self.cards_path = os.path.join(index_path, CARDS_FILE)
+        self.offsets_path = os.path.join(index_path, OFFSETS_FILE)
+        self.offsets = array("q")
+        if os.path.exists(self.offsets_path):
+            with open(self.offsets_path, "rb") as f:
+                self.offsets.frombytes(f.read())
+        self.file = open(self.cards_path, "ab")
+
+    def put(self, card: dict):
+        doc_id = card["id"]
+        if doc_id >= len(self.offsets):
+            self.offsets.extend([-1] * (doc_id + 1 - len(self.offsets)))
+        self.offsets[doc_id] = self.file.tell()
+        self.file.write(json.dumps(card, ensure_ascii=False).encode("UTF-8") + b"\n")
+
+    def delete(self, doc_id: int):
+        if doc_id < len(self.offsets):
+            self.offsets[doc_id] = -1
+
+    def close(self):
+        """Schreibt die Offset-Tabelle atomar, erst danach sehen Leser die neuen Karten. Räumt bei Bedarf auf."""
+        self.file.close()
+        with open(self.offsets_path + ".tmp", "wb") as f:
+            f.write(self.offsets.tobytes())
+        os.replace(self.offsets_path + ".tmp", self.offsets_path)
+
+        index_path = os.path.dirname(self.cards_path)
+        total, live = card_usage(index_path)
+        if total - live > max(COMPACT_MIN, total * COMPACT_SHARE):
+            compact_cards(index_path)
+
+
+class CardStore:
+    """Lesezugriff auf die Karten eines Index-Ordners (per mmap, von allen Sessions geteilt)."""
+
+    def __init__(self, index_path: str):
+        self.size = 0
+        self.cards = self.offsets = None
+        cards_path = os.path.join(index_path, CARDS_FILE)
+        offsets_path = os.path.join(index_path, OFFSETS_FILE)
+        if not os.path.exists(offsets_path) or os.path.getsize(cards_path) == 0:
+            return
+        with open(offsets_path, "rb") as f:
+            if os.fstat(f.fileno()).st_size:
+                self.offsets = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                self.size = len(self.offsets) // 8
+        with open(cards_path, "rb") as f:
+            self.cards = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def __len__(self) -> int:
+        return self.size
+
+    def get(self, doc_id: int) -> dict | None:
+        if not 0 <= doc_id < self.size:
+            return None
+        (offset,) = struct.unpack_from("=q", self.offsets, doc_id * 8)
+        if offset < 0 or offset >= len(self.cards):
+            return None
+        end = self.cards.find(b"\n", offset)
+        try:
+            card = json.loads(self.cards[offset:end if end >= 0 else len(self.cards)])
+        except ValueError:
+            return None     # Offsets und Karten-Datei passen nicht zusammen (gerade neu geschrieben)
+        return card if card.get("id") == doc_id else None
+
+    def get_many(self, doc_ids) -> list[dict]:
+        """Karten in der Reihenfolge von `doc_ids`, fehlende werden übersprungen."""
+        return [card for card in map(self.get, doc_ids) if card is not None]
+
+
+def _records(store: CardStore):
+    """(id, Offset, Länge inkl. Zeilenende) aller Karten, die noch von einer id referenziert werden."""
+    for doc_id in range(len(store)):
+        (offset,) = struct.unpack_from("=q", store.offsets, doc_id * 8)
+        if 0 <= offset < len(store.cards):
+            end = store.cards.find(b"\n", offset)
+            yield doc_id, offset, (end if end >= 0 else len(store.cards)) - offset + 1
+
+
+def card_usage(index_path: str) -> tuple[int, int]:
+    """Bytes der Karten-Datei insgesamt und davon noch von einer id referenziert."""
+    path = os.path.join(index_path, CARDS_FILE)
+    if not os.path.exists(path):
+        return 0, 0
+    store = CardStore(index_path)
+    if store.offsets is None:
+        return os.path.getsize(path), 0
+    return len(store.cards), sum(length for _, _, length in _records(store))
+
+
+def compact_cards(index_path: str) -> tuple[int, int]:
+    """Schreibt Karten-Datei und Offsets nur mit den lebenden Karten neu; gibt die Bytes vorher/nachher zurück."""
+    cards_path = os.path.join(index_path, CARDS_FILE)
+    offsets_path = os.path.join(index_path, OFFSETS_FILE)
+    store = CardStore(index_path)
+    if store.offsets is None:
+        return 0, 0
+    before = len(store.cards)
+    offsets = array("q", [-1]) * len(store)
+    with open(cards_path + ".tmp", "wb") as f:
+        for doc_id, offset, length in _records(store):
+            offsets[doc_id] = f.tell()
+            line = store.cards[offset:offset + length]
+            f.write(line if line.endswith(b"\n") else line + b"\n")
+        after = f.tell()
+    with open(offsets_path + ".tmp", "wb") as f:
+        f.write(offsets.tobytes())
+    os.replace(cards_path + ".tmp", cards_path)
+    os.replace(offsets_path + ".tmp", offsets_path)
+    return before, after
@@ -0,0 +1,237 @@
+"""
+Tägliche Aktualisierung des RawStores: nur neue und fällige Steam-IDs werden geholt.
+
+getjason.py holt einmal den ganzen Katalog. Danach gleicht dieses Skript die aktuelle steamID.csv
+mit dem ab, was schon geholt wurde, und arbeitet eine Warteschlange nach Priorität ab:
+
+    neu             IDs aus der CSV, die es im RawStore noch nicht gibt
+    aktuell         vor höchstens RECENT_DAYS Tagen erschienen oder angekündigt ("Coming soon",
+                    Datum in der Zukunft): alle RECENT_INTERVAL Tage
+    beliebt         die POPULAR_TOP meistaufgerufenen Detailseiten der letzten VIEW_DAYS Tage
+                    (views.py): alle POPULAR_INTERVAL Tage
+    sweep           alle übrigen, die älteste Abfrage zuerst (frühestens nach SWEEP_MIN_AGE Tagen)
+
+Ein Lauf holt höchstens `budget` IDs (Standard: so viele, wie bei --rate in --minuten passen), der
+sweep bekommt den Rest des Budgets und läuft so langsam einmal durch den ganzen Katalog.
+
+Pro Steam-ID merkt sich STATE_FILE (im RawStore-Ordner) den Zeitpunkt der letzten Abfrage, der letzten
+Änderung, den Hash der Index-Felder der Antwort (indexing.fields_hash), den Erscheinungstag und die
+Fehlversuche in Folge. Eine Antwort, deren Index-Felder sich nicht geändert haben (nur Preis, Review-Zahl
+u. Ä.), wird nicht noch einmal in den RawStore geschrieben, dort sammeln sich also keine Duplikate. Fehlgeschlagene IDs kommen nach RETRY, 2·RETRY, ... wieder.
+Beim ersten Lauf wird der Zustand aus dem RawStore übernommen (Zeitpunkt: Änderungszeit des Shards).
+
+Beispiel:
+    python delta.py --nur-plan          # Warteschlange zeigen, nichts holen
+    python delta.py --minuten 30        # abarbeiten, danach: python indexing.py && python similar.py
+"""
+
+import argparse
+import json
+import os
+import threading
+import time
+
+from getjason import MAX_VERSUCHE, RATE, STEAM_API, STEAM_ID_CSV, THREADS, WEG, fetch_many, load_app_ids
+from indexing import fields_hash
+from rawstore import RawStore, STORE_PATH
+from releasedate import parse_release_date
+import views
+
+STATE_FILE = "crawl_state.tsv"      # Steam-ID, geprüft, geändert, Hash, Erscheinungstag, Fehler
+DAY = 86400
+RECENT_DAYS = 30
+RECENT_INTERVAL = 2 * DAY
+POPULAR_TOP = 500
+VIEW_DAYS = 7
+POPULAR_INTERVAL = 3 * DAY
+SWEEP_MIN_AGE = 14 * DAY
+NO_DATA_MIN_AGE = 90 * DAY          # success=false (entfernt, regional gesperrt, ...)
+RETRY = DAY                         # nach dem n-ten Fehler in Folge RETRY * 2**(n-1) warten ...
+MAX_RETRY = 30 * DAY                # ... höchstens so lange
+MINUTEN = 30
+
+# Erscheinungstag: Tage seit 1970 oder einer dieser Werte
+UNBEKANNT, BALD, OHNE_DATEN = -1, -2, -3
+PRIOS = ("neu", "aktuell", "beliebt", "sweep")
+
+
+def release_day(app_id: int, text: str) -> int:
+    """Erscheinungstag aus einer Rohantwort (BALD für angekündigte Spiele, OHNE_DATEN bei success=false)."""
+    try:
+        entry = json.loads(text)[str(app_id)]
+    except (ValueError, KeyError, TypeError):
+        return UNBEKANNT
+    if not entry.get("success"):
+        return OHNE_DATEN
+    release = (entry.get("data") or {}).get("release_date") or {}
+    if release.get("coming_soon"):
+        return BALD
+    day = parse_release_date(release.get("date") or "")
+    return int(day.timestamp()) // DAY if day is not None else UNBEKANNT
+
+
+class CrawlState:
+    """Append-only Protokoll pro Steam-ID: (geprüft, geändert, Hash, Erscheinungstag, Fehler); die letzte Zeile gilt."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.entries: dict[int, tuple[int, int, str, int, int]] = {}
+        self.lock = threading.Lock()
+        lines = 0
+        if os.path.exists(path):
+            with open(path, "r", encoding="UTF-8") as f:
+                for line in f:
+                    parts = line.rstrip("\n").split("\t")
+                    if len(parts) != 6 or not parts[5].isdigit():
+                        continue        # halb geschriebene Zeile nach einem Abbruch
+                    app_id, checked, changed, h, day, fails = parts
+                    self.entries[int(app_id)] = (int(checked), int(changed), h, int(day), int(fails))
+                    lines += 1
+        if lines > 2 * len(self.entries) + 1000:
+            self.compact()
+        self.file = open(path, "a", encoding="UTF-8")
+
+    def __contains__(self, app_id: int) -> bool:
+        return app_id in self.entries
+
+    def get(self, app_id: int):
+        return self.entries.get(app_id)
+
+    def set(self, app_id: int, entry: tuple[int, int, str, int, int]):
+        with self.lock:
+            self.entries[app_id] = entry
+            self.file.write(f"{app_id}\t" + "\t".join(map(str, entry)) + "\n")
+            self.file.flush()
+
+    def compact(self):
+        """Schreibt nur den letzten Stand jeder ID neu (atomar)."""
+        with open(self.path + ".tmp", "w", encoding="UTF-8") as f:
+            for app_id, entry in self.entries.items():
+                f.write(f"{app_id}\t" + "\t".join(map(str, entry)) + "\n")
+        os.replace(self.path + ".tmp", self.path)
+
+    def adopt(self, store: RawStore) -> int:
+        """Übernimmt IDs aus dem RawStore, die noch keinen Zustand haben (erster Lauf)."""
+        missing = {app_id for app_id in store.entries if app_id not in self.entries}
+        if not missing:
+            return 0
+        mtimes = {shard: int(os.path.getmtime(store.shard_path(shard))) for shard in store.shards()}
+        for app_id, text in store.iter_records():
+            if app_id in missing:
+                checked = mtimes.get(store.entries[app_id][0], 0)
+                self.set(app_id, (checked, checked, fields_hash(str(app_id), text), release_day(app_id, text), 0))
+        return len(missing)
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def retry_wait(fails: int) -> int:
+    return min(MAX_RETRY, RETRY * 2 ** (fails - 1))
+
+
+def plan(app_ids: list[int], state: CrawlState, popular: set[int], budget: int,
+         now: float | None = None) -> tuple[list[tuple[int, str]], dict[str, int]]:
+    """Die Warteschlange (Steam-ID, Priorität) für einen Lauf und die Zahl der fälligen IDs pro Priorität."""
+    now = time.time() if now is None else now
+    today = int(now) // DAY
+    due: dict[str, list[tuple[float, int]]] = {prio: [] for prio in PRIOS}
+    seen = set()
+    for app_id in app_ids:
+        if app_id in seen:
+            continue
+        seen.add(app_id)
+        entry = state.get(app_id)
+        if entry is None:
+            due["neu"].append((0, app_id))
+            continue
+        checked, _, h, day, fails = entry
+        age = now - checked
+        if fails and age < retry_wait(fails):
+            continue
+        if not h:
+            due["neu"].append((checked, app_id))         # noch nie erfolgreich geholt
+        elif day == BALD or (day >= 0 and today - day <= RECENT_DAYS):
+            if age >= RECENT_INTERVAL or fails:
+                due["aktuell"].append((checked, app_id))
+        elif app_id in popular and age >= POPULAR_INTERVAL:
+            due["beliebt"].append((checked, app_id))
+        elif age >= (NO_DATA_MIN_AGE if day == OHNE_DATEN else SWEEP_MIN_AGE) or fails:
+            due["sweep"].append((checked, app_id))
+
+    queue = []
+    counts = {}
+    for prio in PRIOS:
+        counts[prio] = len(due[prio])
+        for _, app_id in sorted(due[prio]):          # am längsten nicht geprüfte zuerst
+            if len(queue) >= budget:
+                break
+            queue.append((app_id, prio))
+    return queue, counts
+
+
+def popular_ids(views_path: str, top: int = POPULAR_TOP, days: int = VIEW_DAYS) -> set[int]:
+    counts = views.read_views(views_path, days)
+    return set(sorted(counts, key=counts.get, reverse=True)[:top])
+
+
+def refresh(queue: list[tuple[int, str]], store: RawStore, state: CrawlState, threads: int = THREADS,
+            rate: float = RATE, api: str = STEAM_API, max_versuche: int = MAX_VERSUCHE) -> dict[str, int]:
+    """Holt die IDs der Warteschlange; nur neue oder geänderte Antworten landen im RawStore."""
+    stats = {"neu": 0, "geändert": 0, "unverändert": 0, "fehler": 0}
+    for app_id, text in fetch_many([app_id for app_id, _ in queue], threads, rate, api, max_versuche,
+                                   desc="Aktualisiere fällige Steam-IDs"):
+        now = int(time.time())
+        checked, changed, old_hash, day, fails = state.get(app_id) or (0, 0, "", UNBEKANNT, 0)
+        if text is None or text is WEG:
+            state.set(app_id, (now, changed, old_hash, day, fails + 1))
+            stats["fehler"] += 1
+            continue
+        h = fields_hash(str(app_id), text)
+        if h == old_hash:
+            state.set(app_id, (now, changed, h, day, 0))
+            stats["unverändert"] += 1
+            continue
+        store.put(app_id, text)
+        state.set(app_id, (now, now, h, release_day(app_id, text), 0))
+        stats["geändert" if old_hash else "neu"] += 1
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Holt nur neue und fällige Steam-IDs (tägliche Aktualisierung).")
+    parser.add_argument("--csv", default=STEAM_ID_CSV, help="CSV mit der Spalte 'steamid'")
+    parser.add_argument("--ausgabe", default=STORE_PATH, help="RawStore-Ordner")
+    parser.add_argument("--views", default=views.VIEWS_FILE, help="Aufrufe der Detailseiten (views.py)")
+    parser.add_argument("--threads", type=int, default=THREADS)
+    parser.add_argument("--rate", type=float, default=RATE, help="max. Anfragen pro Sekunde")
+    parser.add_argument("--minuten", type=float, default=MINUTEN, help="Dauer eines Laufs, bestimmt das Budget")
+    parser.add_argument("--budget", type=int, default=None, help="höchstens so viele IDs holen (statt --minuten)")
+    parser.add_argument("--api", default=STEAM_API, help="Basis-URL, z. B. ein lokaler Test-Server")
+    parser.add_argument("--max-versuche", type=int, default=MAX_VERSUCHE, help="Versuche pro Steam-ID")
+    parser.add_argument("--nur-plan", action="store_true", help="nur die Warteschlange zeigen")
+    args = parser.parse_args()
+
+    budget = args.budget if args.budget is not None else int(args.rate * args.minuten * 60)
+    with RawStore(args.ausgabe) as store, CrawlState(os.path.join(args.ausgabe, STATE_FILE)) as state:
+        adopted = state.adopt(store)
+        if adopted:
+            print(f"{adopted} Steam-IDs aus dem RawStore übernommen.")
+        queue, counts = plan(load_app_ids(args.csv), state, popular_ids(args.views), budget)
+        planned = {prio: sum(1 for _, p in queue if p == prio) for prio in PRIOS}
+        print("Plan: " + ", ".join(f"{planned[p]}/{counts[p]} {p}" for p in PRIOS) + f" (Budget {budget})")
+        if args.nur_plan or not queue:
+            return
+        stats = refresh(queue, store, state, args.threads, args.rate, args.api, args.max_versuche)
+    print(f"Fertig: {stats['neu']} neu, {stats['geändert']} geändert, {stats['unverändert']} unverändert, "
+          f"{stats['fehler']} fehlgeschlagen.")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,65 +1,19 @@
-import streamlit as st
-
-#Unterseiten
-def render_detail_page(doc, q):
-
-    qp = st.query_params
-    qp_genres = qp.get("genres", "")
-    qp_modus = qp.get("modus", "")
-
-    if qp_genres:
-        new = qp_genres.split(",")
-        if st.session_state.get("genres_pills") != new:
-            st.session_state["genres_pills"] = new
-
-    if qp_modus:
-        new = qp_modus.split(",")
-        if st.session_state.get("modus_pills") != new:
-            st.session_state["modus_pills"] = new
-
-
-
-    title = doc["title"][0]
-    description = doc["description"][0] if doc["description"] else "no data"
-    genres = doc["genres"] if doc["genres"] else []
-    publisher = doc["publisher"] if doc["publisher"] else []
-    platforms = doc["platforms"] if doc["platforms"] else []
-    image_url = doc["image"][0] if doc["image"] else ""
-    url = doc["url"][0] if doc["url"] else "no data"
-    trailer = doc["trailer"][0] if doc["trailer"] else None
-    date = doc["release_date"][0] if doc["release_date"] else "no data"
+import functools
+from html import escape
 
-    if publisher is not None:
-       publisher_html = "<div>"
-       for tag in publisher:
-           publisher_html += f'<span class="tag">{tag}</span>'
-       publisher_html += "</div>"
-    
-    if genres is not None:
-       genre_html = "<div>"
-       for tag in genres:
-           genre_html += f'<span class="tag">{tag}</span>'
-       genre_html += "</div>"
-    
-    if platforms is not None:
-       platform_html = "<div>"
-       for tag in platforms:
-           platform_html += f'<span class="tag">{tag}</span>'
-       platform_html += "</div>"
+import streamlit as st
 
-    if st.button("Back to Overview", key="back"):
-        st.query_params.update({
-            "view": "grid",
-            "q": q,
-            "genres": ",".join(st.session_state.get("genres_pills", [])),
-            "modus": ",".join(st.session_state.get("modus_pills", [])),
-        })
-        st.query_params.pop("id", None)
-        st.session_state["came_from_detail"] = True
-        st.rerun()
+import render
+import search
+import thumbnails
+import timing
+import views
 
 
-    video_html = f"""<!DOCTYPE html>
+@functools.lru_cache(maxsize=1024)
+def trailer_srcdoc(trailer: str) -> str:
+    """Der Video-Player für einen Trailer als (escapetes) srcdoc eines iframes."""
+    return f"""<!DOCTYPE html>
 <html lang="en">
 <head>
     <meta charset="UTF-8">
@@ -110,11 +64,29 @@ if (Hls.isSupported()) {{
 </script>
 </body>
 </html>""".replace("&","&amp;").replace("<","&lt;").replace(">","&gt;").replace('"','&quot;').replace("'","&#039;")
-                
+
+
+def detail_html(doc, image_url: str) -> str:
+    """Das HTML der Detailseite; hängt nur vom Dokument (und dem Poster) ab und wird pro Spiel gecacht (render.fragment)."""
+    title = doc["title"][0]
+    description = doc["description"][0] if doc["description"] else "no data"
+    # Beschreibung ist reiner Text (indexing.strip_html), Zeilen sind die Absätze
+    description_html = "".join(f"<p>{escape(line, quote=False)}</p>" for line in description.split("\n"))
+    genres = doc["genres"] if doc["genres"] else []
+    publisher = doc["publisher"] if doc["publisher"] else []
+    platforms = doc["platforms"] if doc["platforms"] else []
+    url = doc["url"][0] if doc["url"] else "no data"
+    trailer = doc["trailer"][0] if doc["trailer"] else None
+    date = doc["release_date"][0] if doc["release_date"] else "no data"
+
+    publisher_html = render.tag_strip(publisher)
+    genre_html = render.tag_strip(genres)
+    platform_html = render.tag_strip(platforms)
+
     html = ['<div class="layout">']
 
     if trailer is not None:
-        iframe = f'<iframe class="trailer" srcdoc="{video_html}" allow="accelerometer; ambient-light-sensor; autoplay; battery; camera; clipboard-write; document-domain; encrypted-media; fullscreen; geolocation; gyroscope; layout-animations; legacy-image-formats; magnetometer; microphone; midi; oversized-images; payment; picture-in-picture; publickey-credentials-get; sync-xhr; usb; vr ; wake-lock; xr-spatial-tracking"></iframe>'
+        iframe = f'<iframe class="trailer" srcdoc="{trailer_srcdoc(trailer)}" allow="accelerometer; ambient-light-sensor; autoplay; battery; camera; clipboard-write; document-domain; encrypted-media; fullscreen; geolocation; gyroscope; layout-animations; legacy-image-formats; magnetometer; microphone; midi; oversized-images; payment; picture-in-picture; publickey-credentials-get; sync-xhr; usb; vr ; wake-lock; xr-spatial-tracking"></iframe>'
     else:
         iframe = f'<img class="no_trailer" src="{image_url}" loading="lazy" alt="poster">' if image_url else ""
 
@@ -123,13 +95,71 @@ if (Hls.isSupported()) {{
     else:
         web_url = f'<a class="link" href="{url}"><p>{url}</p></a>'
 
-    steam_id = doc["steamId"][0]
-
 
     html.append(f'<div class="column_l"><p class="bold">Title:</p><p>{title}</p><p class="bold">Genres:</p>{genre_html}<p class="bold">Publisher:</p>{publisher_html}<p class="bold">Available for platforms:</p>{platform_html}<p class="bold">Website:</p>{web_url}<p class="bold">Date:</p><p>{date}</p></div>')
-    html.append(f'<div class="column_r"><h1>{title}</h1>{iframe}<p>{description}</p></div>')
+    html.append(f'<div class="column_r"><h1>{title}</h1>{iframe}{description_html}</div>')
     html.append("</div>")
+    return "".join(html)
+
+
+#Unterseiten
+def render_detail_page(doc, q):
+
+    qp = st.query_params
+    qp_genres = qp.get("genres", "")
+    qp_modus = qp.get("modus", "")
+
+    if qp_genres:
+        new = qp_genres.split(",")
+        if st.session_state.get("genres_pills") != new:
+            st.session_state["genres_pills"] = new
+
+    if qp_modus:
+        new = qp_modus.split(",")
+        if st.session_state.get("modus_pills") != new:
+            st.session_state["modus_pills"] = new
+
+    years = render.parse_years(qp.get("years", ""))
+    sort = qp.get("sort", "")
+    mode = qp.get("mode", "")
+
+
+
+    if st.button("Back to Overview", key="back"):
+        st.query_params.update({
+            "view": "grid",
+            "q": q,
+            "genres": ",".join(st.session_state.get("genres_pills", [])),
+            "modus": ",".join(st.session_state.get("modus_pills", [])),
+        })
+        if years:
+            st.query_params["years"] = render.years_param(years)
+        if sort:
+            st.query_params["sort"] = sort
+        if mode:
+            st.query_params["mode"] = mode
+        st.query_params.pop("app", None)
+        st.session_state["came_from_detail"] = True
+        st.rerun()
 
-    st.markdown("".join(html), unsafe_allow_html=True)
+    # Poster nur ohne Trailer, als lokale Kopie sobald vorhanden
+    poster = thumbnails.src(doc["image"][0], "poster") if doc["image"] and not doc["trailer"] else ""
+    html = render.fragment(("detail", doc["id"][0], poster), lambda: detail_html(doc, poster))
+    st.markdown(html, unsafe_allow_html=True)
+
+    # Priorität beim Aktualisieren (delta.py): ein Aufruf pro Session und Spiel, nicht pro Rerun
+    viewed = st.session_state.setdefault("viewed_apps", set())
+    if doc["steamId"][0] not in viewed:
+        viewed.add(doc["steamId"][0])
+        views.record(doc["steamId"][0])
+
+    # Ähnliche Spiele: vorab berechnet (similar.py), hier nur ein Lookup und die Karten
+    with timing.span("aehnliche"):
+        similar = search.similar_cards(doc["id"][0])
+        genres = qp_genres.split(",") if qp_genres else []
+        modus = qp_modus.split(",") if qp_modus else []
+        similar_html = render.similar_html(similar, q, genres, modus, years, sort == "newest", mode == "text")
+    if similar_html:
+        st.markdown(similar_html, unsafe_allow_html=True)
 
     st.markdown("""<footer>Wintersemster 2025/26 - Usability Engineering - Talena Thielecke, Smilla Hill</footer>""", unsafe_allow_html=True)
\ No newline at end of file
@@ -0,0 +1,127 @@
+"""
+Genre-Facetten als Bitsets über das Feld "id".
+
+Die Genres (inkl. "Free to play" und "Multiplayer") werden beim Indizieren zusätzlich als Facette
+"genre_facet" geschrieben, und zwar wie eine Phrasensuche im Feld "genres": in Kleinbuchstaben und
+mit jeder zusammenhängenden Wortfolge ("Massively Multiplayer" ist auch unter "multiplayer" zu
+finden, "Free To Play" unter "free to play"). Pro Snapshot wird für jedes abgefragte Genre einmal ein Bitset gebaut:
+ein Python-int, in dem Bit i gesetzt ist, wenn das Spiel mit der id i das Genre hat. Filter sind
+damit ein bitweises UND, und die Trefferzahl jeder weiteren Pill ist ein `bit_count()`.
+"""
+
+import re
+import threading
+
+from tantivy import Facet, Query
+
+import timing
+
+FACET_FIELD = "genre_facet"
+
+
+def genre_words(genre: str) -> list[str]:
+    """Wörter eines Genres wie beim Standard-Tokenizer (nur Buchstaben/Ziffern, klein geschrieben)."""
+    return re.findall(r"[^\W_]+", genre.lower())
+
+
+def facet_path(genre: str) -> str:
+    """Facetten-Pfad, über den ein Genre (eine Pill) gesucht wird."""
+    return "/" + " ".join(genre_words(genre))
+
+
+def facet_paths(genre: str) -> list[str]:
+    """Alle Facetten-Pfade eines Genres beim Indizieren: jede zusammenhängende Wortfolge."""
+    words = genre_words(genre)
+    return ["/" + " ".join(words[i:j]) for i in range(len(words)) for j in range(i + 1, len(words) + 1)]
+
+
+def bits_from_ids(ids) -> int:
+    """Baut ein Bitset aus einer Liste von ids."""
+    ids = [i for i in ids if i is not None and i >= 0]
+    if not ids:
+        return 0
+    buf = bytearray(max(ids) // 8 + 1)
+    for i in ids:
+        buf[i >> 3] |= 1 << (i & 7)
+    return int.from_bytes(buf, "little")
+
+
+def ids_from_bits(bits: int, offset: int = 0, limit: int | None = None) -> list[int]:
+    """Die ids der gesetzten Bits in aufsteigender Reihenfolge (optional nur ein Ausschnitt)."""
+    ids = []
+    skip = offset
+    buf = bits.to_bytes((bits.bit_length() + 7) // 8, "little")
+    for byte_pos, byte in enumerate(buf):
+        if not byte:
+            continue
+        if skip and byte.bit_count() <= skip:
+            skip -= byte.bit_count()
+            continue
+        base = byte_pos << 3
+        while byte:
+            low = byte & -byte
+            if skip:
+                skip -= 1
+            else:
+                ids.append(base + low.bit_length() - 1)
+                if limit is not None and len(ids) >= limit:
+                    return ids
+            byte ^= low
+    return ids
+
+
+def filter_ids(bits: int, ids) -> list[int]:
+    """Behält nur die ids, deren Bit in `bits` gesetzt ist (Reihenfolge bleibt erhalten)."""
+    buf = bits.to_bytes((bits.bit_length() + 7) // 8, "little")
+    return [i for i in ids if i >> 3 < len(buf) and buf[i >> 3] >> (i & 7) & 1]
+
+
+def genre_query(index, genre: str):
+    """Query für ein Genre: Facette, bei älteren Indizes ohne Facette die Phrase im Feld "genres"."""
+    try:
+        return Query.term_query(index.schema, FACET_FIELD, Facet.from_string(facet_path(genre)))
+    except ValueError:
+        return index.parse_query(f'genres:"{genre}"')
+
+
+class FacetBitsets:
+    """Bitsets pro Genre für einen Snapshot, werden beim ersten Zugriff gebaut und dann geteilt."""
+
+    def __init__(self, snapshot):
+        self.snapshot = snapshot
+        self.bits: dict[str, int] = {}
+        self.lock = threading.Lock()
+        self.all = bits_from_ids(snapshot.id_map.keys())
+
+    def matching_bits(self, query) -> int:
+        """Bitset aller Dokumente, die `query` treffen."""
+        searcher = self.snapshot.searcher
+        with timing.span("engine_suche"):
+            count = searcher.search(query, 1, count=True).count
+            if not count:
+                return 0
+            try:
+                # Sortiert nach dem Fast-Field "id": ohne Scoring, die ids sind direkt die Sortierschlüssel
+                return bits_from_ids([doc_id for doc_id, _ in searcher.search(query, count, count=False, order_by_field="id").hits])
+            except ValueError:
+                addrs = [addr for _, addr in searcher.search(query, count, count=False).hits]   # Index ohne Fast-Field "id"
+        return bits_from_ids([searcher.doc(addr)["id"][0] for addr in addrs])
+
+    def genre(self, genre: str) -> int:
+        bits = self.bits.get(genre)
+        if bits is None:
+            bits = self.matching_bits(genre_query(self.snapshot.index, genre))
+            with self.lock:
+                self.bits[genre] = bits
+        return bits
+
+    def filter(self, genres) -> int:
+        """UND aller gewählten Genres (ohne Auswahl: alle Dokumente)."""
+        bits = self.all
+        for g in genres:
+            bits &= self.genre(g)
+        return bits
+
+    def counts(self, base: int, genres) -> dict[str, int]:
+        """Trefferzahl von `base` zusammen mit jedem der Genres."""
+        return {g: (base & self.genre(g)).bit_count() for g in genres}
@@ -0,0 +1,61 @@
+"""
+Volltextsuche über Titel, Kurzbeschreibung und Beschreibung mit Snippets der Engine.
+
+Die Titelsuche (titlesearch.py) findet nur Titel. Im Volltext-Modus wird der Suchtext mit denselben
+Analyzern wie beim Indizieren zerlegt ("default" für den Titel, "en_stem" für die Beschreibungen)
+und jedes Wort als Term-Query pro Feld mit dem Gewicht aus BOOSTS eingesetzt. Alle Terme stehen als
+SHOULD in einer flachen Disjunktion: Ranking nach BM25, ein Treffer im Titel zählt mehr als einer in
+der Beschreibung, und für die besten k (offset/limit ohne count) überspringt die Engine Blöcke, die
+es nicht mehr unter die besten k schaffen können (Block-Max-WAND).
+
+Die Snippets erzeugt der SnippetGenerator der Engine aus dem gespeicherten Text: bestes Fragment
+der Beschreibung, sonst der Kurzbeschreibung, Treffer in <b>. Die Beschreibungen liegen seit
+indexing.strip_html ohne HTML im Index, die Fragmente sind also reiner (escapeter) Text.
+"""
+
+from tantivy import Filter, Occur, Query, SnippetGenerator, TextAnalyzerBuilder, Tokenizer
+
+BOOSTS = {"title": 3.0, "description_short": 2.0, "description": 1.0}
+SNIPPET_FIELDS = ("description", "description_short")       # erstes Feld mit einem Treffer
+SNIPPET_CHARS = 180
+MAX_WORDS = 12              # längere Suchtexte werden abgeschnitten
+
+
+def _analyzer(stem: bool):
+    builder = TextAnalyzerBuilder(Tokenizer.simple()).filter(Filter.remove_long(40)).filter(Filter.lowercase())
+    return (builder.filter(Filter.stemmer("english")) if stem else builder).build()
+
+
+# Wie die eingebauten Tokenizer "default" und "en_stem" der Felder (siehe indexing.build_schema)
+ANALYZERS = {"title": _analyzer(False), "description_short": _analyzer(True), "description": _analyzer(True)}
+
+
+def terms(field: str, text: str) -> list[str]:
+    """Die Terme des Suchtexts, wie sie im Feld `field` indiziert sind."""
+    return list(dict.fromkeys(ANALYZERS[field].analyze(text)))[:MAX_WORDS]
+
+
+def text_query(schema, text: str):
+    """Disjunktion aller Terme über die Felder aus BOOSTS, None ohne suchbares Wort."""
+    subqueries = [(Occur.Should, Query.boost_query(Query.term_query(schema, field, term), boost))
+                  for field, boost in BOOSTS.items() for term in terms(field, text)]
+    return Query.boolean_query(subqueries) if subqueries else None
+
+
+class Snippets:
+    """Snippet-Generatoren einer Anfrage (einer pro Feld), wiederverwendbar für alle Seiten."""
+
+    def __init__(self, searcher, schema, query):
+        self.generators = []
+        for field in SNIPPET_FIELDS:
+            generator = SnippetGenerator.create(searcher, query, schema, field)
+            generator.set_max_num_chars(SNIPPET_CHARS)
+            self.generators.append(generator)
+
+    def html(self, doc) -> str:
+        """Bestes Fragment mit markierten Treffern, leer, wenn nur der Titel trifft."""
+        for generator in self.generators:
+            snippet = generator.snippet_from_doc(doc)
+            if snippet.highlighted():
+                return snippet.to_html()
+        return ""
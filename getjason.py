@@ -1,38 +1,301 @@
 """
-Dieses Skript liest aus der SteamDB über die CSV-Datei (steamId.csv) Daten aus und speichert sie in .txt-Dateien.
-Diese wurden aufgrund der Größe in 4000-Schritte geteilt und manuell in eine data.txt zusammengefügt.
-Die data.txt ist zu groß, als dass man sie per github teilen könnte.
+Dieses Skript liest aus der SteamDB über die CSV-Datei (steamID.csv) Daten aus und speichert sie im RawStore
+(komprimierte Shards, siehe rawstore.py).
+
+Ablauf:
+1) Steam-IDs aus der CSV lesen und mit dem Checkpoint abgleichen (fertige IDs werden übersprungen,
+   fehlgeschlagene IDs und die Einträge aus schiefgelaufen.txt werden zuerst nachgeholt, IDs ohne
+   Antwort der API (404 u. Ä.) erst ganz am Ende).
+2) Mehrere Threads holen die Antworten über eine gemeinsame Session. Ein Token-Bucket begrenzt die
+   Anfragerate, bei 429/5xx wird exponentiell gewartet und die Rate gedrosselt.
+3) Jede Antwort wird direkt in den RawStore geschrieben und die Steam-ID im Checkpoint vermerkt.
+   Ein abgebrochener Lauf macht beim nächsten Start dort weiter, wo er aufgehört hat.
+
+Beispiel:
+    python getjason.py --ausgabe rohdaten --threads 4 --rate 0.66
+
+Für die tägliche Aktualisierung (nur neue und fällige Steam-IDs) gibt es delta.py.
 """
 
+import argparse
+import os
+import random
+import re
+import threading
+import time
+from collections.abc import Sequence
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
 import pandas as pd
-import requests 
+import requests
 from tqdm.auto import tqdm
-import time
+
+from rawstore import RawStore, STORE_PATH
 
 # Basis-URLs für SteamDB-Requests
 STEAM_API = "https://store.steampowered.com/api/appdetails?appids="
-VON_STEAM_ID = 0        # Anfangsnummer
-BIS_STEAM_ID = 6        # Endnummer
 
-# HTTP-Header inkl. Bearer-Token für SteamDB
+# HTTP-Header für SteamDB
 headers = {
     "accept": "application/json"
 }
 
-# Pfad zur SteamID-Liste
-file = 'steamID.csv'                    
-data = pd.read_csv(file)
-
-outputpath = "124000-128000.txt"
-with open(outputpath,"a", encoding = "UTF-8") as f:     #"a" --> öffnet Datei im apend mode   
-    for idx,row in tqdm(data[VON_STEAM_ID:BIS_STEAM_ID].iterrows(),total = len(data[VON_STEAM_ID:BIS_STEAM_ID]),desc="Fetche alle Antworten von der Steam API."):
-        if row.get("steamid") is None:
-            print("Die SteamID in Zeile {idx} ist nicht vorhanden. Skippen")
-            continue
-        response = requests.get(STEAM_API + str(row.get("steamid")), headers=headers)
-        if response.status_code != 200:
-            print(f"Hier ist etwas schiefgelaufen. Die Steam ID war {row.get("steamid")}")
-            time.sleep(5*60)
-            continue
-        f.write(response.text+"\n")
-        time.sleep(1.5) #"schläft" für 1,5 sekunden, um das steam-anfragen-limit nicht zu überschreiten
\ No newline at end of file
+# Standardwerte
+STEAM_ID_CSV = "steamID.csv"                # Pfad zur SteamID-Liste
+AUSGABE = STORE_PATH                        # RawStore-Ordner für die Antworten
+CHECKPOINT = "crawl_checkpoint.txt"         # "ok <id>" / "fail <id>" / "weg <id>" pro Zeile
+SCHIEFGELAUFEN = "schiefgelaufen.txt"       # von Hand gepflegte Lücken aus früheren Läufen
+RATE = 1 / 1.5                              # Anfragen pro Sekunde (entspricht dem alten sleep(1.5))
+THREADS = 4
+MAX_VERSUCHE = 6
+RETRY_STATUS = {429, 500, 502, 503, 504}
+WEG = object()                              # fetch_app: Status ohne Retry (404 u. Ä.)
+
+
+class TokenBucket:
+    """Begrenzt die Anfragerate über alle Threads hinweg und passt sie bei Drosselung an."""
+
+    def __init__(self, rate: float, capacity: float = 1.0, min_rate: float = 0.05):
+        self.max_rate = rate
+        self.rate = rate
+        self.min_rate = min(min_rate, rate)
+        self.capacity = capacity
+        self.tokens = capacity
+        self.last = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.last) * self.rate)
+        self.last = now
+
+    def acquire(self):
+        """Blockiert, bis ein Token frei ist."""
+        while True:
+            with self.lock:
+                self._refill()
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+    def slow_down(self):
+        """Halbiert die Rate (z. B. nach einem 429)."""
+        with self.lock:
+            self._refill()
+            self.rate = max(self.min_rate, self.rate / 2)
+
+    def speed_up(self):
+        """Erhöht die Rate nach erfolgreichen Anfragen langsam wieder bis zum Maximum."""
+        with self.lock:
+            if self.rate < self.max_rate:
+                self._refill()
+                self.rate = min(self.max_rate, self.rate + self.max_rate / 50)
+
+
+class Checkpoint:
+    """Append-only Protokoll der fertigen und fehlgeschlagenen Steam-IDs.
+
+    "fail": vorübergehender Fehler (Zeitüberschreitung, 429/5xx), "weg": die API kennt die ID nicht.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.done: set[int] = set()
+        self.failed: set[int] = set()
+        self.gone: set[int] = set()
+        self.lock = threading.Lock()
+
+        if os.path.exists(path):
+            with open(path, "r", encoding="UTF-8") as f:
+                for line in f:
+                    parts = line.split()
+                    if len(parts) != 2 or not parts[1].isdigit():
+                        continue        # z. B. halb geschriebene letzte Zeile nach einem Abbruch
+                    status, app_id = parts[0], int(parts[1])
+                    if status == "ok":
+                        self.done.add(app_id)
+                        self.failed.discard(app_id)
+                        self.gone.discard(app_id)
+                    elif status == "fail" and app_id not in self.done:
+                        self.failed.add(app_id)
+                        self.gone.discard(app_id)
+                    elif status == "weg" and app_id not in self.done:
+                        self.gone.add(app_id)
+                        self.failed.discard(app_id)
+
+        self.file = open(path, "a", encoding="UTF-8")
+
+    def _write(self, status: str, app_id: int):
+        self.file.write(f"{status} {app_id}\n")
+        self.file.flush()
+
+    def mark_done(self, app_id: int):
+        with self.lock:
+            self.done.add(app_id)
+            self.failed.discard(app_id)
+            self.gone.discard(app_id)
+            self._write("ok", app_id)
+
+    def mark_failed(self, app_id: int):
+        with self.lock:
+            self.failed.add(app_id)
+            self.gone.discard(app_id)
+            self._write("fail", app_id)
+
+    def mark_gone(self, app_id: int):
+        with self.lock:
+            self.gone.add(app_id)
+            self.failed.discard(app_id)
+            self._write("weg", app_id)
+
+    def close(self):
+        self.file.close()
+
+
+def load_app_ids(path: str = STEAM_ID_CSV, von: int | None = None, bis: int | None = None) -> list[int]:
+    """Liest die Steam-IDs aus der CSV (optional nur die Zeilen von:bis)."""
+    data = pd.read_csv(path)
+    ids = data["steamid"][von:bis].dropna()
+    return [int(i) for i in ids]
+
+
+def read_legacy_failures(path: str = SCHIEFGELAUFEN) -> list[int]:
+    """Liest die Steam-IDs aus schiefgelaufen.txt (alle Zeilen, die nur aus einer Zahl bestehen)."""
+    if not os.path.exists(path):
+        return []
+    with open(path, "r", encoding="UTF-8") as f:
+        return [int(line) for line in (l.strip() for l in f) if re.fullmatch(r"\d+", line)]
+
+
+def plan_work(app_ids: list[int], checkpoint: Checkpoint, legacy: Sequence[int] = ()) -> list[int]:
+    """Reihenfolge der offenen IDs: erst fehlgeschlagene, dann Lücken aus schiefgelaufen.txt, dann der Rest.
+
+    IDs, die die API nicht kennt ("weg"), kommen erst am Ende jedes Laufs wieder dran.
+    """
+    pending = []
+    seen = checkpoint.done | checkpoint.gone
+    for app_id in [*sorted(checkpoint.failed), *legacy, *app_ids]:
+        if app_id not in seen:
+            seen.add(app_id)
+            pending.append(app_id)
+    pending.extend(sorted(checkpoint.gone))
+    return pending
+
+
+def fetch_app(session: requests.Session, bucket: TokenBucket, app_id: int,
+              api: str = STEAM_API, max_versuche: int = MAX_VERSUCHE):
+    """Holt eine Antwort der Steam-API: den Text, WEG (Status ohne Retry) oder None (alle Versuche fehlgeschlagen)."""
+    for versuch in range(max_versuche):
+        bucket.acquire()
+        try:
+            response = session.get(api + str(app_id), headers=headers, timeout=30)
+        except requests.RequestException:
+            status, retry_after = None, None
+        else:
+            if response.status_code == 200:
+                bucket.speed_up()
+                return response.text
+            if response.status_code not in RETRY_STATUS:
+                return WEG
+            status, retry_after = response.status_code, response.headers.get("Retry-After")
+
+        # Exponentielles Backoff mit Jitter, Retry-After der API hat Vorrang
+        if status == 429:
+            bucket.slow_down()
+        if versuch == max_versuche - 1:
+            break       # nach dem letzten Versuch nicht mehr warten
+        wait = min(300, 2 ** versuch) + random.uniform(0, 1)
+        if retry_after and retry_after.isdigit():
+            wait = max(wait, int(retry_after))
+        time.sleep(wait)
+    return None
+
+
+def make_session(threads: int) -> requests.Session:
+    """Eine Session mit so vielen Verbindungen im Pool wie Threads."""
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_connections=threads, pool_maxsize=threads)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def fetch_many(app_ids, threads: int = THREADS, rate: float = RATE, api: str = STEAM_API,
+               max_versuche: int = MAX_VERSUCHE, desc: str = "Fetche alle Antworten von der Steam API."):
+    """Holt die Antworten zu `app_ids` parallel und liefert (Steam-ID, Ergebnis von fetch_app) in Fertig-Reihenfolge."""
+    bucket = TokenBucket(rate)
+    session = make_session(threads)
+    try:
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            # Nur begrenzt viele Aufträge gleichzeitig einreihen, damit 128k Futures nicht im Speicher liegen
+            todo = iter(app_ids)
+            in_flight = {}
+
+            def submit_next():
+                app_id = next(todo, None)
+                if app_id is not None:
+                    in_flight[pool.submit(fetch_app, session, bucket, app_id, api, max_versuche)] = app_id
+
+            for _ in range(threads * 4):
+                submit_next()
+
+            with tqdm(total=len(app_ids), desc=desc) as bar:
+                while in_flight:
+                    future = next(as_completed(in_flight))
+                    app_id = in_flight.pop(future)
+                    yield app_id, future.result()
+                    bar.update(1)
+                    submit_next()
+    finally:
+        session.close()
+
+
+def crawl(app_ids: list[int], ausgabe: str = AUSGABE, checkpoint_path: str = CHECKPOINT,
+          threads: int = THREADS, rate: float = RATE, api: str = STEAM_API,
+          legacy: Sequence[int] = (), max_versuche: int = MAX_VERSUCHE) -> dict[str, int]:
+    """Holt alle noch offenen Steam-IDs parallel und schreibt die Antworten in den RawStore `ausgabe`."""
+    checkpoint = Checkpoint(checkpoint_path)
+    pending = plan_work(app_ids, checkpoint, legacy)
+    stats = {"ok": 0, "fail": 0, "weg": 0, "offen": len(pending)}
+
+    try:
+        with RawStore(ausgabe) as store:
+            for app_id, text in fetch_many(pending, threads, rate, api, max_versuche):
+                if text is None:
+                    checkpoint.mark_failed(app_id)
+                    stats["fail"] += 1
+                elif text is WEG:
+                    checkpoint.mark_gone(app_id)
+                    stats["weg"] += 1
+                else:
+                    store.put(app_id, text)
+                    checkpoint.mark_done(app_id)
+                    stats["ok"] += 1
+    finally:
+        checkpoint.close()
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Holt Spieldaten von der Steam-API (fortsetzbar).")
+    parser.add_argument("--csv", default=STEAM_ID_CSV, help="CSV mit der Spalte 'steamid'")
+    parser.add_argument("--von", type=int, default=None, help="erste Zeile der CSV (optional)")
+    parser.add_argument("--bis", type=int, default=None, help="letzte Zeile der CSV, exklusiv (optional)")
+    parser.add_argument("--ausgabe", default=AUSGABE)
+    parser.add_argument("--checkpoint", default=CHECKPOINT)
+    parser.add_argument("--schiefgelaufen", default=SCHIEFGELAUFEN)
+    parser.add_argument("--threads", type=int, default=THREADS)
+    parser.add_argument("--rate", type=float, default=RATE, help="max. Anfragen pro Sekunde")
+    parser.add_argument("--api", default=STEAM_API, help="Basis-URL, z. B. ein lokaler Test-Server")
+    args = parser.parse_args()
+
+    stats = crawl(load_app_ids(args.csv, args.von, args.bis), args.ausgabe, args.checkpoint,
+                  args.threads, args.rate, args.api, read_legacy_failures(args.schiefgelaufen))
+    print(f"Fertig: {stats['ok']} geholt, {stats['fail']} fehlgeschlagen (werden beim nächsten Lauf nachgeholt), "
+          f"{stats['weg']} ohne Antwort der API.")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,24 +1,57 @@
 """
-Vorher: 
-Über die getjason.py wurden Daten aus der SteamDB ausgelsen, welche in der data.txt zusammengefügt wurden.
+Vorher:
+Über die getjason.py wurden Daten aus der SteamDB ausgelsen, welche im RawStore (Ordner "rohdaten") liegen.
 
-Dieses Skript erstellt ein Index aus den daten der data.txt.
+Dieses Skript erstellt ein Index aus den Daten des RawStores (oder einer alten data.txt).
 
 Hauptschritte:
 1) Schema für den Tantivy-Index definieren.
-2) Index-Verzeichnis erstellen und Writer initialisieren.
-3) Für jedes Spiel: SteamDB-Daten ergänzen, Titel in Token zerteielen, Dokument zusammenstellen und in den Index schreiben.
+2) Index öffnen (inkrementell) bzw. Index-Verzeichnis neu erstellen (--voll) und Writer initialisieren.
+3) Für jedes Spiel: SteamDB-Daten ergänzen, Titel in Token zerteielen, HTML aus den Beschreibungen entfernen,
+   Dokument zusammenstellen und in den Index schreiben.
+   Das Parsen läuft in Batches in einem Prozess-Pool, ein einzelner Konsument füttert den Writer.
+   Im inkrementellen Modus werden nur Spiele neu geschrieben, deren Rohdaten sich geändert haben (Inhalts-Hash).
+   Mit --entfernen werden außerdem Spiele gelöscht, die nicht mehr in der Quelle stehen (nur mit der
+   vollständigen Quelle aufrufen: ohne das Flag darf die Quelle auch nur ein Ausschnitt sein).
 4) Änderungen committen und Merge-Threads abwarten.
+
+Aufruf:
+    python indexing.py            # inkrementell, falls schon ein Index existiert
+    python indexing.py --voll     # alten Index löschen und komplett neu aufbauen
+    python indexing.py --entfernen  # inkrementell, Spiele ohne Rohdaten löschen
+    python indexing.py --voll --worker 8 --heap 512 --quiet
+
+Nach vielen inkrementellen Läufen fasst indexpflege.py die Segmente wieder zusammen. Die ähnlichen
+Spiele für die Detailseite berechnet similar.py nach jedem Lauf neu.
 """
 
-from tantivy import SchemaBuilder, Index, Document
-import pathlib
+from tantivy import SchemaBuilder, Index, Document, Facet, Filter, TextAnalyzerBuilder, Tokenizer
+import argparse
+import hashlib
+import html
 import json
 import os
 from dotenv import load_dotenv
 import traceback
 import shutil
 import re
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from tqdm.auto import tqdm
+
+from cardstore import CardWriter, card_from_fields
+from facets import FACET_FIELD, facet_paths
+from rawstore import app_id_of, read_lines
+from releasedate import RELEASE_FIELD, parse_release_date
+
+# Quelle der Rohdaten: RawStore-Ordner, sonst die alte data.txt
+QUELLE = "rohdaten" if os.path.isdir("rohdaten") else "data.txt"
+INDEX_PATH = "neu"
+STATE_FILE = "indexstate.json"      # Steam-ID -> [id, Inhalts-Hash], liegt im Index-Ordner
+FORMAT = 3                          # Version der Feld-Aufbereitung; eine neue Version parst alle Spiele neu
+HEAP_SIZE = 256_000_000             # Speicher des Writers in Byte
+WORKER = os.cpu_count() or 1        # Prozesse für das Parsen der Rohdaten
+BATCH_SIZE = 256                    # Zeilen pro Auftrag an den Prozess-Pool
 
 # Basis-URLs für SteamDB-Requests
 STEAM_API = "https://store.steampowered.com/api/appdetails?appids="
@@ -31,157 +64,371 @@ headers = {
     "accept": "application/json"
 }
 
-# Tokenisierung definieren
-def ngrams(word, n=3):
-    word = word.lower()
-    return [word[i:i+n] for i in range(len(word)-n+1)]
+# Tokenisierung definieren: Trigramme des Titels übernimmt ein Tantivy-Analyzer (Indizieren und Suchen)
+TITLE_NGRAM_TOKENIZER = "title_ngram"
+title_ngram_analyzer = TextAnalyzerBuilder(Tokenizer.ngram(min_gram=3, max_gram=3, prefix_only=False)).filter(Filter.lowercase()).build()
+
+def register_tokenizers(index: Index) -> Index:
+    """Eigene Analyzer werden nicht im Index gespeichert und müssen nach jedem Öffnen registriert werden."""
+    index.register_tokenizer(TITLE_NGRAM_TOKENIZER, title_ngram_analyzer)
+    return index
+
+# Sonderzeichen werden aus dem Titel gelöscht
+def clean_title(t):
+    t = t.replace("®", "")
+    t = t.replace("™", "")
+    t = t.replace("©", "")
+    t = re.sub(r"[^A-Za-z0-9äöüÄÖÜß\s\-:]", "", t)
+    return t
+
+# Titel-Trigramme: jedes Wort mit Leerzeichen aufgefüllt als eigener Wert, damit keine Trigramme über
+# Wortgrenzen entstehen und kurze Wörter auch welche haben (wie titlesearch.title_trigrams)
+def title_ngram_values(title: str) -> list[str]:
+    return [f" {word} " for word in clean_title(title).split()]
+
+# Beschreibungen kommen als HTML: Blöcke werden zu Zeilenumbrüchen, alle übrigen Tags fallen weg
+HTML_DROP = re.compile(r"<(script|style)\b.*?</\1\s*>|<!--.*?-->", re.S | re.I)
+HTML_BREAK = re.compile(r"<\s*(?:br|/?p|/?div|/?h[1-6]|/?li|/?ul|/?ol|/?tr|/?table|/?blockquote)\b[^>]*>", re.I)
+HTML_TAG = re.compile(r"<[^>]*>")
+SPACES = re.compile(r"[ \t\r\f\v\xa0]+")
+BREAKS = re.compile(r"\s*\n\s*")
+
+def strip_html(text: str) -> str:
+    """Reiner Text aus dem HTML einer Beschreibung (Absätze als "\\n", Entities aufgelöst)."""
+    text = HTML_TAG.sub(" ", HTML_BREAK.sub("\n", HTML_DROP.sub(" ", text)))
+    text = SPACES.sub(" ", html.unescape(text))
+    return BREAKS.sub("\n", text).strip()
+
+def content_hash(line: str) -> str:
+    """Hash der Rohantwort, um geänderte Spiele zu erkennen."""
+    return hashlib.blake2b(line.strip().encode("UTF-8"), digest_size=16).hexdigest()
+
 
 # 1) Schema für den Index definieren
-schema_builder = SchemaBuilder()
-schema_builder.add_integer_field("id", stored=True, indexed=True)
-schema_builder.add_integer_field("steamId", stored=True, indexed=True)
-schema_builder.add_text_field("title", stored=True, tokenizer_name="default")
-schema_builder.add_text_field("title_ngrams", stored=False)
-schema_builder.add_text_field("description", stored=True, tokenizer_name='en_stem')
-schema_builder.add_text_field("description_short", stored=True, tokenizer_name='en_stem')
-schema_builder.add_text_field("genres", stored=True)
-schema_builder.add_text_field("publisher", stored=True)
-schema_builder.add_text_field("platforms", stored=True)
-schema_builder.add_text_field("url", stored=True)
-schema_builder.add_text_field("image", stored=True)
-schema_builder.add_text_field("trailer", stored=True)
-schema_builder.add_date_field("release_date", stored=True)
-schema = schema_builder.build()
-
-
-# 2) Index anlegen/alten löschen und neu erstellen
-index_path = "neu"
-
-# Wenn schon ein Index unter dem Pfad besteht, wird dieser gelöscht und ein neuer erstellt
-if os.path.exists(index_path): 
-    shutil.rmtree(index_path) 
-    print("Alter Index gelöscht.") 
-
-os.makedirs(index_path) 
-print("Neuer Index-Ordner erstellt.")
-
-index_path = pathlib.Path(index_path)
-index = Index(schema, path=str(index_path))
-writer = index.writer()  # Writer für Batch-Schreibvorgänge
-
-# Nach dem indizieren werden IDs vermerkt, damit nichts doppelt indiziert wird
-processed_steamIDs = set()
+def build_schema():
+    schema_builder = SchemaBuilder()
+    schema_builder.add_integer_field("id", stored=True, indexed=True, fast=True)
+    schema_builder.add_integer_field("steamId", stored=True, indexed=True)
+    schema_builder.add_text_field("title", stored=True, tokenizer_name="default")
+    schema_builder.add_text_field("title_ngrams", stored=False, tokenizer_name=TITLE_NGRAM_TOKENIZER)
+    schema_builder.add_text_field("description", stored=True, tokenizer_name='en_stem')
+    schema_builder.add_text_field("description_short", stored=True, tokenizer_name='en_stem')
+    schema_builder.add_text_field("genres", stored=True)
+    schema_builder.add_facet_field(FACET_FIELD)
+    schema_builder.add_text_field("publisher", stored=True)
+    schema_builder.add_text_field("platforms", stored=True)
+    schema_builder.add_text_field("url", stored=True)
+    schema_builder.add_text_field("image", stored=True)
+    schema_builder.add_text_field("trailer", stored=True)
+    schema_builder.add_text_field("release_date", stored=True)        # Anzeigetext von Steam
+    schema_builder.add_date_field(RELEASE_FIELD, stored=False, indexed=True, fast=True)
+    return schema_builder.build()
+
+
+def extract_fields(data: dict) -> dict[str, list]:
+    """Zieht aus den SteamDB-Daten eines Spiels die Index-Felder als einfache Listen (picklebar für den Prozess-Pool)."""
+    fields: dict[str, list] = {}
+
+    #steamId
+    fields["steamId"] = [data.get("steam_appid")]
+
+    #title
+    title = data.get("name")
+    if title:
+        title = clean_title(title)
+        fields["title"] = [title]
+
+        # n-grams erzeugt der Analyzer des Felds
+        fields["title_ngrams"] = title_ngram_values(title)
+
+    #description (ohne HTML: kleinere Postings und gespeicherte Texte, Snippets der Volltextsuche)
+    description = data.get("detailed_description")
+    if description is not None:
+        fields["description"] = [strip_html(description)]
+
+    # description - short
+    short_description = data.get("short_description")
+    if short_description is not None:
+        fields["description_short"] = [strip_html(short_description)]
+
+    # genres
+    genres = data.get("genres")
+    if genres is not None:
+        fields["genres"] = [genre["description"] for genre in genres]
+        fields[FACET_FIELD] = sorted({path for genre in fields["genres"] for path in facet_paths(genre)})
+
+    # publisher
+    publishers = data.get("publishers")
+    if publishers is not None:
+        fields["publisher"] = list(publishers)
+
+    # platform
+    platforms = data.get("platforms")
+    if platforms is not None:
+        fields["platforms"] = [platform for platform, b in platforms.items() if b is True]
+
+    # image
+    image = data.get("header_image")
+    if image is not None:
+        fields["image"] = [image]
+
+    # url
+    url = data.get("website")
+    if url is not None:
+        fields["url"] = [url]
+
+    # release_date
+    release_date = data.get("release_date")
+    if release_date is not None:
+        fields["release_date"] = [release_date["date"]]
+        # Datum für Jahresfilter und Sortierung (fehlt bei "Coming soon" u. Ä.)
+        day = parse_release_date(release_date["date"])
+        if day is not None:
+            fields[RELEASE_FIELD] = [day]
+
+    # trailer
+    trailers:list[dict] = data.get("movies")
+    if trailers is not None:
+        trailers = [t for t in trailers if t["highlight"]]
+        if len(trailers)>0:
+            fields["trailer"] = [trailers[0]["hls_h264"]]
+
+    # Beliebtheit (Anzahl Steam-Reviews), nur für die Karten-Datei
+    recommendations = data.get("recommendations")
+    fields["recommendations"] = [recommendations.get("total", 0) if recommendations else 0]
+
+    return fields
+
+
+INTEGER_FIELDS = {"id", "steamId"}
+CARD_ONLY_FIELDS = {"recommendations"}      # landen nur in der Karten-Datei, nicht im Index
+
+def make_document(fields: dict[str, list], doc_id: int) -> Document:
+    """Baut aus den Feldern eines Spiels ein Tantivy-Dokument."""
+    doc = Document()
+    doc.add_integer("id", doc_id)
+    for name, values in fields.items():
+        if name in CARD_ONLY_FIELDS:
+            continue
+        for value in values:
+            if name in INTEGER_FIELDS:
+                doc.add_integer(name, value)
+            elif name == FACET_FIELD:
+                doc.add_facet(name, Facet.from_string(value))
+            elif name == RELEASE_FIELD:
+                doc.add_date(name, value)
+            else:
+                doc.add_text(name, value)
+    return doc
+
+
+def fields_hash(key: str, line: str) -> str:
+    """Hash nur der Index-Felder einer Rohantwort (ohne Review-Zahlen, Preise u. Ä.), für delta.py.
+
+    So gilt ein Spiel nur als geändert, wenn sich etwas ändert, das im Index landet.
+    """
+    try:
+        entry = json.loads(line)[key]
+        fields = extract_fields(entry["data"]) if entry["success"] else None
+    except Exception:
+        return content_hash(line)
+    if fields is not None:
+        fields = {name: values for name, values in fields.items() if name not in CARD_ONLY_FIELDS}
+    return content_hash(json.dumps(fields, ensure_ascii=False, sort_keys=True, default=str))
+
+
+def parse_batch(batch: list[tuple[str, str]]) -> list[tuple[bool, dict | str | None]]:
+    """Läuft im Prozess-Pool: JSON parsen und Felder extrahieren.
+
+    Ergebnis pro Zeile: (True, Felder), (True, None) für success=false oder (False, Fehlermeldung).
+    """
+    results = []
+    for key, line in batch:
+        try:
+            entry = json.loads(line)[key]
+            results.append((True, extract_fields(entry["data"]) if entry["success"] else None))
+        except Exception:
+            results.append((False, traceback.format_exc()))
+    return results
+
+
+def load_state(index_path: str) -> dict:
+    path = os.path.join(index_path, STATE_FILE)
+    if not os.path.exists(path):
+        return {"next_id": 0, "apps": {}, "format": FORMAT}
+    with open(path, "r", encoding="UTF-8") as f:
+        return json.load(f)
+
+
+def save_state(index_path: str, state: dict):
+    """Schreibt den Zustand atomar (erst in eine Temp-Datei, dann umbenennen)."""
+    path = os.path.join(index_path, STATE_FILE)
+    with open(path + ".tmp", "w", encoding="UTF-8") as f:
+        json.dump(state, f)
+    os.replace(path + ".tmp", path)
+
+
+# 2) Index anlegen bzw. öffnen
+def open_index(index_path: str, voll: bool):
+    # Bei --voll wird ein bestehender Index gelöscht und ein neuer erstellt
+    if voll and os.path.exists(index_path):
+        shutil.rmtree(index_path)
+        print("Alter Index gelöscht.")
+
+    if not os.path.exists(os.path.join(index_path, "meta.json")):
+        os.makedirs(index_path, exist_ok=True)
+        print("Neuer Index-Ordner erstellt.")
+        return register_tokenizers(Index(build_schema(), path=index_path)), True
+
+    return register_tokenizers(Index.open(index_path)), False
+
+
+def pending_batches(quelle: str, apps: dict[str, list], stats: dict[str, int], batch_size: int,
+                    seen: set[str]):
+    """Liest die Rohdaten und bündelt alle neuen/geänderten Zeilen zu Batches für den Prozess-Pool.
+
+    Doppelte Steam-IDs und unveränderte Zeilen werden hier schon ohne JSON-Parsing verworfen.
+    Alle Steam-IDs der Quelle (auch unveränderte) landen in `seen`.
+    """
+    batch = []
+
+    for idx, line in enumerate(read_lines(quelle)):
+        steam_ID = app_id_of(line)
+        # Nach dem indizieren werden IDs vermerkt, damit nichts doppelt indiziert wird
+        key = None if steam_ID is None else str(steam_ID)
+        if key is None or key in seen:
+            continue
+        seen.add(key)
+
+        h = content_hash(line)
+        if key in apps and apps[key][1] == h:
+            stats["unverändert"] += 1
+            continue
+
+        batch.append((idx, key, h, line))
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def parsed_batches(batches, worker: int):
+    """Verteilt die Batches auf `worker` Prozesse und liefert die Ergebnisse in Eingabereihenfolge."""
+    if worker <= 1:
+        for batch in batches:
+            yield batch, parse_batch([(key, line) for _, key, _, line in batch])
+        return
+
+    with ProcessPoolExecutor(max_workers=worker) as pool:
+        in_flight = deque()
+        for batch in batches:
+            in_flight.append((batch, pool.submit(parse_batch, [(key, line) for _, key, _, line in batch])))
+            # Nur begrenzt viele Batches vorauslesen, damit der Speicher nicht mit dem Katalog wächst
+            if len(in_flight) >= worker * 2:
+                batch, future = in_flight.popleft()
+                yield batch, future.result()
+        while in_flight:
+            batch, future = in_flight.popleft()
+            yield batch, future.result()
+
 
 # 3) Dokumente aufbauen und in den Index schreiben
-with open("data.txt", "r", encoding="UTF-8") as f:
-    for idx, line in enumerate(f):
-        # Neues Tantivy-Dokument
-        doc = Document()
-
-        # Sonderzeichen werden aus dem Titel gelöscht
-        def clean_title(t): 
-            t = t.replace("®", "") 
-            t = t.replace("™", "") 
-            t = t.replace("©", "") 
-            t = re.sub(r"[^A-Za-z0-9äöüÄÖÜß\s\-:]", "", t) 
-            return t
-            
-        try:
-            steam_json = json.loads(line)
-            steam_ID = list(steam_json.keys())[0]
-
-            if not steam_json[steam_ID]["success"]:
-                print("ID existiert nicht!")
-                continue
-
-            if steam_ID in processed_steamIDs:
-                print("haben wir schon.")
-                continue
-
-            data = steam_json[steam_ID]["data"]
-
-            #id
-            doc.add_integer("id", idx)
-            print("ID:" + str(idx))
-
-            #steamId
-            steamId = data.get("steam_appid")
-            doc.add_integer("steamId", steamId)
-            print("Steam-ID:" + str(steam_ID))
-
-            #title
-            title = data.get("name")
-            if title:
-                title = clean_title(title)
-                doc.add_text("title", title) 
-                
-                # n-grams erzeugen 
-                for ng in ngrams(title, 3): 
-                    doc.add_text("title_ngrams", ng)
-
-
-            #description
-            description = data.get("detailed_description")
-            if description is not None:
-                doc.add_text("description", description)
-
-            # description - short
-            short_description = data.get("short_description")
-            if short_description is not None:
-                doc.add_text("description_short", short_description)
-            
-            # genres
-            genres = data.get("genres")
-            if genres is not None:
-                for genre in genres:
-                    doc.add_text("genres", genre["description"])
-
-            # publisher
-            publishers = data.get("publishers")
-            if publishers is not None:
-                for publisher in publishers:
-                    doc.add_text("publisher", publisher)
-
-            # platform
-            platforms = data.get("platforms")
-            if platforms is not None:
-                for platform, b in platforms.items():
-                    if b is True:
-                        doc.add_text("platforms", platform)
-                
-            # image
-            image = data.get("header_image")
-            if image is not None:
-                doc.add_text("image", image)
-
-            # url
-            url = data.get("website")
-            if url is not None:
-                doc.add_text("url", url)
-
-            # release_date
-            release_date = data.get("release_date")
-            if release_date is not None:
-                doc.add_text("release_date", release_date["date"])
-
-            # trailer
-            trailers:list[dict] = data.get("movies")
-            if trailers is not None:
-                trailers = [t for t in trailers if t["highlight"]]
-                if len(trailers)>0:
-                    doc.add_text("trailer", trailers[0]["hls_h264"])
-            
-            print("--> wurde eingelesen")
-
-            processed_steamIDs.add(steam_ID)        #IDs als verarbeitet markieren
-                        
-        except Exception as e:
-            # Fehler in der STEAM_DB-Abfrage protokollieren, Indizierung dennoch fortsetzen
-            print(traceback.format_exc())
-
-        # Fertiges Dokument in den Index schreiben
-        writer.add_document(doc)
-
-# 4) Index-Änderungen finalisieren
-writer.commit()                 # Schreibvorgänge bestätigen
-writer.wait_merging_threads()   # Hintergrund-Mergeprozesse abwarten
\ No newline at end of file
+def run(quelle: str = QUELLE, index_path: str = INDEX_PATH, voll: bool = False,
+        heap_size: int = HEAP_SIZE, threads: int = 0, worker: int = WORKER,
+        batch_size: int = BATCH_SIZE, quiet: bool = False, entfernen: bool = False) -> dict[str, int]:
+    index, neu = open_index(index_path, voll)
+    state = {"next_id": 0, "apps": {}, "format": FORMAT} if neu else load_state(index_path)
+    if not neu and not state["apps"]:
+        print("Kein Index-Zustand gefunden, bitte einmal mit --voll neu aufbauen.")
+        return {}
+
+    apps: dict[str, list] = state["apps"]
+    if state.get("format", 1) != FORMAT:
+        # Felder werden anders aufbereitet: alle Spiele gelten als geändert
+        for app in apps.values():
+            app[1] = None
+        state["format"] = FORMAT
+    writer = index.writer(heap_size=heap_size, num_threads=threads)  # Writer für Batch-Schreibvorgänge
+    cards = CardWriter(index_path)  # kompakte Karten-Daten für das Ergebnis-Raster
+    stats = {"neu": 0, "geändert": 0, "unverändert": 0, "gelöscht": 0, "fehler": 0}
+    seen: set[str] = set()
+
+    # Ein einzelner Konsument schreibt die geparsten Felder in den Index
+    with tqdm(desc="Indiziere Spiele", unit=" Spiele", disable=quiet) as bar:
+        for batch, results in parsed_batches(pending_batches(quelle, apps, stats, batch_size, seen), worker):
+            for (idx, key, h, _), (ok, fields) in zip(batch, results):
+                if not ok:
+                    # Fehler in der STEAM_DB-Abfrage protokollieren, Indizierung dennoch fortsetzen
+                    if not quiet:
+                        tqdm.write(fields)
+                    stats["fehler"] += 1
+                    continue
+
+                # Bekannte Spiele behalten ihre id, neue bekommen die Position in der Quelle (voll) bzw. die
+                # nächste freie id. Die id ist nur intern (Bitsets, Karten), Links gehen über die Steam-ID.
+                known = apps.get(key)
+                indexed = known is not None and known[0] is not None
+                if indexed:
+                    doc_id = known[0]
+                    writer.delete_documents_by_term("id", doc_id)
+                    cards.delete(doc_id)
+                else:
+                    doc_id = idx if neu else state["next_id"]
+
+                if fields is None:
+                    # ID existiert (nicht mehr), Hash trotzdem merken, damit die Zeile nicht erneut geparst wird
+                    apps[key] = [None, h]
+                    if indexed:
+                        stats["gelöscht"] += 1
+                    continue
+
+                writer.add_document(make_document(fields, doc_id))
+                cards.put(card_from_fields(fields, doc_id))
+                apps[key] = [doc_id, h]
+                state["next_id"] = max(state["next_id"], doc_id + 1)
+                stats["geändert" if indexed else "neu"] += 1
+            bar.update(len(batch))
+
+    # Spiele, die nicht mehr in der Quelle stehen, aus Index, Karten und Zustand entfernen (nur auf
+    # Wunsch: eine Teil-Quelle würde sonst den Rest löschen). Eine leere Quelle löscht nie etwas.
+    if entfernen and seen:
+        for key in [key for key in apps if key not in seen]:
+            doc_id = apps.pop(key)[0]
+            if doc_id is not None:
+                writer.delete_documents_by_term("id", doc_id)
+                cards.delete(doc_id)
+                stats["gelöscht"] += 1
+
+    # 4) Index-Änderungen finalisieren
+    writer.commit()                 # Schreibvorgänge bestätigen, Leser sehen sie nach dem nächsten Reload
+    # Karten erst nach dem Commit veröffentlichen: schlägt der Commit fehl, zeigen sie nie auf Dokumente,
+    # die der Index nicht hat. Leser laden auch nach der neuen Offset-Tabelle neu (searchindex.py); bis
+    # dahin fehlen neuen ids die Karten (werden übersprungen), geänderte zeigen kurz die alte Karte.
+    cards.close()
+    writer.wait_merging_threads()   # Hintergrund-Mergeprozesse abwarten
+    save_state(index_path, state)
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Baut den Tantivy-Index aus den Steam-Rohdaten.")
+    parser.add_argument("--quelle", default=QUELLE, help="RawStore-Ordner oder .txt-Datei")
+    parser.add_argument("--index", default=INDEX_PATH)
+    parser.add_argument("--voll", action="store_true", help="Index löschen und komplett neu aufbauen")
+    parser.add_argument("--heap", type=int, default=HEAP_SIZE // 1_000_000, help="Writer-Heap in MB")
+    parser.add_argument("--threads", type=int, default=0, help="Indexing-Threads des Writers (0 = automatisch)")
+    parser.add_argument("--worker", type=int, default=WORKER, help="Prozesse für JSON-Parsing (1 = ohne Pool)")
+    parser.add_argument("--batch", type=int, default=BATCH_SIZE, help="Zeilen pro Batch für den Prozess-Pool")
+    parser.add_argument("--quiet", action="store_true", help="keine Fortschrittsanzeige und Fehlermeldungen")
+    parser.add_argument("--entfernen", action="store_true",
+                        help="Spiele löschen, die nicht in der Quelle stehen (nur mit der vollständigen Quelle)")
+    args = parser.parse_args()
+
+    stats = run(args.quelle, args.index, args.voll, args.heap * 1_000_000, args.threads,
+                args.worker, args.batch, args.quiet, args.entfernen)
+    print(", ".join(f"{v} {k}" for k, v in stats.items()))
+
+
+if __name__ == "__main__":
+    main()
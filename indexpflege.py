@@ -0,0 +1,302 @@
+"""
+Wartung des Tantivy-Index: Zustandsbericht, Zusammenführen der Segmente und Aufräumen.
+
+Jeder inkrementelle Lauf von indexing.py schreibt mindestens ein neues Segment, geänderte Spiele
+bleiben als gelöschte Dokumente in den alten Segmenten liegen. Eine Suche läuft über alle Segmente,
+mit der Zeit wird der Index also größer und langsamer, obwohl sich die Zahl der Spiele kaum ändert.
+
+Der Bericht liest nur meta.json und die Dateigrößen (der Index muss dafür nicht geöffnet werden):
+Segmente, Dokumente, Anteil gelöschter Dokumente, Größe pro Dateiart und pro Feld (aus den
+Inhaltsverzeichnissen von .term/.idx/.pos/.fieldnorm), fehlende und verwaiste Dateien.
+
+tantivy-py bietet kein Merge an. Zusammengeführt wird deshalb, indem alle gespeicherten Dokumente
+in einem Commit neu geschrieben werden (die alten Segmente fallen dabei weg). Nicht gespeicherte
+Felder (Titel-Trigramme, Genre-Facetten, Erscheinungsdatum) werden wie in indexing.py aus den
+gespeicherten Feldern erzeugt, die Feld-"id" bleibt gleich, Karten-Datei und indexstate.json
+gelten also weiter. Die Karten-Datei wird dabei ohne tote Einträge neu geschrieben. --segmente N
+setzt die Writer-Threads (ein Segment pro Thread, solange der Heap reicht, bei wenigen Dokumenten
+auch weniger); gemeldet wird die Zahl, die nach dem Commit tatsächlich in meta.json steht.
+Ein Index mit älterem Schema (z. B. "release_date" noch als Datumsfeld) lässt sich so nicht
+zusammenführen, der muss mit indexing.py --voll neu aufgebaut werden. Laufende Streamlit-Prozesse laden den neuen Stand wie nach
+jedem Commit. Gelöschte Dokumente zählen danach auch nicht mehr in den Term-Statistiken (BM25)
+mit, die Reihenfolge der Treffer ist wieder die eines vollen Neuaufbaus.
+
+Aufruf:
+    python indexpflege.py                   # Bericht
+    python indexpflege.py --segmente 1      # auf ein Segment zusammenführen, danach aufräumen
+    python indexpflege.py --aufraeumen      # nur nicht mehr benutzte Dateien löschen
+"""
+
+import argparse
+import json
+import os
+import re
+import struct
+
+from tantivy import Index, Query
+
+from cardstore import card_usage, compact_cards
+from facets import FACET_FIELD, facet_paths
+from indexing import INDEX_PATH, make_document, register_tokenizers, title_ngram_values
+from releasedate import RELEASE_FIELD, parse_release_date
+
+HEAP_SIZE = 1_000_000_000       # Writer-Heap beim Zusammenführen in Byte (wird auf die Threads verteilt)
+HEAP_PER_THREAD = 15_000_000    # Minimum, das Tantivy pro Writer-Thread verlangt
+SEGMENTE = 1                    # Ziel beim Zusammenführen
+
+# Dateien eines Segments: <segment_id ohne Bindestriche>.<endung>, Löschmarken <id>.<opstamp>.del
+FILE_KINDS = {
+    "term": "Term-Wörterbuch",
+    "idx": "Postings",
+    "pos": "Positionen",
+    "fieldnorm": "Feldnormen",
+    "fast": "Fast-Fields",
+    "store": "Docstore",
+    "del": "Löschmarken",
+}
+COMPOSITE_KINDS = ("term", "idx", "pos", "fieldnorm")     # mit Inhaltsverzeichnis pro Feld
+SEGMENT_FILE = re.compile(r"^([0-9a-f]{32})\.(?:(\d+)\.)?(\w+)$")
+
+FOOTER = struct.Struct("<II")       # Länge des Tantivy-Footers (JSON) und Magic Number
+FOOTER_MAGIC = 1337
+
+
+def read_meta(index_path: str) -> dict:
+    with open(os.path.join(index_path, "meta.json"), "r", encoding="UTF-8") as f:
+        return json.load(f)
+
+
+def _vint(data: bytes, pos: int) -> tuple[int, int]:
+    value = shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        shift += 7
+        if byte & 0x80:
+            return value, pos
+
+
+def composite_sizes(path: str) -> dict[int, int] | None:
+    """Bytes pro Feld (Position im Schema) einer Datei mit Inhaltsverzeichnis, None wenn nicht lesbar.
+
+    Aufbau: Daten der Felder, Inhaltsverzeichnis (Anzahl, dann pro Feld Offset-Differenz, Feld,
+    Index), dessen Länge als u32 und dahinter der Footer, den Tantivy an jede Datei hängt.
+    """
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+        footer_len, magic = FOOTER.unpack_from(data, len(data) - FOOTER.size)
+        if magic != FOOTER_MAGIC:
+            return None
+        end = len(data) - FOOTER.size - footer_len
+        (toc_len,) = struct.unpack_from("<I", data, end - 4)
+        toc = data[end - 4 - toc_len:end - 4]
+        data_end = end - 4 - toc_len
+        count, pos = _vint(toc, 0)
+        entries = []
+        offset = 0
+        for _ in range(count):
+            delta, pos = _vint(toc, pos)
+            offset += delta
+            (field,) = struct.unpack_from("<I", toc, pos)
+            _, pos = _vint(toc, pos + 4)
+            entries.append((offset, field))
+    except (OSError, struct.error, IndexError):
+        return None
+
+    sizes: dict[int, int] = {}
+    for (start, field), (stop, _) in zip(entries, entries[1:] + [(data_end, None)]):
+        if not 0 <= start <= stop <= data_end:
+            return None
+        sizes[field] = sizes.get(field, 0) + stop - start
+    return sizes
+
+
+def health(index_path: str = INDEX_PATH) -> dict:
+    """Zustand des Index-Ordners als dict (JSON-fähig)."""
+    meta = read_meta(index_path)
+    field_names = [field["name"] for field in meta["schema"]]
+
+    segments = {}
+    for segment in meta["segments"]:
+        deletes = segment.get("deletes") or {}
+        segments[segment["segment_id"].replace("-", "")] = {
+            "id": segment["segment_id"],
+            "dokumente": segment["max_doc"],
+            "geloescht": deletes.get("num_deleted_docs", 0),
+            "del_opstamp": deletes.get("opstamp"),
+            "bytes": 0,
+            "dateien": set(),
+        }
+
+    per_kind: dict[str, int] = {}
+    per_field: dict[str, dict[str, int]] = {}
+    stale = []
+    for name in sorted(os.listdir(index_path)):
+        match = SEGMENT_FILE.match(name)
+        if match is None:
+            continue
+        segment_id, opstamp, kind = match.groups()
+        segment = segments.get(segment_id)
+        if segment is None or (kind == "del" and int(opstamp) != segment["del_opstamp"]):
+            stale.append(name)
+            continue
+        path = os.path.join(index_path, name)
+        size = os.path.getsize(path)
+        segment["bytes"] += size
+        segment["dateien"].add(kind)
+        per_kind[kind] = per_kind.get(kind, 0) + size
+
+        fields = composite_sizes(path) if kind in COMPOSITE_KINDS else None
+        if fields is None:
+            fields = {None: size}       # Fast-Fields, Docstore und Löschmarken gelten für alle Felder
+        for field, n in fields.items():
+            field_name = field_names[field] if field is not None and field < len(field_names) else "(alle Felder)"
+            kinds = per_field.setdefault(field_name, {})
+            kinds[kind] = kinds.get(kind, 0) + n
+
+    expected = {"term", "idx", "pos", "fieldnorm", "fast", "store"}
+    docs = sum(s["dokumente"] for s in segments.values())
+    deleted = sum(s["geloescht"] for s in segments.values())
+    cards_bytes, cards_live = card_usage(index_path)
+    return {
+        "index": index_path,
+        "opstamp": meta["opstamp"],
+        "segmente": len(segments),
+        "dokumente": docs,
+        "geloescht": deleted,
+        "lebend": docs - deleted,
+        "anteil_geloescht": round(deleted / docs, 4) if docs else 0.0,
+        "bytes": sum(per_kind.values()),
+        "bytes_pro_art": dict(sorted(per_kind.items(), key=lambda kv: -kv[1])),
+        "bytes_pro_feld": dict(sorted(per_field.items(), key=lambda kv: -sum(kv[1].values()))),
+        "segment_liste": [
+            {"id": s["id"], "dokumente": s["dokumente"], "geloescht": s["geloescht"], "bytes": s["bytes"],
+             "fehlend": sorted(expected - s["dateien"])}
+            for s in sorted(segments.values(), key=lambda s: -s["dokumente"])
+        ],
+        "verwaist": stale,
+        "verwaist_bytes": sum(os.path.getsize(os.path.join(index_path, name)) for name in stale),
+        "karten_bytes": cards_bytes,
+        "karten_lebend_bytes": cards_live,
+    }
+
+
+def _mb(n: int) -> str:
+    return f"{n / 1_000_000:8.2f} MB"
+
+
+def print_report(report: dict):
+    print(f"Index {report['index']} (opstamp {report['opstamp']})")
+    print(f"  Segmente:   {report['segmente']}")
+    print(f"  Dokumente:  {report['lebend']} lebend, {report['geloescht']} gelöscht "
+          f"({report['anteil_geloescht']:.1%} von {report['dokumente']})")
+    print(f"  Größe:     {_mb(report['bytes'])}")
+    print("\nPro Dateiart:")
+    for kind, n in report["bytes_pro_art"].items():
+        print(f"  {FILE_KINDS.get(kind, kind):<16}{_mb(n)}")
+    print("\nPro Feld:")
+    for field, kinds in report["bytes_pro_feld"].items():
+        detail = ", ".join(f"{kind} {n / 1000:.0f} KB" for kind, n in sorted(kinds.items(), key=lambda kv: -kv[1]))
+        print(f"  {field:<18}{_mb(sum(kinds.values()))}   ({detail})")
+    print("\nSegmente:")
+    for s in report["segment_liste"]:
+        missing = f"   fehlt: {', '.join(s['fehlend'])}" if s["fehlend"] else ""
+        print(f"  {s['id']}  {s['dokumente']:>8} Dok.  {s['geloescht']:>7} gelöscht {_mb(s['bytes'])}{missing}")
+    if report["verwaist"]:
+        print(f"\nVerwaiste Dateien (kein Segment in meta.json oder ein laufender Writer): "
+              f"{len(report['verwaist'])}, {_mb(report['verwaist_bytes'])}")
+    if report["karten_bytes"]:
+        print(f"\nKarten-Datei: {_mb(report['karten_bytes'])}, davon in Gebrauch {_mb(report['karten_lebend_bytes'])}")
+
+
+def outdated_schema(meta: dict) -> bool:
+    """True, wenn der Index nicht das Schema von indexing.build_schema hat (vor Erscheinungstag und Facetten)."""
+    types = {field["name"]: field["type"] for field in meta["schema"]}
+    return (types.get("release_date") != "text" or types.get(RELEASE_FIELD) != "date"
+            or types.get(FACET_FIELD) != "facet" or "title_ngrams" not in types)
+
+
+def stored_fields(doc: dict) -> dict[str, list]:
+    """Felder für indexing.make_document aus einem gespeicherten Dokument, nicht gespeicherte werden neu erzeugt."""
+    fields = {name: values for name, values in doc.items() if name != "id"}
+    if "title" in fields:
+        fields["title_ngrams"] = title_ngram_values(fields["title"][0])
+    if "genres" in fields:
+        fields[FACET_FIELD] = sorted({path for genre in fields["genres"] for path in facet_paths(genre)})
+    day = parse_release_date(fields["release_date"][0]) if fields.get("release_date") else None
+    if day is not None:
+        fields[RELEASE_FIELD] = [day]
+    return fields
+
+
+def compact(index_path: str = INDEX_PATH, segmente: int = SEGMENTE, heap_size: int = HEAP_SIZE) -> int | None:
+    """Schreibt alle Dokumente in einem Commit in höchstens `segmente` neue Segmente.
+
+    Gibt die Zahl der Segmente danach zurück, None, wenn es nichts zu tun gab.
+    """
+    meta = read_meta(index_path)
+    if outdated_schema(meta):
+        raise ValueError(f"{index_path} hat ein älteres Schema, bitte mit indexing.py --voll neu aufbauen.")
+    compact_cards(index_path)       # vor dem Commit: neue Leser sehen dann schon die neue Karten-Datei
+    before = meta["segments"]
+    if len(before) <= segmente and not any(s.get("deletes") for s in before):
+        return None
+
+    index = register_tokenizers(Index.open(index_path))
+    searcher = index.searcher()
+    addrs = [addr for _, addr in searcher.search(Query.all_query(), max(searcher.num_docs, 1), count=False).hits]
+    # In id-Reihenfolge schreiben, dann liegen die Dokumente wie nach einem vollen Aufbau
+    ids = searcher.fast_field_values("id", addrs) if addrs else []
+    if None in ids:
+        ids = [searcher.doc(addr)["id"][0] for addr in addrs]
+
+    writer = index.writer(heap_size=max(heap_size, segmente * HEAP_PER_THREAD), num_threads=segmente)
+    writer.delete_all_documents()
+    for doc_id, addr in sorted(zip(ids, addrs), key=lambda pair: pair[0]):
+        writer.add_document(make_document(stored_fields(searcher.doc(addr).to_dict()), doc_id))
+    writer.commit()
+    writer.wait_merging_threads()
+    return len(read_meta(index_path)["segments"])
+
+
+def collect_garbage(index_path: str = INDEX_PATH):
+    """Löscht Dateien, die Tantivy verwaltet und die kein Segment mehr braucht."""
+    index = register_tokenizers(Index.open(index_path))
+    writer = index.writer(num_threads=1)
+    writer.garbage_collect_files()
+    writer.wait_merging_threads()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Zustand des Index anzeigen, Segmente zusammenführen, aufräumen.")
+    parser.add_argument("--index", default=INDEX_PATH)
+    parser.add_argument("--segmente", type=int, default=None, help="auf höchstens so viele Segmente zusammenführen")
+    parser.add_argument("--heap", type=int, default=HEAP_SIZE // 1_000_000, help="Writer-Heap in MB beim Zusammenführen")
+    parser.add_argument("--aufraeumen", action="store_true", help="nicht mehr benutzte Dateien löschen")
+    parser.add_argument("--json", action="store_true", help="Bericht als JSON ausgeben")
+    args = parser.parse_args()
+
+    if args.segmente is not None:
+        try:
+            after = compact(args.index, max(args.segmente, 1), args.heap * 1_000_000)
+        except ValueError as e:
+            print(e)
+            return
+        if after is None:
+            print("Nichts zusammenzuführen.")
+        else:
+            print(f"Segmente zusammengeführt, jetzt {after} Segment(e).")
+    if args.segmente is not None or args.aufraeumen:
+        collect_garbage(args.index)
+
+    report = health(args.index)
+    if args.json:
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+    else:
+        print_report(report)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,23 +1,12 @@
 import streamlit as st
 from typing import Any
-from tantivy import Index
+import render
+import search
+import timing
 from detail import render_detail_page
 
 # Konstanten
-TOP_K = 100          # Anzahl der Ergebnisse, die angezeigt werden sollen
-
-#Tokenisierung um in der Suche auch nach Wortteilen suchen zu können
-def ngrams(word, n=3):
-    word = word.lower()
-    return [word[i:i+n] for i in range(len(word)-n+1)]
-
-
-index = Index.open("neu")
-searcher = index.searcher()
-
-with open("styles.html", "r") as f:
-    css = f.read()
-st.markdown(css, unsafe_allow_html=True)
+PAGE_SIZE = search.PAGE_SIZE     # Karten, die pro "Load more" dazukommen
 
 def get_qp() -> dict[str, Any]:
     return getattr(st, "query_params", {})
@@ -26,7 +15,7 @@ def get_qp() -> dict[str, Any]:
 # (Letzte) Nutzeranfrage, die in den Session-Parametern gespeichert ist
 q = get_qp().get("q", "")
 view = get_qp().get("view")
-selected_id = get_qp().get("id")
+selected_app = get_qp().get("app")      # Steam-ID
 
 
 if st.session_state.get("reset_all"):
@@ -35,25 +24,26 @@ if st.session_state.get("reset_all"):
     q = ""
     st.session_state["genres_pills"] = []
     st.session_state["modus_pills"] = []
+    st.session_state.pop("years_slider", None)
+    st.session_state["sort_order"] = "Relevance"
+    st.session_state["search_mode"] = "Titles"
 
     st.session_state["reset_all"] = False
 
 
 
 # Unterseite
-if view == "detail" and selected_id:
-    q_t = index.parse_query(f"id:{selected_id}", default_field_names=["id"])
-    hits = searcher.search(q_t, limit=1).hits
+if view == "detail" and selected_app:
+    with timing.span("dokument"):
+        doc = search.get_game(selected_app)
 
-    if not hits:
+    if doc is None:
         st.error("Game not found.")
-        st.stop()
+        timing.stop()
 
-    score, address = hits[0]
-    doc = searcher.doc(address)
-
-    render_detail_page(doc, q)
-    st.stop()
+    with timing.span("detailseite"):
+        render_detail_page(doc, q)
+    timing.stop()
 
 
 # Hauptseite
@@ -75,6 +65,12 @@ with col_center:
             st.session_state["genres_pills"] = qp_genres.split(",")
         if qp_modus:
             st.session_state["modus_pills"] = qp_modus.split(",")
+        if render.parse_years(qp.get("years", "")):
+            st.session_state["years_slider"] = render.parse_years(qp["years"])
+        if qp.get("sort") == "newest":
+            st.session_state["sort_order"] = "Newest"
+        if qp.get("mode") == "text":
+            st.session_state["search_mode"] = "Full text"
 
         del st.session_state["came_from_detail"]
     
@@ -94,93 +90,85 @@ with col_center:
         st.session_state["reset_all"] = True
         st.rerun()
 
-    genre_opt = ["Action", "Adventure", "Casual", "Indie", "Racing", "RPG", "Simulation", "Strategy"]
-    modus_opt = ["Multiplayer", "Free to play"]
-    selected_genres = st.pills("Genres", genre_opt, selection_mode="multi", label_visibility="collapsed", width="stretch", key="genres_pills")
-    selected_modus = st.pills("Modus", modus_opt, selection_mode="multi", label_visibility="collapsed", width="stretch", key="modus_pills")
-
-
-enter_triggered = query_text != q and query_text != ""
-
-if enter_triggered or button_triggered:
-    st.query_params.update({"q": query_text, "view": "grid"})
-    st.rerun()
-
-
-if q or selected_genres or selected_modus:
-    # Titel-Suche
-    words = q.lower().split() if q else []
-    query_parts = []
-
-    for w in words:
-        if len(w) < 3:
-            query_parts.append(f"title_ngrams:{w}")
-        else:
-            grams = ngrams(w, 3)
-            part = " AND ".join([f"title_ngrams:{g}" for g in grams])
-            query_parts.append(f"({part})")
-
-    # Genre-Suche
-    genre_filters = []
-    if selected_genres:
-        for g in selected_genres:
-            genre_filters.append(f'genres:"{g}"')
-
-    # Modus-Suche
-    modus_filters = []
-    if selected_modus:
-        for m in selected_modus:
-            modus_filters.append(f'genres:"{m}"')
+    enter_triggered = query_text != q and query_text != ""
 
-    # Suchen kombinieren
-    all_filters = []
-
-    if query_parts:
-        all_filters.append("(" + " AND ".join(query_parts) + ")")
-
-    if genre_filters:
-        all_filters.append("(" + " AND ".join(genre_filters) + ")")
-
-    if modus_filters:
-        all_filters.append("(" + " AND ".join(modus_filters) + ")")
-
-    final_query = " AND ".join(all_filters)
-    query = index.parse_query(final_query)
-    hits = searcher.search(query, TOP_K).hits
+    if enter_triggered or button_triggered:
+        st.query_params.update({"q": query_text, "view": "grid"})
+        st.rerun()
 
-    if not hits:
+    genre_opt = ["Action", "Adventure", "Casual", "Indie", "Racing", "RPG", "Simulation", "Strategy"]
+    modus_opt = ["Multiplayer", "Free to play"]
+    sort_opt = ["Relevance", "Newest"]
+    mode_opt = ["Titles", "Full text"]
+
+    # Erscheinungsjahre: der volle Bereich heißt "kein Filter"
+    year_bounds = search.release_years()
+    years = None
+    if year_bounds and year_bounds[0] < year_bounds[1]:
+        first, last = st.session_state.get("years_slider") or year_bounds
+        st.session_state["years_slider"] = (max(first, year_bounds[0]), min(last, year_bounds[1]))
+        if st.session_state["years_slider"] != tuple(year_bounds):
+            years = st.session_state["years_slider"]
+    if st.session_state.get("sort_order") not in sort_opt:
+        st.session_state["sort_order"] = "Relevance"
+    if st.session_state.get("search_mode") not in mode_opt:
+        st.session_state["search_mode"] = "Titles"
+    # Volltext: Suchtext auch in Kurzbeschreibung und Beschreibung, Treffer mit Snippet
+    fulltext = st.session_state["search_mode"] == "Full text"
+
+    # Pills und Sortierung stehen schon im Session-State (die Widgets geben denselben Wert zurück)
+    selected_genres = st.session_state.get("genres_pills") or []
+    selected_modus = st.session_state.get("modus_pills") or []
+    newest = st.session_state["sort_order"] == "Newest"
+    show_results = bool(q or selected_genres or selected_modus or years or newest)
+
+    if show_results:
+        # Bei einer neuen Anfrage wieder nur die erste Seite zeigen
+        result_key = (search.normalize(q, selected_genres, selected_modus), years, newest, fulltext)
+        if st.session_state.get("result_key") != result_key:
+            st.session_state["result_key"] = result_key
+            st.session_state["visible"] = PAGE_SIZE
+
+    # Live-Zähler (wie viele Spiele bleiben übrig, wenn die Pill zusätzlich gewählt wird) und
+    # Titel- bzw. Volltext-, Genre- und Modus-Suche (seitenweise gecacht pro Anfrage und Index-Generation):
+    # mit dem Such-Dienst ein Rundgang pro Rerun
+    calls = [("facet_counts", (q, selected_genres, selected_modus, genre_opt + modus_opt, years, fulltext))]
+    if show_results:
+        calls.append(("search_cards", (q, selected_genres, selected_modus, st.session_state["visible"], PAGE_SIZE,
+                                       years, newest, fulltext)))
+    with timing.span("suche"):
+        counts, *found = search.batch(calls)
+    pill_label = lambda option: f"{option} ({counts[option]})"
+
+    st.pills("Genres", genre_opt, selection_mode="multi", format_func=pill_label, label_visibility="collapsed", width="stretch", key="genres_pills")
+    st.pills("Modus", modus_opt, selection_mode="multi", format_func=pill_label, label_visibility="collapsed", width="stretch", key="modus_pills")
+
+    col_years, col_mode, col_sort = st.columns([3, 1, 1])
+    with col_years:
+        if year_bounds and year_bounds[0] < year_bounds[1]:
+            st.slider("Release year", year_bounds[0], year_bounds[1], key="years_slider", width="stretch")
+    with col_mode:
+        st.segmented_control("Search in", mode_opt, key="search_mode", label_visibility="collapsed")
+    with col_sort:
+        # Neueste zuerst sortiert die Engine über das Datum im Index
+        st.segmented_control("Sort", sort_opt, key="sort_order", label_visibility="collapsed")
+
+
+if show_results:
+    cards, total = found[0]
+
+    if not cards:
         st.markdown("<div class='keineTitel'><p>No games found!</p></div>", unsafe_allow_html=True)
     else:
-        cards_html = ['<div class="grid">']
-
-        for score, addr in hits:
-            doc = searcher.doc(addr)
-
-
-            doc_id = doc["id"][0]
-            href = (f"?view=detail&id={doc_id}"
-                    f"&q={q}"
-                    f"&genres={','.join(st.session_state.get('genres_pills', []))}"
-                    f"&modus={','.join(st.session_state.get('modus_pills', []))}"
-                    )
-
-
-            title = doc["title"][0]
-            img = doc["image"]
-            image_url = (img[0]) if img else ""
-            description_short = doc["description_short"][0] if doc["description_short"] else ""
-            img_tag = f'<img src="{image_url}" loading="lazy" alt="poster">' if image_url else ""
-            genres = doc["genres"] if doc["genres"] else "no data"
-
-            if genres is not None:
-                genre_html = "<div>"
-                for tag in genres:
-                    genre_html += f'<span class="tag">{tag}</span>'
-                genre_html += "</div>"
-
-            extra = f'<div class="extra"><p>{description_short}{genre_html}</p></div>'  
-            card = f'<div class="hover"><a href="{href}" target="_self">{img_tag}<div class="text"><div class="t">{title}</div>{extra}</div></a></div>'
-
-            cards_html.append(f'<div class="suche card">{card}</div>')
-        cards_html.append("</div>")
-        st.markdown("".join(cards_html), unsafe_allow_html=True)
\ No newline at end of file
+        st.markdown(f"<div class='anzahl'><p>{total} games found</p></div>", unsafe_allow_html=True)
+        with timing.span("karten_html"):
+            grid = render.grid_html(cards, q, st.session_state.get("genres_pills", []), st.session_state.get("modus_pills", []), years, newest, fulltext)
+        st.markdown(grid, unsafe_allow_html=True)
+
+        # Weitere Treffer nachladen
+        if len(cards) < total:
+            col_left, col_center, col_right = st.columns([2, 1, 2])
+            with col_center:
+                if st.button(f"Load more ({len(cards)} of {total})", key="load_more", width="stretch"):
+                    st.session_state["visible"] += PAGE_SIZE
+                    st.rerun()
\ No newline at end of file
@@ -0,0 +1,72 @@
+"""
+Begrenzter LRU-Cache mit Ablaufzeit für Suchergebnisse.
+
+Der Cache gilt immer nur für eine Index-Generation (siehe searchindex.py): sobald ein Zugriff mit
+einer neuen Generation kommt, wird er geleert. Treffer, Fehlschläge und Invalidierungen werden
+gezählt und können über `stats()` abgefragt werden.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable
+
+MAX_SIZE = 256          # Anzahl gespeicherter Anfragen
+TTL = 10 * 60           # Sekunden, bis ein Eintrag verfällt
+
+
+class QueryCache:
+    def __init__(self, max_size: int = MAX_SIZE, ttl: float = TTL):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.entries: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self.generation = None
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def _check_generation(self, generation: int):
+        if generation != self.generation:
+            if self.entries:
+                self.invalidations += 1
+            self.entries.clear()
+            self.generation = generation
+
+    def get(self, key: Hashable, generation: int, compute: Callable[[], Any]) -> Any:
+        """Liefert den gespeicherten Wert zu `key` oder berechnet und speichert ihn."""
+        now = time.monotonic()
+        with self.lock:
+            self._check_generation(generation)
+            entry = self.entries.get(key)
+            if entry is not None and now - entry[0] < self.ttl:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+
+        # Außerhalb des Locks rechnen, damit parallele Sessions nicht aufeinander warten
+        value = compute()
+
+        with self.lock:
+            if generation == self.generation:
+                self.entries[key] = (now, value)
+                self.entries.move_to_end(key)
+                while len(self.entries) > self.max_size:
+                    self.entries.popitem(last=False)
+        return value
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def stats(self) -> dict[str, int]:
+        with self.lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self.entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "invalidations": self.invalidations,
+                "hit_rate_pct": round(100 * self.hits / total) if total else 0,
+            }
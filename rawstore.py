@@ -0,0 +1,186 @@
+"""
+Ablage der Rohantworten der Steam-API in komprimierten JSONL-Shards.
+
+Jede Antwort wird als eigenes gzip-Member an den aktuellen Shard angehängt. Eine kleine Index-Datei
+(index.tsv: Steam-ID, Shard, Offset, Länge) merkt sich, wo der letzte Stand jeder Steam-ID liegt.
+Dadurch lassen sich einzelne Antworten lesen, ohne den ganzen Shard zu entpacken, und der Indexer kann
+alle Antworten der Reihe nach streamen. Das manuelle Zusammenfügen in eine data.txt entfällt.
+
+Alte .txt-Dateien (z. B. 124000-128000.txt oder data.txt) können importiert werden:
+    python rawstore.py import data.txt 124000-128000.txt
+"""
+
+import gzip
+import os
+import re
+import sys
+import threading
+from typing import Iterator
+
+STORE_PATH = "rohdaten"
+SHARD_SIZE = 64 * 1024 * 1024       # neuer Shard ab 64 MB (komprimiert)
+INDEX_FILE = "index.tsv"
+
+# Die Antwort der API beginnt immer mit der Steam-ID als Schlüssel: {"440": {"success": ...
+_APP_ID = re.compile(r'\s*\{\s*"(\d+)"')
+
+
+def app_id_of(line: str) -> int | None:
+    """Liest die Steam-ID aus einer Rohantwort, ohne das ganze JSON zu parsen."""
+    m = _APP_ID.match(line)
+    return int(m.group(1)) if m else None
+
+
+def _cut_torn_line(path: str):
+    """Schneidet eine halb geschriebene letzte Zeile ab, damit die nächste nicht an ihr hängt."""
+    if not os.path.exists(path):
+        return
+    with open(path, "rb+") as f:
+        size = f.seek(0, os.SEEK_END)
+        if size == 0:
+            return
+        f.seek(size - 1)
+        if f.read(1) == b"\n":
+            return
+        f.seek(max(0, size - 4096))
+        tail = f.read()
+        f.truncate(size - len(tail) + tail.rfind(b"\n") + 1)
+
+
+class RawStore:
+    """Komprimierte JSONL-Shards mit Offset-Index (Steam-ID -> Shard, Offset, Länge)."""
+
+    def __init__(self, path: str = STORE_PATH, shard_size: int = SHARD_SIZE):
+        self.path = path
+        self.shard_size = shard_size
+        self.lock = threading.Lock()
+        self.entries: dict[int, tuple[int, int, int]] = {}
+        os.makedirs(path, exist_ok=True)
+
+        index_path = os.path.join(path, INDEX_FILE)
+        if os.path.exists(index_path):
+            with open(index_path, "r", encoding="UTF-8") as f:
+                for line in f:
+                    parts = line[:-1].split("\t")
+                    if not line.endswith("\n") or len(parts) != 4 or not all(p.isdigit() for p in parts):
+                        continue        # halb geschriebene Zeile nach einem Abbruch
+                    app_id, shard, offset, length = (int(p) for p in parts)
+                    self.entries[app_id] = (shard, offset, length)
+
+        shards = self.shards()
+        self.shard = shards[-1] if shards else 0
+        self._index_file = None
+        self._shard_file = None
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def __contains__(self, app_id: int) -> bool:
+        return app_id in self.entries
+
+    def shard_path(self, shard: int) -> str:
+        return os.path.join(self.path, f"shard-{shard:05d}.jsonl.gz")
+
+    def shards(self) -> list[int]:
+        return sorted(int(n[6:11]) for n in os.listdir(self.path) if re.fullmatch(r"shard-\d{5}\.jsonl\.gz", n))
+
+    def put(self, app_id: int, line: str):
+        """Hängt eine Antwort an den aktuellen Shard an. Ein älterer Stand derselben ID wird überschrieben."""
+        data = gzip.compress(line.strip().encode("UTF-8"), compresslevel=6)
+        with self.lock:
+            if self._shard_file is None:
+                self._open_shard()
+            if self._shard_file.tell() + len(data) > self.shard_size and self._shard_file.tell() > 0:
+                self._shard_file.close()
+                self.shard += 1
+                self._open_shard()
+
+            offset = self._shard_file.tell()
+            self._shard_file.write(data)
+            self._shard_file.flush()
+            self._index_file.write(f"{app_id}\t{self.shard}\t{offset}\t{len(data)}\n")
+            self._index_file.flush()
+            self.entries[app_id] = (self.shard, offset, len(data))
+
+    def _open_shard(self):
+        if self._index_file is None:
+            index_path = os.path.join(self.path, INDEX_FILE)
+            _cut_torn_line(index_path)
+            self._index_file = open(index_path, "a", encoding="UTF-8")
+        self._shard_file = open(self.shard_path(self.shard), "ab")
+
+    def get(self, app_id: int) -> str | None:
+        """Liest eine einzelne Antwort (nur dieses gzip-Member wird entpackt)."""
+        entry = self.entries.get(app_id)
+        if entry is None:
+            return None
+        shard, offset, length = entry
+        with open(self.shard_path(shard), "rb") as f:
+            f.seek(offset)
+            return gzip.decompress(f.read(length)).decode("UTF-8")
+
+    def iter_records(self) -> Iterator[tuple[int, str]]:
+        """Streamt den aktuellen Stand aller Antworten, geordnet nach Shard und Offset."""
+        order = sorted(self.entries.items(), key=lambda e: e[1])
+        current, f = None, None
+        try:
+            for app_id, (shard, offset, length) in order:
+                if shard != current:
+                    if f is not None:
+                        f.close()
+                    f = open(self.shard_path(shard), "rb")
+                    current = shard
+                f.seek(offset)
+                yield app_id, gzip.decompress(f.read(length)).decode("UTF-8")
+        finally:
+            if f is not None:
+                f.close()
+
+    def iter_lines(self) -> Iterator[str]:
+        for _, line in self.iter_records():
+            yield line
+
+    def close(self):
+        with self.lock:
+            for f in (self._shard_file, self._index_file):
+                if f is not None:
+                    f.close()
+            self._shard_file = self._index_file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def read_lines(quelle: str) -> Iterator[str]:
+    """Liefert die Rohantworten aus einem RawStore-Ordner oder einer alten .txt-Datei."""
+    if os.path.isdir(quelle):
+        yield from RawStore(quelle).iter_lines()
+    else:
+        with open(quelle, "r", encoding="UTF-8") as f:
+            yield from f
+
+
+def import_text(store: RawStore, path: str) -> int:
+    """Übernimmt eine alte .txt-Datei (eine Antwort pro Zeile) in den Store."""
+    n = 0
+    with open(path, "r", encoding="UTF-8") as f:
+        for line in f:
+            app_id = app_id_of(line)
+            if app_id is None:
+                continue
+            store.put(app_id, line)
+            n += 1
+    return n
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3 or sys.argv[1] != "import":
+        print("Aufruf: python rawstore.py import <datei.txt> [...]")
+        sys.exit(1)
+    with RawStore() as store:
+        for path in sys.argv[2:]:
+            print(f"{path}: {import_text(store, path)} Antworten übernommen.")
+        print(f"Store enthält {len(store)} Steam-IDs.")
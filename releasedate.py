@@ -0,0 +1,163 @@
+"""
+Erscheinungsdatum aus dem Anzeigetext von Steam ("12 Jan, 2019", "Jan 12, 2019", "Q3 2026", ...).
+
+Steam liefert das Datum nur als Text, je nach Sprache der Anfrage auch lokalisiert ("12. Jan. 2019",
+"12 janv. 2019", "2019年1月12日"). Beim Indizieren wird daraus ein Datum (Tag genau, UTC) im
+Fast-Field "release_day"; darüber sortiert die Engine nach "Newest first" und es wird nach Jahren gefiltert.
+Der Text bleibt für die Detailseite im Feld "release_date". Ohne Jahr ("Coming soon", "To be
+announced") bleibt "release_day" leer: solche Spiele fallen aus Jahresfiltern heraus und stehen
+beim Sortieren hinten.
+
+Pro Snapshot sortiert die Engine einmal alle Spiele über das Fast-Field (`ReleaseOrder`). Daraus
+entstehen die Position jeder id in dieser Reihenfolge und ein Bitset pro Erscheinungsjahr: eine
+Trefferliste der Titelsuche nach Datum zu ordnen ist dann ein Nachschlagen der Positionen, ein
+Jahresbereich ein ODER weniger Bitsets.
+"""
+
+import re
+from datetime import datetime, timezone
+
+import numpy as np
+from tantivy import FieldType, Order, Query
+
+RELEASE_FIELD = "release_day"
+MIN_YEAR, MAX_YEAR = 1970, 2100
+
+# Monatsnamen als Präfix (en, de, fr, es, it, pt, nl, pl, ru); längere Präfixe zuerst
+MONTHS = {
+    "janv": 1, "jan": 1, "jän": 1, "ene": 1, "gen": 1, "sty": 1, "янв": 1,
+    "févr": 2, "fév": 2, "fev": 2, "feb": 2, "lut": 2, "фев": 2,
+    "mär": 3, "mar": 3, "mrz": 3, "мар": 3,
+    "avr": 4, "apr": 4, "abr": 4, "kwi": 4, "апр": 4,
+    "may": 5, "mai": 5, "mag": 5, "maj": 5, "mei": 5, "мая": 5, "май": 5,
+    "juin": 6, "jun": 6, "giu": 6, "cze": 6, "июн": 6,
+    "juil": 7, "jul": 7, "lug": 7, "lip": 7, "июл": 7,
+    "aoû": 8, "aou": 8, "aug": 8, "ago": 8, "sie": 8, "авг": 8,
+    "sep": 9, "set": 9, "wrz": 9, "сен": 9,
+    "oct": 10, "okt": 10, "out": 10, "ott": 10, "paź": 10, "paz": 10, "окт": 10,
+    "nov": 11, "lis": 11, "ноя": 11,
+    "déc": 12, "dec": 12, "dez": 12, "dic": 12, "gru": 12, "дек": 12,
+}
+SEASONS = {"spring": 3, "summer": 6, "autumn": 9, "fall": 9, "winter": 12,
+           "frühling": 3, "sommer": 6, "herbst": 9}
+
+CJK_DATE = re.compile(r"(\d{4})\s*[年년]\s*(\d{1,2})\s*[月월](?:\s*(\d{1,2})\s*[日일])?")
+ISO_DATE = re.compile(r"\b(\d{4})[-/.](\d{1,2})[-/.](\d{1,2})\b")
+NUMERIC_DATE = re.compile(r"\b(\d{1,2})[./](\d{1,2})[./](\d{4})\b")      # Tag zuerst (de, fr, ru, ...)
+QUARTER = re.compile(r"\bq([1-4])\b")
+WORD = re.compile(r"[^\W\d_]+|\d+")
+
+
+def make_date(year: int, month: int = 1, day: int = 1) -> datetime | None:
+    """Datum in UTC; ungültige Tage werden zum Monatsersten, ungültige Jahre/Monate zu None."""
+    if not MIN_YEAR <= year <= MAX_YEAR or not 1 <= month <= 12:
+        return None
+    try:
+        return datetime(year, month, day, tzinfo=timezone.utc)
+    except ValueError:
+        return datetime(year, month, 1, tzinfo=timezone.utc)
+
+
+def month_of(word: str) -> int | None:
+    for prefix, month in MONTHS.items():
+        if word.startswith(prefix):
+            return month
+    return SEASONS.get(word)
+
+
+def parse_release_date(text: str) -> datetime | None:
+    """Datum aus dem Anzeigetext von Steam, None wenn der Text kein Jahr enthält."""
+    text = (text or "").strip().lower()
+    if not text:
+        return None
+
+    match = CJK_DATE.search(text) or ISO_DATE.search(text)
+    if match:
+        year, month, day = match.groups()
+        return make_date(int(year), int(month), int(day or 1))
+    match = NUMERIC_DATE.search(text)
+    if match:
+        day, month, year = match.groups()
+        return make_date(int(year), int(month), int(day))
+
+    year = month = day = None
+    for word in WORD.findall(text):
+        if word.isdigit():
+            if len(word) == 4 and year is None:
+                year = int(word)
+            elif len(word) <= 2 and day is None:
+                day = int(word)
+        elif month is None:
+            month = month_of(word)
+    if year is None:
+        return None
+    if month is None:
+        quarter = QUARTER.search(text)
+        month = (int(quarter.group(1)) - 1) * 3 + 1 if quarter else 1
+        day = None
+    return make_date(year, month, day or 1)
+
+
+def year_query(schema, years: tuple[int, int]):
+    """Query für ein Erscheinungsjahr zwischen years[0] und years[1] (beide eingeschlossen)."""
+    # Grenzen direkt als Datum: make_date(MAX_YEAR + 1) wäre None
+    first, last = max(years[0], MIN_YEAR), min(years[1], MAX_YEAR)
+    return Query.range_query(schema, RELEASE_FIELD, FieldType.Date,
+                             datetime(first, 1, 1, tzinfo=timezone.utc), datetime(last + 1, 1, 1, tzinfo=timezone.utc),
+                             include_lower=True, include_upper=False)
+
+
+def _bits(mask: np.ndarray) -> int:
+    """Bitset (Python-int wie in facets.py) aus einem bool-Array über die ids."""
+    return int.from_bytes(np.packbits(mask, bitorder="little").tobytes(), "little")
+
+
+class ReleaseOrder:
+    """Alle Spiele nach Erscheinungsdatum (neueste zuerst, sortiert von der Engine) und Bitsets pro Jahr."""
+
+    def __init__(self, snapshot):
+        self.rank = np.zeros(0, dtype=np.int64)      # Position jeder id in der Reihenfolge
+        self.year_bits: dict[int, int] = {}
+        self.bounds: tuple[int, int] | None = None
+        searcher = snapshot.searcher
+        if searcher.num_docs == 0:
+            return
+        try:
+            hits = searcher.search(Query.all_query(), searcher.num_docs, count=False,
+                                   order_by_field=RELEASE_FIELD, order=Order.Desc).hits
+            ids = np.asarray(searcher.fast_field_values("id", [addr for _, addr in hits]), dtype=np.int64)
+        except (ValueError, TypeError):
+            return      # Index ohne "release_day" oder ohne Fast-Field "id"
+
+        # Spiele ohne Datum stehen hinten und teilen sich eine Position (Relevanz bleibt dort erhalten)
+        dated = sum(1 for key, _ in hits if key is not None)
+        self.rank = np.full(int(ids.max()) + 1, dated, dtype=np.int64)
+        self.rank[ids[:dated]] = np.arange(dated)
+        if not dated:
+            return
+
+        # Sortierschlüssel eines Datumsfelds: Nanosekunden seit 1970
+        keys = np.asarray([key for key, _ in hits[:dated]], dtype="datetime64[ns]")
+        years = keys.astype("datetime64[Y]").astype(np.int64) + 1970
+        for year in np.unique(years):
+            mask = np.zeros(len(self.rank), dtype=bool)
+            mask[ids[:dated][years == year]] = True
+            self.year_bits[int(year)] = _bits(mask)
+        self.bounds = int(years.min()), int(years.max())
+
+    def in_years(self, years: tuple[int, int]) -> int:
+        """Bitset der Spiele, die zwischen years[0] und years[1] (eingeschlossen) erschienen sind."""
+        bits = 0
+        for year, year_bits in self.year_bits.items():
+            if years[0] <= year <= years[1]:
+                bits |= year_bits
+        return bits
+
+    def newest_first(self, ids: list[int]) -> list[int]:
+        """Die ids nach Erscheinungsdatum, neueste zuerst; ohne Datum in der bisherigen Reihenfolge am Ende."""
+        if not len(self.rank) or not ids:
+            return ids
+        ids = np.asarray(ids, dtype=np.int64)
+        rank = self.rank[np.minimum(ids, len(self.rank) - 1)]
+        rank[ids >= len(self.rank)] = len(self.rank)
+        return ids[np.argsort(rank, kind="stable")].tolist()
@@ -0,0 +1,153 @@
+"""
+HTML der Spielkarten im Ergebnis-Raster (pages/home.py) und bei den Editor's picks (pages/favs.py).
+
+Liegt in einem eigenen Modul, damit das Raster auch ohne Streamlit gebaut (und gemessen, siehe
+bench/) werden kann.
+
+Alles an einer Karte außer dem Link hängt nur vom Spiel ab. Dieser Teil (Bild, Titel, Kurzbeschreibung,
+Genre-Tags) wird einmal pro Spiel und Index-Generation gebaut und gehalten; pro Rerun kommen nur noch
+die Links mit Suchtext und Pills dazu, das Raster ist dann ein einfacher join. Das Bild ist die lokale
+Kopie aus thumbnails.py, solange es die noch nicht gibt die Steam-URL (eigenes Fragment je Variante).
+Treffer der Volltextsuche zeigen statt der Kurzbeschreibung das Snippet der Engine (nicht gecacht).
+Die Detailseite (detail.py) legt ihr HTML ebenfalls hier ab, ihre Leiste mit ähnlichen Spielen
+nutzt dieselben Karten-Fragmente.
+"""
+
+import urllib.parse as up
+from html import escape
+
+import search
+import thumbnails
+
+FRAGMENTS = 20_000      # höchstens so viele Fragmente (Karten und Detailseiten) pro Generation
+
+CARD_HEAD = '<div class="suche card"><div class="hover"><a href="'
+
+
+_fragments: tuple[int | None, dict] = (None, {})
+
+
+def fragment_store() -> dict:
+    """Die Fragmente der aktuellen Index-Generation (ohne Lock: dict-Zugriffe sind unter dem GIL atomar)."""
+    global _fragments
+    generation = search.generation()
+    if _fragments[0] != generation:
+        _fragments = (generation, {})
+    return _fragments[1]
+
+
+def cached(store: dict, key, build) -> str:
+    value = store.get(key)
+    if value is None:
+        if len(store) >= FRAGMENTS:
+            store.clear()
+        value = store[key] = build()
+    return value
+
+
+def fragment(key, build) -> str:
+    """Statisches HTML zu `key`, einmal pro Index-Generation gebaut."""
+    return cached(fragment_store(), key, build)
+
+
+def tag_strip(values) -> str:
+    return "<div>" + "".join(f'<span class="tag">{tag}</span>' for tag in values) + "</div>"
+
+
+def years_param(years) -> str:
+    """Jahresbereich als Query-Parameter ("2010-2020"), leer ohne Filter."""
+    return f"{years[0]}-{years[1]}" if years else ""
+
+
+def parse_years(value: str) -> tuple[int, int] | None:
+    """Gegenstück zu years_param, None bei leerem oder ungültigem Wert."""
+    first, sep, last = (value or "").partition("-")
+    if not (sep and first.isdigit() and last.isdigit()):
+        return None
+    return int(first), int(last)
+
+
+def card_params(q: str, genres, modus, years=None, newest: bool = False, fulltext: bool = False) -> str:
+    """Suchtext, Pills, Jahre, Sortierung und Suchmodus für die Links zur Detailseite, damit "Back to Overview" sie wiederherstellt."""
+    # Alles URL-kodiert: "&", "#" oder '"' im Suchtext sollen weder den Link noch das href-Attribut zerbrechen
+    return (f"&q={up.quote_plus(str(q))}"
+            f"&genres={up.quote_plus(','.join(genres))}"
+            f"&modus={up.quote_plus(','.join(modus))}"
+            + (f"&years={years_param(years)}" if years else "")
+            + ("&sort=newest" if newest else "")
+            + ("&mode=text" if fulltext else "")
+            )
+
+
+def card_href(steam_id, q: str, genres, modus, years=None, newest: bool = False, fulltext: bool = False) -> str:
+    """Link zur Detailseite (über die Steam-ID, die bleibt über Neuaufbauten des Index gleich)."""
+    return f"?view=detail&app={steam_id}" + card_params(q, genres, modus, years, newest, fulltext)
+
+
+def card_body(card: dict, image_url: str, snippet: str = "") -> str:
+    """Alles an einer Karte hinter dem Link: Bild, Titel und (beim Hover) Kurzbeschreibung bzw. Snippet und Genres."""
+    title = card["title"]
+    # Text ohne HTML (indexing.strip_html); das Snippet escapt schon die Engine
+    description_short = f'<span class="snippet">{snippet}</span>' if snippet else escape(card["description_short"], quote=False)
+    img_tag = f'<img src="{image_url}" loading="lazy" alt="poster">' if image_url else ""
+    genres = card["genres"] if card["genres"] else "no data"
+    genre_html = tag_strip(genres)
+
+    extra = f'<div class="extra"><p>{description_short}{genre_html}</p></div>'
+    return f'" target="_self">{img_tag}<div class="text"><div class="t">{title}</div>{extra}</div></a></div></div>'
+
+
+def card_html(card: dict, href: str) -> str:
+    """Eine Karte mit Link (ohne Cache)."""
+    return CARD_HEAD + href + card_body(card, thumbnails.src(card["image"]))
+
+
+def cards_html(cards: list[dict], params: str) -> list[str]:
+    """Die Karten mit Links, die gleichen Fragmente wie im Raster."""
+    store = fragment_store()
+    html = []
+    for card in cards:
+        image_url = thumbnails.src(card["image"])
+        if card.get("snippet"):
+            body = card_body(card, image_url, card["snippet"])
+        else:
+            body = cached(store, ("karte", card["id"], image_url), lambda: card_body(card, image_url))
+        html.append(f'{CARD_HEAD}?view=detail&app={card["steamId"]}{params}{body}')
+    return html
+
+
+def grid_html(cards: list[dict], q: str, genres, modus, years=None, newest: bool = False,
+              fulltext: bool = False) -> str:
+    """Das komplette Raster zu einer Ergebnisliste."""
+    params = card_params(q, genres, modus, years, newest, fulltext)
+    return '<div class="grid">' + "".join(cards_html(cards, params)) + "</div>"
+
+
+def similar_html(cards: list[dict], q: str, genres, modus, years=None, newest: bool = False,
+                 fulltext: bool = False) -> str:
+    """Die Leiste "Similar games" unter der Detailseite (leer ohne ähnliche Spiele)."""
+    if not cards:
+        return ""
+    params = card_params(q, genres, modus, years, newest, fulltext)
+    return ('<div class="similar"><h2>Similar games</h2><div class="grid_similar">'
+            + "".join(cards_html(cards, params)) + "</div></div>")
+
+
+def pick_body(card: dict, image_url: str) -> str:
+    """Eine Karte bei den Editor's picks hinter dem Link."""
+    img_tag = f'<img src="{image_url}" loading="lazy" alt="poster">' if image_url else ""
+    extra = f'<div class="extra"><p>{escape(card["description_short"], quote=False)}</p></div>'
+    return f'" target="_self">{img_tag}<div class="t">{card["title"]}</div></a></div>{extra}</div>'
+
+
+def picks_html(cards: list[dict], quoted_q: str) -> str:
+    """Die nummerierten Editor's picks."""
+    store = fragment_store()
+    cards_html = ['<div class="grid_favs">']
+    for num, card in enumerate(cards, 1):
+        image_url = thumbnails.src(card["image"])
+        body = cached(store, ("pick", card["id"], image_url), lambda: pick_body(card, image_url))
+        place = f'<div class="platz">#{num}</div>'
+        cards_html.append(f'<div class="num">{place}<div class="hover"><a class="card" href="?view=detail&app={card["steamId"]}&q={quoted_q}{body}')
+    cards_html.append("</div>")
+    return "".join(cards_html)
@@ -0,0 +1,459 @@
+"""
+Suche über den gemeinsamen Index (siehe searchindex.py).
+
+Die Seiten rufen nur noch die Funktionen hier auf. Ergebnisse werden seitenweise (offset/limit der
+Engine) geholt und pro normalisierter Anfrage (Suchtext, Genres, Modus) und Seite im QueryCache
+gehalten, sodass Reruns mit derselben Anfrage (z. B. nach "Back to Overview" von der Detailseite)
+ohne Suche und ohne Dokumentabrufe auskommen und "Load more" nur die neue Seite holt.
+Reine Filter-Anfragen (nur Genres/Modus, kein Suchtext) laufen komplett über die Genre-Bitsets.
+Suchtext geht an die fehlertolerante Titelsuche (titlesearch.py), deren Rangliste einmal pro Anfrage
+berechnet und dann nur noch in Seiten geschnitten wird.
+Ein Bereich von Erscheinungsjahren (`years`) ist ein weiteres Bitset (ODER der Jahres-Bitsets aus
+releasedate.py). Mit `newest` sortiert die Engine reine Filter-Anfragen über das Fast-Field
+"release_day" (offset/limit wie sonst); die Rangliste der Titelsuche wird nach der Reihenfolge
+geordnet, in der die Engine einmal pro Generation alle Spiele sortiert hat. Ohne Datum: zuletzt.
+
+Mit `fulltext` geht der Suchtext stattdessen an die Volltextsuche über Titel und Beschreibungen
+(fulltext.py): die Engine sammelt pro Seite nur die besten k (ohne Zählen), die Trefferzahl kommt aus
+dem gecachten Bitset aller Treffer, das auch die Pill-Zähler brauchen. Die Karten tragen dann das
+Snippet der Engine ("snippet").
+
+Ist die Umgebungsvariable SEARCHD gesetzt, gehen die Aufrufe der Seiten an den gemeinsamen
+Such-Dienst (searchd.py) und dieser Prozess öffnet den Index nicht selbst, es sei denn, der Dienst
+antwortet nicht: dann wird hier gesucht. `batch` schickt mehrere Aufrufe in einem Rundgang.
+"""
+
+import os
+
+from tantivy import Occur, Order, Query
+
+import searchindex
+import timing
+from facets import bits_from_ids, filter_ids, genre_query, ids_from_bits
+from fulltext import Snippets, text_query
+from querycache import QueryCache
+from releasedate import RELEASE_FIELD, year_query
+from titlesearch import title_query
+
+# Konstanten
+PAGE_SIZE = 24       # Anzahl der Ergebnisse pro Seite
+SIMILAR = 6          # ähnliche Spiele auf der Detailseite
+
+# Ein Cache pro Prozess, wird bei jeder neuen Index-Generation geleert
+cache = QueryCache()
+
+# Client für den Such-Dienst (None: Suche in diesem Prozess)
+SEARCHD = os.environ.get("SEARCHD") or None
+client = None
+if SEARCHD:
+    from searchd import RemoteDoc, SearchClient
+
+    client = SearchClient(SEARCHD)
+
+LOCAL = object()        # Ergebnis von _remote: im eigenen Prozess suchen
+_release_years = (None, None)       # (Generation, Jahre) der letzten Antwort des Such-Dienstes
+
+
+def _remote(name: str, *args):
+    """Aufruf beim Such-Dienst; LOCAL ohne Dienst oder wenn er nicht (rechtzeitig) antwortet."""
+    if client is None or not client.available:
+        return LOCAL
+    try:
+        return client.call(name, *args)
+    except OSError:
+        return LOCAL
+
+
+def normalize(q: str, genres, modus) -> tuple:
+    """Cache-Schlüssel: Suchtext ohne Groß-/Kleinschreibung und Mehrfach-Leerzeichen, Filter sortiert."""
+    return " ".join((q or "").lower().split()), tuple(sorted(genres or [])), tuple(sorted(modus or []))
+
+
+def build_query(index, q: str, genres, modus):
+    """Baut die Query für Titel-, Genre- und Modus-Suche als Query-Objekt (ohne Query-Parser)."""
+    with timing.span("query_bauen"):
+        return _build_query(index, q, genres, modus)
+
+
+def _build_query(index, q: str, genres, modus):
+    # Titel-Suche
+    parts = [(Occur.Must, title_query(index.schema, q))] if q else []
+
+    # Genre- und Modus-Suche
+    parts += [(Occur.Must, genre_query(index, g)) for g in [*genres, *modus]]
+
+    return Query.boolean_query(parts) if parts else Query.all_query()
+
+
+def _years(years) -> tuple[int, int] | None:
+    """Jahresbereich als Tupel (auch aus einer JSON-Liste), None ohne Filter."""
+    return (int(years[0]), int(years[1])) if years else None
+
+
+def _year_bits(snapshot, years: tuple[int, int]) -> int:
+    """Bitset der Spiele, die im Jahresbereich erschienen sind."""
+    if snapshot.release.bounds is None:
+        return snapshot.facets.all      # Index ohne Fast-Field "release_day": kein Filter möglich
+    return snapshot.release.in_years(years)
+
+
+def card_from_doc(doc) -> dict:
+    """Die Felder eines Dokuments, die eine Karte im Raster braucht (Fallback ohne Karten-Datei)."""
+    return {
+        "id": doc["id"][0],
+        "steamId": doc["steamId"][0] if doc["steamId"] else None,
+        "title": doc["title"][0] if doc["title"] else "",
+        "image": doc["image"][0] if doc["image"] else "",
+        "description_short": doc["description_short"][0] if doc["description_short"] else "",
+        "genres": list(doc["genres"]),
+    }
+
+
+def cards_for_hits(snapshot, addrs) -> list[dict]:
+    """Karten zu Treffern: ids aus dem Fast-Field, Karten aus der Karten-Datei statt aus dem Docstore."""
+    with timing.span("karten_laden"):
+        return _cards_for_hits(snapshot, addrs)
+
+
+def _cards_for_hits(snapshot, addrs) -> list[dict]:
+    if len(snapshot.cards):
+        try:
+            ids = snapshot.searcher.fast_field_values("id", addrs)
+        except ValueError:
+            ids = None      # Index noch ohne Fast-Field "id" gebaut
+        if ids is not None and None not in ids:
+            return snapshot.cards.get_many(ids)
+    return [card_from_doc(snapshot.searcher.doc(addr)) for addr in addrs]
+
+
+def _ranked(snapshot, key: tuple, years: tuple[int, int] | None) -> list[int]:
+    """Rangliste der Titelsuche (gecacht), gegebenenfalls auf den Jahresbereich eingeschränkt."""
+    ranked = cache.get(("ranked", key), snapshot.generation, lambda: _ranked_ids(snapshot, *key))
+    if years:
+        ranked = cache.get(("ranked", key, years), snapshot.generation,
+                           lambda: filter_ids(_year_bits(snapshot, years), ranked))
+    return ranked
+
+
+def _engine_query(snapshot, key: tuple, years: tuple[int, int] | None):
+    """Die Anfrage als Query für die Engine (Filter nach Datum sortiert, Indizes ohne Karten-Datei)."""
+    q, genres, modus = key
+    query = build_query(snapshot.index, q, genres, modus)
+    if years:
+        try:
+            query = Query.boolean_query([(Occur.Must, query), (Occur.Must, year_query(snapshot.index.schema, years))])
+        except ValueError:
+            pass
+    return query
+
+
+def _newest_page(snapshot, key: tuple, years, page: int, page_size: int) -> tuple[list[dict], int] | None:
+    """Seite nach Erscheinungsdatum, neueste zuerst (None bei einem Index ohne "release_day")."""
+    q = key[0]
+    if q and len(snapshot.cards):
+        if snapshot.release.bounds is None:
+            return None
+        ranked = cache.get(("neueste", key, years), snapshot.generation,
+                           lambda: snapshot.release.newest_first(_ranked(snapshot, key, years)))
+        with timing.span("karten_laden"):
+            return snapshot.cards.get_many(ranked[page * page_size:(page + 1) * page_size]), len(ranked)
+
+    # Nur Filter: die Engine sortiert über das Fast-Field
+    query = cache.get(("query", key, years), snapshot.generation, lambda: _engine_query(snapshot, key, years))
+    with timing.span("engine_suche"):
+        try:
+            result = snapshot.searcher.search(query, page_size, count=True, offset=page * page_size,
+                                              order_by_field=RELEASE_FIELD, order=Order.Desc)
+        except ValueError:
+            return None     # Index vor "release_day": nach Relevanz wie ohne Sortierung
+    return cards_for_hits(snapshot, [addr for _, addr in result.hits]), result.count
+
+
+def _fulltext_bits(snapshot, q: str) -> int:
+    """Bitset aller Spiele, die den Suchtext irgendwo enthalten (gecacht pro Suchtext)."""
+    def build():
+        query = text_query(snapshot.index.schema, q)
+        return snapshot.facets.matching_bits(query) if query is not None else 0
+    return cache.get(("volltext_bits", q), snapshot.generation, build)
+
+
+def _fulltext_query(snapshot, key: tuple, years: tuple[int, int] | None):
+    """Volltext-Query mit Genres, Modus und Jahren als MUST (ohne Filter bleibt die reine Disjunktion)."""
+    q, genres, modus = key
+    query = text_query(snapshot.index.schema, q)
+    filters = [genre_query(snapshot.index, g) for g in [*genres, *modus]]
+    if years:
+        try:
+            filters.append(year_query(snapshot.index.schema, years))
+        except ValueError:
+            pass
+    if query is None or not filters:
+        return query
+    return Query.boolean_query([(Occur.Must, query), *((Occur.Must, f) for f in filters)])
+
+
+def _fulltext_page(snapshot, key: tuple, page: int, page_size: int,
+                   years: tuple[int, int] | None, newest: bool) -> tuple[list[dict], int]:
+    q, genres, modus = key
+    query = cache.get(("volltext_query", key, years), snapshot.generation, lambda: _fulltext_query(snapshot, key, years))
+    if query is None:
+        return [], 0
+    bits = _fulltext_bits(snapshot, q) & snapshot.facets.filter(genres + modus)
+    if years:
+        bits &= _year_bits(snapshot, years)
+
+    with timing.span("engine_suche"):
+        result = None
+        if newest:
+            try:
+                result = snapshot.searcher.search(query, page_size, count=False, offset=page * page_size,
+                                                  order_by_field=RELEASE_FIELD, order=Order.Desc)
+            except ValueError:
+                pass        # Index vor "release_day": nach Relevanz
+        if result is None:
+            result = snapshot.searcher.search(query, page_size, count=False, offset=page * page_size)
+    addrs = [addr for _, addr in result.hits]
+    cards = cards_for_hits(snapshot, addrs)
+
+    with timing.span("snippets"):
+        snippets = cache.get(("snippets", q), snapshot.generation,
+                             lambda: Snippets(snapshot.searcher, snapshot.index.schema, text_query(snapshot.index.schema, q)))
+        html = [snippets.html(snapshot.searcher.doc(addr)) for addr in addrs]
+    return [{**card, "snippet": s} if s else card for card, s in zip(cards, html)], bits.bit_count()
+
+
+def _search_page(snapshot, key: tuple, page: int, page_size: int,
+                 years: tuple[int, int] | None = None, newest: bool = False,
+                 fulltext: bool = False) -> tuple[list[dict], int]:
+    if fulltext and key[0]:
+        return _fulltext_page(snapshot, key, page, page_size, years, newest)
+
+    if newest:
+        result = _newest_page(snapshot, key, years, page, page_size)
+        if result is not None:
+            return result
+
+    q, genres, modus = key
+    if not q:
+        # Nur Filter: UND der Genre-Bitsets, Seite direkt aus den gesetzten Bits
+        bits = snapshot.facets.filter(genres + modus)
+        if years:
+            bits &= _year_bits(snapshot, years)
+        ids = ids_from_bits(bits, page * page_size, page_size)
+        if not len(snapshot.cards):
+            return get_cards(ids), bits.bit_count()
+        with timing.span("karten_laden"):
+            return snapshot.cards.get_many(ids), bits.bit_count()
+
+    if len(snapshot.cards):
+        # Titelsuche: komplette Rangliste (gecacht), daraus die Seite schneiden
+        ranked = _ranked(snapshot, key, years)
+        ids = ranked[page * page_size:(page + 1) * page_size]
+        with timing.span("karten_laden"):
+            return snapshot.cards.get_many(ids), len(ranked)
+
+    # Index ohne Karten-Datei: dieselbe Suche über die Engine
+    query = _engine_query(snapshot, key, years)
+    with timing.span("engine_suche"):
+        result = snapshot.searcher.search(query, page_size, count=True, offset=page * page_size)
+    return cards_for_hits(snapshot, [addr for _, addr in result.hits]), result.count
+
+
+def search_page(q: str, genres=(), modus=(), page: int = 0, page_size: int = PAGE_SIZE,
+                years=None, newest: bool = False, fulltext: bool = False) -> tuple[list[dict], int]:
+    """Karten einer Ergebnisseite und die Gesamtzahl der Treffer, aus dem Cache falls schon einmal geholt.
+
+    `years` schränkt auf Erscheinungsjahre (von, bis) ein, `newest` sortiert nach Datum statt nach Relevanz,
+    `fulltext` sucht auch in den Beschreibungen.
+    """
+    years = _years(years)
+    result = _remote("search_page", q, list(genres), list(modus), page, page_size, years, newest, fulltext)
+    if result is not LOCAL:
+        cards, total = result
+        return cards, total
+    snapshot = searchindex.get()
+    key = normalize(q, genres, modus)
+    return cache.get((key, page, page_size, years, newest, fulltext), snapshot.generation,
+                     lambda: _search_page(snapshot, key, page, page_size, years, newest, fulltext))
+
+
+def search_cards(q: str, genres=(), modus=(), limit: int = PAGE_SIZE, page_size: int = PAGE_SIZE,
+                 years=None, newest: bool = False, fulltext: bool = False) -> tuple[list[dict], int]:
+    """Die ersten `limit` Karten (seitenweise gecacht) und die Gesamtzahl der Treffer."""
+    years = _years(years)
+    result = _remote("search_cards", q, list(genres), list(modus), limit, page_size, years, newest, fulltext)
+    if result is not LOCAL:
+        cards, total = result
+        return cards, total
+    cards, total = search_page(q, genres, modus, 0, page_size, years, newest, fulltext)
+    page = 1
+    while len(cards) < min(limit, total):
+        more, total = search_page(q, genres, modus, page, page_size, years, newest, fulltext)
+        if not more:
+            break
+        cards = cards + more
+        page += 1
+    return cards[:limit], total
+
+
+def _as_id(doc_id) -> int | None:
+    try:
+        return int(doc_id)
+    except (TypeError, ValueError):
+        return None
+
+
+def get_docs(ids) -> list:
+    """Vollständige Dokumente zu den ids (ohne Query-Parsing), fehlende werden übersprungen."""
+    result = _remote("get_docs", list(ids))
+    if result is not LOCAL:
+        return [RemoteDoc(doc) for doc in result]
+    snapshot = searchindex.get()
+    id_map = snapshot.id_map
+    addrs = [id_map.get(_as_id(doc_id)) for doc_id in ids]
+    with timing.span("dokumente"):
+        return [snapshot.searcher.doc(addr) for addr in addrs if addr is not None]
+
+
+def get_doc(doc_id):
+    """Lädt ein Dokument über das Feld 'id' und gibt Tantivy-Doc oder None zurück."""
+    docs = get_docs([doc_id])
+    return docs[0] if docs else None
+
+
+def ids_for_steam(steam_ids) -> list[int]:
+    """ids der Spiele zu Steam-IDs in dieser Reihenfolge, unbekannte fallen weg.
+
+    Links und Editor's picks verweisen über die Steam-ID auf ein Spiel: die ids sind nur die
+    Positionen im Index und ändern sich mit jedem vollen Neuaufbau.
+    """
+    result = _remote("ids_for_steam", list(steam_ids))
+    if result is not LOCAL:
+        return result
+    snapshot = searchindex.get()
+    searcher, schema = snapshot.searcher, snapshot.index.schema
+    ids = []
+    for steam_id in map(_as_id, steam_ids):
+        if steam_id is None:
+            continue
+        hits = searcher.search(Query.term_query(schema, "steamId", steam_id), 1, count=False).hits
+        if hits:
+            ids.append(searcher.doc(hits[0][1])["id"][0])
+    return ids
+
+
+def get_game(steam_id):
+    """Dokument zur Steam-ID (Parameter "app" der Detailseite) oder None."""
+    ids = ids_for_steam([steam_id])
+    return get_doc(ids[0]) if ids else None
+
+
+def get_cards(ids) -> list[dict]:
+    """Karten-Daten zu den ids in dieser Reihenfolge, direkt aus der beim Indizieren gebauten Karten-Datei."""
+    result = _remote("get_cards", list(ids))
+    if result is not LOCAL:
+        return result
+    snapshot = searchindex.get()
+    ids = [i for i in map(_as_id, ids) if i is not None]
+    if len(snapshot.cards):
+        with timing.span("karten_laden"):
+            return snapshot.cards.get_many(ids)
+    return [card_from_doc(doc) for doc in get_docs(ids)]
+
+
+def _ranked_ids(snapshot, q: str, genres, modus) -> list[int]:
+    """Nach Ähnlichkeit sortierte ids aller Titel zu `q`, eingeschränkt auf die gewählten Genres."""
+    with timing.span("titelsuche"):
+        ids = snapshot.titles.search(q)
+    if genres or modus:
+        ids = filter_ids(snapshot.facets.filter(genres + modus), ids)
+    return ids
+
+
+def _text_bits(snapshot, q: str) -> int:
+    if len(snapshot.cards):
+        with timing.span("titelsuche"):
+            return bits_from_ids(snapshot.titles.search(q))
+    return snapshot.facets.matching_bits(title_query(snapshot.index.schema, q))
+
+
+def facet_counts(q: str, genres=(), modus=(), options=(), years=None, fulltext: bool = False) -> dict[str, int]:
+    """Trefferzahl der aktuellen Anfrage, wenn zusätzlich jeweils eine der `options` gewählt wird."""
+    years = _years(years)
+    result = _remote("facet_counts", q, list(genres), list(modus), list(options), years, fulltext)
+    if result is not LOCAL:
+        return result
+    snapshot = searchindex.get()
+    q, genres, modus = normalize(q, genres, modus)
+    base = snapshot.facets.filter(genres + modus)
+    if years:
+        base &= _year_bits(snapshot, years)
+    if q and fulltext:
+        base &= _fulltext_bits(snapshot, q)
+    elif q:
+        base &= cache.get(("bits", q), snapshot.generation, lambda: _text_bits(snapshot, q))
+    return snapshot.facets.counts(base, options)
+
+
+def similar_cards(doc_id, n: int = SIMILAR) -> list[dict]:
+    """Karten der `n` ähnlichsten Spiele (similar.py), gelöschte Spiele werden übersprungen."""
+    result = _remote("similar_cards", doc_id, n)
+    if result is not LOCAL:
+        return result
+    doc_id = _as_id(doc_id)
+    if doc_id is None:
+        return []
+    return get_cards(searchindex.get().similar.get(doc_id))[:n]
+
+
+def suggest(prefix: str, n: int = 8) -> list[dict]:
+    """Die beliebtesten Titel zu einem angefangenen Suchtext (leer, wenn der Index keine Karten-Datei hat)."""
+    result = _remote("suggest", prefix, n)
+    if result is not LOCAL:
+        return result
+    snapshot = searchindex.get()
+    if not len(snapshot.cards):
+        return []
+    return snapshot.suggestions.suggest(prefix, n)
+
+
+def release_years() -> tuple[int, int] | None:
+    """Frühestes und spätestes Erscheinungsjahr im Index (für den Jahresfilter)."""
+    global _release_years
+    if client is not None and client.available:
+        # Ändert sich nur mit der Generation: nur nach einer neuen Generation beim Dienst nachfragen
+        if _release_years[0] == client.generation:
+            return _release_years[1]
+        years = _remote("release_years")
+        if years is not LOCAL:
+            _release_years = client.generation, tuple(years) if years else None
+            return _release_years[1]
+    return searchindex.get().release.bounds
+
+
+def generation() -> int:
+    """Aktuelle Index-Generation (beim Such-Dienst: die der letzten Antwort)."""
+    if client is not None and client.available:
+        return client.generation
+    return searchindex.get().generation
+
+
+def batch(calls: list[tuple[str, tuple]]) -> list:
+    """Mehrere Aufrufe dieses Moduls (Name, Argumente) mit einem Rundgang zum Such-Dienst, sonst nacheinander."""
+    if client is not None and client.available:
+        try:
+            return client.batch(calls)
+        except OSError:
+            pass
+    return [BATCH_CALLS[name](*args) for name, args in calls]
+
+
+# Aufrufe, die `batch` bündeln kann (der Such-Dienst bietet dieselben an, siehe searchd._calls)
+BATCH_CALLS = {
+    "search_page": search_page,
+    "search_cards": search_cards,
+    "facet_counts": facet_counts,
+    "get_cards": get_cards,
+    "ids_for_steam": ids_for_steam,
+    "similar_cards": similar_cards,
+}
@@ -0,0 +1,251 @@
+"""
+Gemeinsamer Such-Dienst für mehrere Streamlit-Prozesse auf einem Rechner.
+
+Ohne den Dienst öffnet jeder Server-Prozess den Index selbst (searchindex.py) und hält eigene
+Searcher, id-Tabelle, Bitsets, Titel-Wörterbuch und Caches. Mit dem Dienst gibt es all das nur
+einmal: searchd.py öffnet den Index, lädt neue Stände nach und beantwortet die Aufrufe von
+search.py (search_page, search_cards, facet_counts, get_docs, get_cards, ids_for_steam, similar_cards,
+suggest, release_years) über einen lokalen Socket. Die Seiten bleiben unverändert, search.py leitet die
+Aufrufe weiter, sobald die Umgebungsvariable SEARCHD gesetzt ist:
+
+    python searchd.py --socket searchd.sock
+    SEARCHD=searchd.sock streamlit run web.py
+
+Protokoll: jede Nachricht ist ein 4-Byte-Längenfeld (big endian) und JSON. Eine Anfrage enthält
+eine Liste von Aufrufen ({"calls": [[name, args], ...]}), die Antwort die Ergebnisse in derselben
+Reihenfolge und die Index-Generation. Mehrere Aufrufe können so in einer Anfrage gebündelt werden
+(search.batch, pages/home.py schickt Zähler und Ergebnisse eines Reruns zusammen); gleiche Aufrufe,
+die gerade von anderen Verbindungen berechnet werden, werden nur einmal gerechnet.
+
+Antwortet der Dienst nicht innerhalb von TIMEOUT Sekunden (oder ist er nicht erreichbar), gilt er
+für DOWN Sekunden als ausgefallen und search.py sucht so lange im eigenen Prozess.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import queue
+import socket
+import struct
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+SOCKET_PATH = "searchd.sock"
+WORKER = 4              # Threads, in denen die Aufrufe laufen
+POOL_SIZE = 8           # offene Verbindungen pro Client (ein Streamlit-Prozess)
+TIMEOUT = 5.0           # Sekunden für Verbindungsaufbau und jede Antwort
+DOWN = 30.0             # so lange nach einem Ausfall nicht mehr beim Dienst anfragen
+HEADER = struct.Struct(">I")
+
+
+class SearchError(RuntimeError):
+    """Fehler, den der Such-Dienst bei einem Aufruf gemeldet hat."""
+
+
+class RemoteDoc(dict):
+    """Dokument aus dem Such-Dienst; verhält sich beim Lesen wie ein Tantivy-Doc (fehlende Felder: [])."""
+
+    def __missing__(self, key):
+        return []
+
+
+def parse_address(address: str) -> tuple[int, str | tuple[str, int]]:
+    """"host:port" für TCP, sonst ein Pfad für einen Unix-Socket."""
+    host, sep, port = address.rpartition(":")
+    if sep and port.isdigit() and "/" not in address:
+        return socket.AF_INET, (host or "127.0.0.1", int(port))
+    return socket.AF_UNIX, address
+
+
+def encode(message) -> bytes:
+    body = json.dumps(message, ensure_ascii=False).encode("UTF-8")
+    return HEADER.pack(len(body)) + body
+
+
+# Client (in den Streamlit-Prozessen)
+
+class SearchClient:
+    """Verbindungs-Pool zum Such-Dienst, von allen Sessions (Threads) eines Prozesses geteilt."""
+
+    def __init__(self, address: str, pool_size: int = POOL_SIZE, timeout: float = TIMEOUT):
+        self.family, self.address = parse_address(address)
+        self.pool: queue.LifoQueue[socket.socket] = queue.LifoQueue(maxsize=pool_size)
+        self.timeout = timeout
+        self.generation = 0
+        self.down_until = 0.0
+
+    @property
+    def available(self) -> bool:
+        """False, solange der Dienst nach einem Ausfall gemieden wird."""
+        return time.monotonic() >= self.down_until
+
+    def _connect(self) -> socket.socket:
+        sock = socket.socket(self.family, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        sock.connect(self.address)
+        if self.family == socket.AF_INET:
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        return sock
+
+    @contextmanager
+    def _connection(self):
+        try:
+            sock = self.pool.get_nowait()
+        except queue.Empty:
+            sock = self._connect()
+        try:
+            yield sock
+        except BaseException:
+            sock.close()
+            raise
+        try:
+            self.pool.put_nowait(sock)
+        except queue.Full:
+            sock.close()
+
+    @staticmethod
+    def _recv_exactly(sock: socket.socket, n: int) -> bytes:
+        buf = bytearray()
+        while len(buf) < n:
+            chunk = sock.recv(n - len(buf))
+            if not chunk:
+                raise ConnectionError("Such-Dienst hat die Verbindung geschlossen.")
+            buf += chunk
+        return bytes(buf)
+
+    def _request(self, calls: list) -> list:
+        request = encode({"calls": calls})
+        for attempt in range(2):
+            try:
+                with self._connection() as sock:
+                    sock.sendall(request)
+                    (length,) = HEADER.unpack(self._recv_exactly(sock, HEADER.size))
+                    response = json.loads(self._recv_exactly(sock, length))
+                break
+            except (ConnectionError, OSError) as e:
+                # Verbindung aus dem Pool ist tot (z. B. Dienst neu gestartet): einmal neu verbinden.
+                # Eine Zeitüberschreitung wird nicht wiederholt, der Dienst hängt.
+                if attempt or isinstance(e, TimeoutError):
+                    self.down_until = time.monotonic() + DOWN
+                    raise
+        self.generation = response["generation"]
+        return response["results"]
+
+    def batch(self, calls: list[tuple[str, list]]) -> list:
+        """Mehrere Aufrufe in einer Anfrage, Ergebnisse in derselben Reihenfolge."""
+        results = []
+        for ok, value in self._request([[name, list(args)] for name, args in calls]):
+            if not ok:
+                raise SearchError(value)
+            results.append(value)
+        return results
+
+    def call(self, name: str, *args):
+        return self.batch([(name, args)])[0]
+
+
+# Dienst
+
+def _calls() -> dict:
+    """Die Aufrufe, die der Dienst anbietet (Ergebnisse müssen als JSON übertragbar sein)."""
+    import search
+
+    return {
+        "search_page": search.search_page,
+        "search_cards": search.search_cards,
+        "facet_counts": search.facet_counts,
+        "get_docs": lambda ids: [doc.to_dict() for doc in search.get_docs(ids)],
+        "get_cards": search.get_cards,
+        "ids_for_steam": search.ids_for_steam,
+        "similar_cards": search.similar_cards,
+        "suggest": search.suggest,
+        "release_years": search.release_years,
+        "generation": lambda: None,
+        "cache_stats": search.cache.stats,
+    }
+
+
+class SearchDaemon:
+    def __init__(self, index_path: str, worker: int = WORKER):
+        import search
+        import searchindex
+
+        self.search = search
+        self.searchindex = searchindex
+        self.index_path = index_path
+        self.calls = _calls()
+        self.executor = ThreadPoolExecutor(worker, thread_name_prefix="searchd")
+        self.inflight: dict[str, asyncio.Future] = {}
+
+    def _run(self, name: str, args: list) -> tuple:
+        """Führt einen Aufruf aus (in einem Worker-Thread) und merkt sich die Generation des Ergebnisses."""
+        return self.calls[name](*args), self.search.generation()
+
+    async def call(self, name: str, args: list) -> tuple[list, int]:
+        """Ein Aufruf als [ok, Ergebnis oder Fehlermeldung] und Generation; gleiche laufende Aufrufe werden geteilt."""
+        if name not in self.calls:
+            return [False, f"unbekannter Aufruf: {name}"], 0
+        key = json.dumps([name, args])
+        future = self.inflight.get(key)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            future = self.inflight[key] = asyncio.ensure_future(loop.run_in_executor(self.executor, self._run, name, args))
+            future.add_done_callback(lambda _: self.inflight.pop(key, None))
+        try:
+            value, generation = await asyncio.shield(future)
+            return [True, value], generation
+        except Exception as e:
+            return [False, f"{type(e).__name__}: {e}"], 0
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                (length,) = HEADER.unpack(await reader.readexactly(HEADER.size))
+                request = json.loads(await reader.readexactly(length))
+                answers = await asyncio.gather(*(self.call(name, args) for name, args in request["calls"]))
+                generation = max((g for _, g in answers), default=0)
+                writer.write(encode({"generation": generation, "results": [result for result, _ in answers]}))
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, address: str):
+        # Index vor der ersten Anfrage öffnen
+        await asyncio.get_running_loop().run_in_executor(self.executor, self.searchindex.get, self.index_path)
+        family, addr = parse_address(address)
+        if family == socket.AF_UNIX:
+            if os.path.exists(addr):
+                os.remove(addr)
+            server = await asyncio.start_unix_server(self.handle, addr)
+        else:
+            server = await asyncio.start_server(self.handle, *addr)
+        print(f"Such-Dienst für {self.index_path} unter {address}")
+        async with server:
+            await server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Gemeinsamer Such-Dienst für alle Streamlit-Prozesse eines Rechners.")
+    parser.add_argument("--socket", default=SOCKET_PATH, help="Pfad eines Unix-Sockets oder host:port")
+    parser.add_argument("--index", default=None, help="Index-Ordner (Standard: INDEX_PATH bzw. neu)")
+    parser.add_argument("--worker", type=int, default=WORKER, help="Threads für die Aufrufe")
+    args = parser.parse_args()
+
+    # Der Dienst selbst sucht immer im eigenen Prozess
+    os.environ.pop("SEARCHD", None)
+    import searchindex
+
+    if args.index:
+        searchindex.INDEX_PATH = args.index
+    try:
+        asyncio.run(SearchDaemon(searchindex.INDEX_PATH, args.worker).serve(args.socket))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+"""
+Gemeinsamer Tantivy-Index für alle Sessions eines Server-Prozesses.
+
+Streamlit führt die Seiten bei jedem Rerun neu aus, Module wie dieses werden aber nur einmal pro
+Prozess importiert. Index und Searcher werden deshalb hier einmal geöffnet und von allen Sessions
+geteilt. Bei jedem Zugriff wird (höchstens alle RELOAD_CHECK Sekunden) geprüft, ob sich meta.json
+oder die Offset-Tabelle der Karten geändert hat, d. h. ob indexing.py einen neuen Stand committet
+bzw. danach die Karten dazu veröffentlicht hat. Dann wird ein neuer Searcher
+geladen und als neuer Snapshot mit höherer Generation atomar ausgetauscht. Laufende Reruns arbeiten
+mit ihrem alten Snapshot zu Ende.
+
+Aus dem Index abgeleitete Strukturen (Caches, Lookup-Tabellen, ...) hängen am Snapshot
+(`Snapshot.derived`) und werden so automatisch mit jedem neuen Stand neu aufgebaut.
+"""
+
+import os
+import threading
+import time
+from typing import Any, Callable
+
+from tantivy import DocAddress, Index, Query
+
+import timing
+from cardstore import OFFSETS_FILE, CardStore
+from indexing import register_tokenizers
+from facets import FacetBitsets
+from releasedate import ReleaseOrder
+from similar import SimilarGames
+from suggest import PrefixIndex, build_prefix_index
+from titlesearch import TitleDictionary, build_title_dictionary
+
+INDEX_PATH = os.environ.get("INDEX_PATH", "neu")     # z. B. ein synthetischer Index für Lasttests
+RELOAD_CHECK = 1.0      # Sekunden zwischen zwei Blicken auf meta.json
+
+
+class Snapshot:
+    """Ein fester Stand des Index: Index, Searcher und Generation."""
+
+    def __init__(self, index: Index, generation: int, path: str = INDEX_PATH):
+        self.index = index
+        self.path = path
+        self.searcher = index.searcher()
+        self.generation = generation
+        self._derived: dict[str, Any] = {}
+        self._lock = threading.RLock()      # abgeleitete Strukturen dürfen aufeinander aufbauen
+
+    def derived(self, name: str, build: Callable[["Snapshot"], Any]) -> Any:
+        """Liefert eine aus diesem Stand abgeleitete Struktur, die nur einmal pro Generation gebaut wird."""
+        value = self._derived.get(name)
+        if value is None:
+            with self._lock:
+                value = self._derived.get(name)
+                if value is None:
+                    with timing.span(f"aufbau_{name}"):
+                        value = build(self)
+                    self._derived[name] = value
+        return value
+
+    @property
+    def id_map(self) -> dict[int, DocAddress]:
+        """Feld "id" -> DocAddress aller Dokumente, einmal pro Generation aufgebaut."""
+        return self.derived("id_map", build_id_map)
+
+    @property
+    def facets(self) -> FacetBitsets:
+        """Genre-Bitsets über das Feld "id" für schnelle Filter und Pill-Zähler."""
+        return self.derived("facets", FacetBitsets)
+
+    @property
+    def titles(self) -> TitleDictionary:
+        """Titel-Wörterbuch mit Trigramm-Postings für die fehlertolerante Titelsuche."""
+        return self.derived("titles", build_title_dictionary)
+
+    @property
+    def suggestions(self) -> PrefixIndex:
+        """Sortiertes Präfix-Array der Titel für Vorschläge beim Tippen."""
+        return self.derived("suggestions", build_prefix_index)
+
+    @property
+    def release(self) -> ReleaseOrder:
+        """Reihenfolge nach Erscheinungsdatum und Bitsets pro Jahr (leer ohne Fast-Field "release_day")."""
+        return self.derived("release", ReleaseOrder)
+
+    @property
+    def similar(self) -> SimilarGames:
+        """Vorab berechnete ähnliche Spiele nach Feld "id" (leer, solange similar.py nicht gelaufen ist)."""
+        return self.derived("similar", lambda s: SimilarGames(s.path))
+
+    @property
+    def cards(self) -> CardStore:
+        """Kompakte Karten-Daten (Titel, Bild, Kurzbeschreibung, Genres) nach Feld "id"."""
+        return self.derived("cards", lambda s: CardStore(s.path))
+
+
+def build_id_map(snapshot: Snapshot) -> dict[int, DocAddress]:
+    searcher = snapshot.searcher
+    if searcher.num_docs == 0:
+        return {}
+    addrs = [addr for _, addr in searcher.search(Query.all_query(), searcher.num_docs, count=False).hits]
+    try:
+        ids = searcher.fast_field_values("id", addrs)
+    except ValueError:
+        ids = [None] * len(addrs)
+    if None in ids:
+        # Index noch ohne Fast-Field "id": einmalig über die gespeicherten Dokumente
+        ids = [searcher.doc(addr)["id"][0] for addr in addrs]
+    return dict(zip(ids, addrs))
+
+
+class SharedIndex:
+    """Hält den aktuellen Snapshot eines Index-Ordners und tauscht ihn nach einem Commit aus."""
+
+    def __init__(self, path: str = INDEX_PATH):
+        self.path = path
+        self.meta_path = os.path.join(path, "meta.json")
+        self.offsets_path = os.path.join(path, OFFSETS_FILE)
+        self.lock = threading.Lock()
+        with timing.span("index_oeffnen"):
+            self.index = register_tokenizers(Index.open(path))
+        self.stamp = self._stamp()
+        self.snapshot = Snapshot(self.index, 1, path)
+        self.checked = time.monotonic()
+
+    def _stamp(self):
+        try:
+            st = os.stat(self.meta_path)
+        except FileNotFoundError:
+            return None
+        try:
+            cards = os.stat(self.offsets_path)
+        except FileNotFoundError:
+            return st.st_mtime_ns, st.st_size
+        return st.st_mtime_ns, st.st_size, cards.st_mtime_ns, cards.st_size
+
+    def current(self) -> Snapshot:
+        """Aktueller Snapshot. Nach einem neuen Commit wird vorher ein frischer Searcher geladen."""
+        now = time.monotonic()
+        if now - self.checked < RELOAD_CHECK:
+            return self.snapshot
+
+        with self.lock:
+            if now - self.checked < RELOAD_CHECK:
+                return self.snapshot
+            self.checked = now
+            stamp = self._stamp()
+            if stamp is not None and stamp != self.stamp:
+                with timing.span("index_neu_laden"):
+                    self._reload(stamp)
+            return self.snapshot
+
+    def _reload(self, stamp):
+        try:
+            self.index.reload()
+            snapshot = Snapshot(self.index, self.snapshot.generation + 1, self.path)
+        except Exception:
+            # Nach --voll ist der Ordner neu angelegt: Index neu öffnen. Klappt auch das nicht
+            # (Index wird gerade geschrieben), beim nächsten Blick noch einmal versuchen.
+            try:
+                index = register_tokenizers(Index.open(self.path))
+                snapshot = Snapshot(index, self.snapshot.generation + 1, self.path)
+            except Exception:
+                return
+            self.index = index
+        self.stamp = stamp
+        self.snapshot = snapshot
+
+
+_shared: dict[str, SharedIndex] = {}
+_shared_lock = threading.Lock()
+
+
+def get(path: str | None = None) -> Snapshot:
+    """Aktueller Snapshot des gemeinsamen Index unter `path` (Standard: INDEX_PATH)."""
+    path = path or INDEX_PATH
+    shared = _shared.get(path)
+    if shared is None:
+        with _shared_lock:
+            shared = _shared.get(path)
+            if shared is None:
+                shared = _shared[path] = SharedIndex(path)
+    return shared.current()
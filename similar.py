@@ -0,0 +1,274 @@
+"""
+"Similar games" für die Detailseite: die nächsten Nachbarn jedes Spiels, offline berechnet.
+
+Jedes Spiel wird zu einem Vektor aus zwei Teilen, dazu kommt der Publisher:
+- Text: TF-IDF über Titel, Kurzbeschreibung und den Anfang der Beschreibung. Das Vokabular (bis zu
+  VOCABULARY Wörter) wird per Zufallsprojektion auf `dim` Dimensionen abgebildet, damit die Matrix
+  für den ganzen Katalog dicht und klein bleibt (N × dim float32, bei 128k Spielen ~100 MB).
+- Genres: normierter Indikator-Vektor über alle Genres.
+- Publisher: derselbe (erste) Publisher gibt einen festen Bonus. Verglichen werden Publisher-Nummern,
+  nicht Dimensionen.
+Das Skalarprodukt zweier Spiele ist so die gewichtete Summe der drei Ähnlichkeiten (WEIGHTS).
+
+Gesucht wird blockweise: ROW_BATCH Spiele gegen alle als ein Matrixprodukt, pro Zeile bleiben nur
+die besten k (`top_k`). Der Speicher hängt damit von ROW_BATCH × N ab, nicht von N².
+
+Ergebnis ist similar.npy im Index-Ordner: eine int32-Matrix (größte id + 1) × k, Zeile = Feld "id",
+-1 = kein Nachbar. Die Detailseite liest die Datei per mmap, ein Spiel kostet einen Zeilen-Lookup.
+Nach indexing.py bzw. indexpflege.py aufrufen; laufende Streamlit-Prozesse laden die neue Datei nach.
+Bis zum nächsten Lauf haben neu indizierte Spiele keine Nachbarn, gelöschte Nachbarn werden beim
+Laden der Karten übersprungen.
+
+Aufruf:
+    python similar.py
+    python similar.py --index neu --k 12 --dim 256
+"""
+
+import argparse
+import os
+import re
+import time
+from array import array
+
+import numpy as np
+from tantivy import Index, Query
+from tqdm.auto import tqdm
+
+from indexing import INDEX_PATH, register_tokenizers
+
+SIMILAR_FILE = "similar.npy"
+K = 12                  # gespeicherte Nachbarn pro Spiel
+DIM = 192               # Dimensionen des projizierten Textvektors
+VOCABULARY = 50_000     # höchstens so viele Wörter (die häufigsten, ohne Allerweltswörter)
+MAX_DF = 0.3            # Wörter in mehr als diesem Anteil der Spiele zählen nicht
+DESCRIPTION_CHARS = 2000
+ROW_BATCH = 256         # Spiele pro Matrixprodukt gegen den ganzen Katalog
+CHUNK = 64              # Spalten pro Abschnitt bei der Suche nach den besten k
+MIN_SCORE = 0.05        # schwächere Nachbarn werden nicht gespeichert
+WEIGHTS = {"text": 0.6, "genres": 0.3, "publisher": 0.1}
+SEED = 42
+RELOAD_CHECK = 1.0      # Sekunden zwischen zwei Blicken auf similar.npy
+
+TAG = re.compile(r"<[^>]*>|&\w+;")
+WORD = re.compile(r"[a-z][a-z0-9]{2,}")
+STOPWORDS = frozenset("""
+the and for with you your are this that from have has will can all its into our not but one more
+their they them who what when which while where out new also over than then there these those
+""".split())
+
+
+def words(doc: dict) -> list[str]:
+    """Die Wörter aus Titel, Kurzbeschreibung und dem Anfang der Beschreibung (ohne HTML)."""
+    description = (doc.get("description") or [""])[0][:DESCRIPTION_CHARS]
+    text = " ".join([*doc.get("title", []), *doc.get("description_short", []), description])
+    return [w for w in WORD.findall(TAG.sub(" ", text).lower()) if w not in STOPWORDS]
+
+
+class Catalog:
+    """Die Merkmale aller Spiele für die Vektoren, in einem Durchgang über die gespeicherten Dokumente."""
+
+    def __init__(self, index_path: str, quiet: bool = False):
+        index = register_tokenizers(Index.open(index_path))
+        searcher = index.searcher()
+        addrs = [addr for _, addr in searcher.search(Query.all_query(), max(searcher.num_docs, 1), count=False).hits]
+
+        self.ids = np.zeros(len(addrs), dtype=np.int64)
+        self.publisher = np.full(len(addrs), -1, dtype=np.int32)
+        self.genres: list[list[int]] = []
+        # Wörter als CSR-Struktur (Zeile = Spiel): Wort-Nummern und Anzahl
+        self.indptr = array("q", [0])
+        self.terms = array("i")
+        self.counts = array("f")
+        self.vocabulary: dict[str, int] = {}
+        self.df = array("i")
+        genre_numbers: dict[str, int] = {}
+        publisher_numbers: dict[str, int] = {}
+
+        for row, addr in enumerate(tqdm(addrs, desc="Lese Spiele", unit=" Spiele", disable=quiet)):
+            doc = searcher.doc(addr).to_dict()
+            self.ids[row] = doc["id"][0]
+            if doc.get("publisher"):
+                self.publisher[row] = publisher_numbers.setdefault(doc["publisher"][0], len(publisher_numbers))
+            self.genres.append([genre_numbers.setdefault(g, len(genre_numbers)) for g in doc.get("genres", [])])
+
+            counts: dict[int, int] = {}
+            for word in words(doc):
+                term = self.vocabulary.get(word)
+                if term is None:
+                    term = self.vocabulary[word] = len(self.df)
+                    self.df.append(0)
+                counts[term] = counts.get(term, 0) + 1
+            for term, count in counts.items():
+                self.df[term] += 1
+                self.terms.append(term)
+                self.counts.append(count)
+            self.indptr.append(len(self.terms))
+        self.num_genres = len(genre_numbers)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def text_vectors(self, dim: int, seed: int = SEED) -> np.ndarray:
+        """TF-IDF pro Spiel, normiert und auf `dim` Dimensionen projiziert (Zeilen normiert, leer = 0)."""
+        n = len(self)
+        df = np.frombuffer(self.df, dtype=np.int32)
+        usable = np.flatnonzero((df >= 2) & (df <= MAX_DF * n))
+        usable = usable[np.argsort(-df[usable], kind="stable")[:VOCABULARY]]
+        column = np.full(len(df), -1, dtype=np.int32)
+        column[usable] = np.arange(len(usable))
+        idf = np.log(n / df[usable]).astype(np.float32)
+        projection = (np.random.default_rng(seed).standard_normal((len(usable), dim)) / np.sqrt(dim)).astype(np.float32)
+
+        indptr = np.frombuffer(self.indptr, dtype=np.int64)
+        terms = column[np.frombuffer(self.terms, dtype=np.int32)]
+        weights = 1 + np.log(np.frombuffer(self.counts, dtype=np.float32))
+        vectors = np.zeros((n, dim), dtype=np.float32)
+        for row in range(n):
+            start, end = indptr[row], indptr[row + 1]
+            keep = terms[start:end] >= 0
+            cols = terms[start:end][keep]
+            if len(cols):
+                vectors[row] = (weights[start:end][keep] * idf[cols]) @ projection[cols]
+        return normalized(vectors)
+
+    def genre_vectors(self) -> np.ndarray:
+        vectors = np.zeros((len(self), self.num_genres), dtype=np.float32)
+        for row, genres in enumerate(self.genres):
+            vectors[row, genres] = 1
+        return normalized(vectors)
+
+
+def normalized(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return np.divide(vectors, norms, out=np.zeros_like(vectors), where=norms > 0)
+
+
+def top_k(block: np.ndarray, k: int) -> tuple[np.ndarray, np.ndarray]:
+    """Spalten und Werte der k größten Werte jeder Zeile, absteigend.
+
+    Statt jede Zeile ganz zu partitionieren, werden erst die k Abschnitte (CHUNK Spalten) mit dem
+    größten Maximum gesucht: die k größten Werte liegen immer in diesen Abschnitten.
+    """
+    rows, cols = block.shape
+    if cols % CHUNK or cols // CHUNK <= k:
+        best = np.argpartition(block, -k, axis=1)[:, -k:]
+    else:
+        chunks = block.reshape(rows, -1, CHUNK)
+        best_chunks = np.argpartition(chunks.max(axis=2), -k, axis=1)[:, -k:]
+        candidates = np.take_along_axis(chunks, best_chunks[:, :, None], axis=1).reshape(rows, -1)
+        columns = (best_chunks[:, :, None] * CHUNK + np.arange(CHUNK)).reshape(rows, -1)
+        best = np.take_along_axis(columns, np.argpartition(candidates, -k, axis=1)[:, -k:], axis=1)
+    scores = np.take_along_axis(block, best, axis=1)
+    order = np.argsort(-scores, axis=1, kind="stable")
+    return np.take_along_axis(best, order, axis=1), np.take_along_axis(scores, order, axis=1)
+
+
+def nearest(vectors: np.ndarray, publisher: np.ndarray, k: int, bonus: float,
+            row_batch: int = ROW_BATCH, quiet: bool = False) -> tuple[np.ndarray, np.ndarray]:
+    """Die k besten Nachbarn jeder Zeile (Zeilennummern, absteigend) und ihre Werte, blockweise berechnet.
+
+    Die Zeilen müssen nach `publisher` sortiert sein: die Spiele desselben Publishers sind dann ein
+    zusammenhängender Bereich, der Bonus ist ein Slice pro Zeile statt eines Vergleichs mit allen.
+    """
+    n = len(vectors)
+    k = min(k, n - 1)
+    neighbours = np.zeros((n, k), dtype=np.int64)
+    scores = np.zeros((n, k), dtype=np.float32)
+    if k <= 0:
+        return neighbours, scores
+    group_start = np.searchsorted(publisher, publisher, side="left")
+    group_end = np.searchsorted(publisher, publisher, side="right")
+    # Spalten auf ein Vielfaches von CHUNK auffüllen (Nullzeilen, deren Werte auf -inf gesetzt werden)
+    columns = np.zeros((-(-n // CHUNK) * CHUNK, vectors.shape[1]), dtype=np.float32)
+    columns[:n] = vectors
+    for start in tqdm(range(0, n, row_batch), desc="Suche Nachbarn", unit=" Blöcke", disable=quiet):
+        rows = np.arange(start, min(start + row_batch, n))
+        block = vectors[rows] @ columns.T
+        block[:, n:] = -np.inf
+        for i, row in enumerate(rows):
+            if publisher[row] >= 0:
+                block[i, group_start[row]:group_end[row]] += bonus
+        block[np.arange(len(rows)), rows] = -np.inf       # das Spiel selbst
+        neighbours[rows], scores[rows] = top_k(block, k)
+    return neighbours, scores
+
+
+def build(index_path: str = INDEX_PATH, k: int = K, dim: int = DIM,
+          row_batch: int = ROW_BATCH, quiet: bool = False) -> dict:
+    """Berechnet die Nachbarn aller Spiele und schreibt similar.npy (atomar) in den Index-Ordner."""
+    stats = {}
+    start = time.perf_counter()
+    catalog = Catalog(index_path, quiet)
+    stats["lesen_s"] = round(time.perf_counter() - start, 2)
+
+    start = time.perf_counter()
+    vectors = np.hstack([WEIGHTS["text"] ** 0.5 * catalog.text_vectors(dim),
+                         WEIGHTS["genres"] ** 0.5 * catalog.genre_vectors()])
+    order = np.argsort(catalog.publisher, kind="stable")
+    ids, publisher, vectors = catalog.ids[order], catalog.publisher[order], vectors[order]
+    del catalog     # die Wortlisten werden ab hier nicht mehr gebraucht
+    stats["vektoren_s"] = round(time.perf_counter() - start, 2)
+
+    start = time.perf_counter()
+    neighbours, scores = nearest(vectors, publisher, k, WEIGHTS["publisher"], row_batch, quiet)
+    stats["nachbarn_s"] = round(time.perf_counter() - start, 2)
+
+    size = int(ids.max()) + 1 if len(ids) else 0
+    table = np.full((size, k), -1, dtype=np.int32)
+    table[ids, :neighbours.shape[1]] = np.where(scores >= MIN_SCORE, ids[neighbours], -1)
+    path = os.path.join(index_path, SIMILAR_FILE)
+    with open(path + ".tmp", "wb") as f:
+        np.save(f, table)
+    os.replace(path + ".tmp", path)
+
+    stats.update(spiele=len(ids), dimensionen=vectors.shape[1], bytes=os.path.getsize(path))
+    return stats
+
+
+class SimilarGames:
+    """Lesezugriff auf similar.npy (per mmap); eine neu geschriebene Datei wird nachgeladen."""
+
+    def __init__(self, index_path: str):
+        self.path = os.path.join(index_path, SIMILAR_FILE)
+        self.table = np.full((0, K), -1, dtype=np.int32)
+        self.stamp = None
+        self.checked = 0.0
+        self._load()
+
+    def _load(self):
+        try:
+            st = os.stat(self.path)
+            stamp = st.st_mtime_ns, st.st_size
+            if stamp != self.stamp:
+                self.table = np.load(self.path, mmap_mode="r")
+                self.stamp = stamp
+        except (OSError, ValueError):
+            pass        # noch nicht berechnet oder gerade geschrieben: beim nächsten Blick noch einmal
+
+    def get(self, doc_id: int) -> list[int]:
+        """Die ids der ähnlichsten Spiele, bestes zuerst (leer, wenn für das Spiel nichts berechnet ist)."""
+        now = time.monotonic()
+        if now - self.checked >= RELOAD_CHECK:
+            self.checked = now
+            self._load()
+        table = self.table
+        if not 0 <= doc_id < len(table):
+            return []
+        return [int(i) for i in table[doc_id] if i >= 0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Berechnet die ähnlichen Spiele für die Detailseite.")
+    parser.add_argument("--index", default=INDEX_PATH)
+    parser.add_argument("--k", type=int, default=K, help="gespeicherte Nachbarn pro Spiel")
+    parser.add_argument("--dim", type=int, default=DIM, help="Dimensionen des Textvektors")
+    parser.add_argument("--batch", type=int, default=ROW_BATCH, help="Spiele pro Matrixprodukt (Speicher)")
+    parser.add_argument("--quiet", action="store_true", help="keine Fortschrittsanzeige")
+    args = parser.parse_args()
+
+    stats = build(args.index, args.k, args.dim, args.batch, args.quiet)
+    print(", ".join(f"{k}: {v}" for k, v in stats.items()))
+
+
+if __name__ == "__main__":
+    main()
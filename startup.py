@@ -0,0 +1,172 @@
+"""
+Start eines Server-Prozesses: CSS laden, Index öffnen und vorwärmen, Warm-up-Anfragen.
+
+Ohne Vorwärmen bezahlt die erste Session nach einem Deploy das Öffnen des Index, den Aufbau der
+abgeleiteten Strukturen (id-Tabelle, Bitsets, Titel-Wörterbuch, ...), kalte Seiten der
+Index-Dateien und des Docstores. `warm_up` erledigt das einmal pro Prozess, in Phasen mit
+Zeitmessung:
+
+    css             styles.html einmal lesen (web.py bindet es danach aus dem Speicher ein)
+    index_oeffnen   gemeinsamen Index öffnen (searchindex.get)
+    dateien         Termwörterbücher, Fast-Fields und Feldnormen einmal lesen (Page-Cache)
+    id_map, cards, facets, titles, suggestions, release, similar
+                    die pro Generation abgeleiteten Strukturen bauen
+    anfragen        WARMUP_QUERIES wie ein Rerun von home.py (Suche, Pill-Zähler, Dokumente, Karten-HTML)
+
+Mit dem Such-Dienst (SEARCHD) öffnet der Prozess keinen Index, dann laufen nur CSS und Anfragen.
+Die Dauer jeder Phase steht danach in `report`, in der Ausgabe und als Span "start_<phase>"
+in den Histogrammen von timing.py (Debug-Sidebar, Prometheus).
+
+Vorwärmen, bevor der Server Verbindungen annimmt (/_stcore/health meldet erst danach "ok"):
+    python startup.py                           # statt: streamlit run web.py
+    python startup.py --server.port 8502        # weitere Argumente gehen an streamlit run
+    python startup.py --nur-warmup              # nur messen, ohne Server
+
+Wird web.py direkt mit `streamlit run` gestartet, wärmt der erste Rerun (`ensure`) vor.
+Die Anfragen lassen sich über WARMUP einstellen: "witcher;farm|Simulation;|Indie|Multiplayer"
+(Einträge "Suchtext|Genres|Modus", Genres und Modus mit Komma getrennt), WARMUP=0 schaltet sie ab.
+"""
+
+import argparse
+import os
+import sys
+import threading
+import time
+
+import timing
+
+BASE = os.path.dirname(os.path.abspath(__file__))
+CSS_FILE = os.path.join(BASE, "styles.html")
+PRETOUCH = (".term", ".idx", ".fast", ".fieldnorm")      # Dateien, die jede Suche liest
+CHUNK = 1 << 20
+WARMUP_QUERIES = [
+    ("witcher", (), ()),
+    ("farm sim", (), ()),
+    ("", ("Action",), ()),
+    ("", ("Indie",), ("Multiplayer",)),
+    ("dark", ("RPG",), ()),
+]
+GENRE_OPT = ["Action", "Adventure", "Casual", "Indie", "Racing", "RPG", "Simulation", "Strategy"]
+MODUS_OPT = ["Multiplayer", "Free to play"]
+
+report: list[tuple[str, float]] = []        # (Phase, Sekunden) des Starts dieses Prozesses
+_css: str | None = None
+_done = False
+_lock = threading.Lock()
+
+
+def css() -> str:
+    """Inhalt von styles.html, einmal pro Prozess gelesen."""
+    global _css
+    if _css is None:
+        with open(CSS_FILE, "r") as f:
+            _css = f.read()
+    return _css
+
+
+def parse_queries(value: str | None) -> list[tuple[str, tuple, tuple]]:
+    """Warm-up-Anfragen aus der Umgebungsvariablen WARMUP (siehe oben), sonst WARMUP_QUERIES."""
+    if value is None:
+        return WARMUP_QUERIES
+    if value.strip() in ("", "0"):
+        return []
+    queries = []
+    for entry in value.split(";"):
+        q, _, rest = entry.partition("|")
+        genres, _, modus = rest.partition("|")
+        queries.append((q.strip(), tuple(g for g in genres.split(",") if g), tuple(m for m in modus.split(",") if m)))
+    return queries
+
+
+def pretouch(index_path: str) -> int:
+    """Liest die Index-Dateien, die jede Suche braucht, einmal ganz (danach liegen sie im Page-Cache)."""
+    total = 0
+    for name in os.listdir(index_path):
+        if os.path.splitext(name)[1] in PRETOUCH:
+            with open(os.path.join(index_path, name), "rb", buffering=0) as f:
+                while chunk := f.read(CHUNK):
+                    total += len(chunk)
+    return total
+
+
+def run_queries(queries) -> int:
+    """Die Anfragen wie ein Rerun von home.py; gibt die Anzahl der gefundenen Karten zurück."""
+    import render
+    import search
+
+    found = 0
+    for q, genres, modus in queries:
+        cards, _ = search.search_cards(q, genres, modus)
+        search.facet_counts(q, genres, modus, GENRE_OPT + MODUS_OPT)
+        search.get_docs([card["id"] for card in cards[:4]])         # Docstore-Blöcke der Detailseite
+        render.grid_html(cards, q, genres, modus)
+        if q:
+            search.suggest(q[:3])
+        found += len(cards)
+    return found
+
+
+def _phase(name: str, fn):
+    start = time.perf_counter()
+    result = fn()
+    seconds = time.perf_counter() - start
+    report.append((name, seconds))
+    timing.registry.observe(f"start_{name}", seconds)
+    return result
+
+
+def warm_up(queries=None) -> list[tuple[str, float]]:
+    """Führt alle Phasen aus und gibt ihre Dauer zurück (siehe Modul-Doku)."""
+    import search
+    import searchindex
+
+    queries = parse_queries(os.environ.get("WARMUP")) if queries is None else queries
+    _phase("css", css)
+    if search.client is None:
+        snapshot = _phase("index_oeffnen", searchindex.get)
+        _phase("dateien", lambda: pretouch(snapshot.path))
+        for name in ("id_map", "cards", "facets", "titles", "suggestions", "release", "similar"):
+            _phase(name, lambda: getattr(snapshot, name))
+    if queries:
+        _phase("anfragen", lambda: run_queries(queries))
+    return report
+
+
+def ensure():
+    """Einmal pro Prozess vorwärmen; weitere Sessions warten, bis der erste Aufruf fertig ist."""
+    global _done
+    if _done:
+        return
+    with _lock:
+        if not _done:
+            try:
+                warm_up()
+                print(format_report(), flush=True)
+            finally:
+                _done = True
+
+
+def format_report() -> str:
+    total = sum(seconds for _, seconds in report)
+    return "Start: " + ", ".join(f"{name} {seconds * 1000:.1f} ms" for name, seconds in report) + f" (gesamt {total * 1000:.0f} ms)"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Wärmt Index und Caches vor und startet dann web.py mit Streamlit.")
+    parser.add_argument("--nur-warmup", action="store_true", help="nur vorwärmen und die Zeiten ausgeben")
+    args, streamlit_args = parser.parse_known_args()
+
+    os.chdir(BASE)
+    ensure()
+    if args.nur_warmup:
+        return
+    # Derselbe Prozess: Streamlit findet Index, Strukturen und Caches in den schon geladenen Modulen
+    from streamlit.web import cli
+
+    sys.exit(cli.main(["run", "web.py", *streamlit_args], prog_name="streamlit"))
+
+
+if __name__ == "__main__":
+    # web.py importiert "startup": dieselbe Modul-Instanz wie hier, damit nicht zweimal vorgewärmt wird
+    sys.modules.setdefault("startup", sys.modules[__name__])
+    main()
@@ -0,0 +1,72 @@
+"""
+Titelvorschläge beim Tippen über ein sortiertes Präfix-Array.
+
+Pro Index-Generation wird einmal eine sortierte Liste aller bereinigten Titel gebaut, zusätzlich
+ab jedem weiteren Wortanfang ("the witcher 3" ist auch unter "witcher 3" und "3" zu finden).
+Ein Präfix ist dann ein zusammenhängender Bereich, den `bisect` in O(log n) findet. Aus dem
+Bereich werden die beliebtesten Titel (Anzahl Steam-Reviews) genommen; für sehr kurze Präfixe
+(1-2 Zeichen) mit riesigen Bereichen sind die Top-Titel schon beim Aufbau vorberechnet.
+
+Angeboten wird das nur als search.suggest (auch über searchd.py). home.py zeigt keine Vorschläge:
+das Suchfeld meldet seinen Wert erst bei Enter, dann läuft ohnehin schon die volle Suche.
+"""
+
+import heapq
+from bisect import bisect_left, bisect_right
+
+from titlesearch import normalize_title
+
+TOP_N = 8               # Anzahl Vorschläge
+PRECOMPUTED = 2         # Präfixe bis zu dieser Länge werden vorberechnet
+
+
+class PrefixIndex:
+    def __init__(self, cards: list[dict]):
+        entries = []
+        for card in cards:
+            words = normalize_title(card["title"]).split()
+            for start in range(len(words)):
+                entries.append((" ".join(words[start:]), -card.get("recommendations", 0), card["id"], card["title"]))
+        entries.sort()
+
+        self.keys = [e[0] for e in entries]
+        self.entries = [(-e[1], e[2], e[3]) for e in entries]       # (Beliebtheit, id, Titel)
+
+        # Top-Titel für alle kurzen Präfixe vorberechnen
+        self.top: dict[str, list[tuple[int, int, str]]] = {}
+        for length in range(1, PRECOMPUTED + 1):
+            groups: dict[str, list] = {}
+            for key, entry in zip(self.keys, self.entries):
+                if len(key) >= length:
+                    groups.setdefault(key[:length], []).append(entry)
+            for prefix, group in groups.items():
+                self.top[prefix] = self._best(group, TOP_N)
+
+    @staticmethod
+    def _best(entries, n: int) -> list[tuple[int, int, str]]:
+        """Die n beliebtesten Einträge, jede id nur einmal."""
+        best, seen = [], set()
+        for entry in heapq.nlargest(n * 4, entries, key=lambda e: e[0]):
+            if entry[1] not in seen:
+                seen.add(entry[1])
+                best.append(entry)
+                if len(best) == n:
+                    break
+        return best
+
+    def suggest(self, prefix: str, n: int = TOP_N) -> list[dict]:
+        """Die `n` beliebtesten Titel, die (an einem Wortanfang) mit `prefix` beginnen."""
+        prefix = normalize_title(prefix)
+        if not prefix:
+            return []
+        if prefix in self.top and n <= TOP_N:
+            best = self.top[prefix][:n]
+        else:
+            lo = bisect_left(self.keys, prefix)
+            hi = bisect_right(self.keys, prefix + "\uffff", lo)
+            best = self._best(self.entries[lo:hi], n)
+        return [{"id": doc_id, "title": title, "recommendations": popularity} for popularity, doc_id, title in best]
+
+
+def build_prefix_index(snapshot) -> PrefixIndex:
+    return PrefixIndex(snapshot.cards.get_many(snapshot.id_map.keys()))
@@ -0,0 +1,116 @@
+"""
+Gemeinsame Fixtures: ein lokaler HTTP-Server statt Steam (API und Bild-CDN), Rohantworten der API
+und ein kleiner Such-Index (synthetischer Katalog aus bench/catalog.py plus einige bekannte Titel).
+
+Die Module liegen flach im Projektordner, die Tests importieren sie direkt (getjason, thumbnails, ...).
+"""
+
+import json
+import os
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class StubServer:
+    """Antwortet pro Pfad (inkl. Query) der Reihe nach mit den eingetragenen Antworten, die letzte bleibt stehen."""
+
+    def __init__(self):
+        self.routes: dict[str, list[tuple[int, dict, bytes]]] = {}
+        self.requests: list[str] = []
+        self.lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                with stub.lock:
+                    stub.requests.append(self.path)
+                    answers = stub.routes.get(self.path) or [(404, {}, b"")]
+                    status, headers, body = answers.pop(0) if len(answers) > 1 else answers[0]
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+    def route(self, path: str, *answers: tuple[int, dict, bytes]):
+        self.routes[path] = list(answers)
+
+    def hits(self, path: str) -> int:
+        return self.requests.count(path)
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def stub():
+    server = StubServer()
+    yield server
+    server.close()
+
+
+def steam_line(app_id: int, title: str | None = None, success: bool = True, **data) -> str:
+    """Eine Rohantwort wie von der appdetails-API (eine Zeile, wie im RawStore)."""
+    if not success:
+        return json.dumps({str(app_id): {"success": False}})
+    entry = {"steam_appid": app_id, "name": title or f"Game {app_id}", "short_description": "",
+             "detailed_description": "", "genres": [{"id": "1", "description": "Action"}],
+             "header_image": f"https://cdn.example/{app_id}.jpg", **data}
+    return json.dumps({str(app_id): {"success": True, "data": entry}})
+
+
+@pytest.fixture
+def app_line():
+    return steam_line
+
+
+# Bekannte Spiele im Test-Index (Steam-IDs oberhalb des synthetischen Katalogs)
+KNOWN_APPS = {
+    9_000_010: ("The Witcher 3: Wild Hunt", ["RPG", "Action"], "18 May, 2015"),
+    9_000_020: ("Stardew Valley", ["Indie", "RPG", "Simulation"], "26 Feb, 2016"),
+    9_000_030: ("Raft", ["Adventure", "Indie", "Simulation"], "20 Jun, 2022"),
+    9_000_040: ("Sea of Thieves", ["Action", "Adventure"], "3 Jun, 2020"),
+    9_000_050: ("Overcooked! 2", ["Casual", "Indie"], "7 Aug, 2018"),
+}
+CATALOG_SIZE = 400
+
+
+@pytest.fixture(scope="session")
+def search_index(tmp_path_factory):
+    """Index-Ordner mit Karten-Datei; search.py und searchindex.py suchen für die Dauer der Tests darin."""
+    import indexing
+    import search
+    import searchindex
+    from bench.catalog import iter_catalog
+
+    path = tmp_path_factory.mktemp("suche")
+    lines = list(iter_catalog(CATALOG_SIZE))
+    for app_id, (title, genres, date) in KNOWN_APPS.items():
+        lines.append(steam_line(app_id, title, genres=[{"id": "0", "description": g} for g in genres],
+                                release_date={"coming_soon": False, "date": date}))
+    source = path / "data.txt"
+    source.write_text("".join(line + "\n" for line in lines), encoding="UTF-8")
+    index_path = str(path / "index")
+    indexing.run(str(source), index_path, voll=True, worker=1, quiet=True)
+
+    old_path, old_client = searchindex.INDEX_PATH, search.client
+    searchindex.INDEX_PATH, search.client = index_path, None
+    search.cache.clear()
+    yield index_path
+    searchindex.INDEX_PATH, search.client = old_path, old_client
+    search.cache.clear()
@@ -0,0 +1,82 @@
+import os
+import struct
+
+import cardstore
+import searchindex
+from cardstore import CARDS_FILE, OFFSETS_FILE, CardStore, CardWriter, card_usage, compact_cards
+
+
+def card(doc_id: int, title: str) -> dict:
+    return {"id": doc_id, "steamId": 1000 + doc_id, "title": title, "image": "", "description_short": "",
+            "genres": ["Indie"], "recommendations": 0}
+
+
+def write(index_path, cards, deleted=()):
+    writer = CardWriter(str(index_path))
+    for c in cards:
+        writer.put(c)
+    for doc_id in deleted:
+        writer.delete(doc_id)
+    writer.close()
+
+
+def test_put_delete_and_get(tmp_path):
+    write(tmp_path, [card(0, "Raft"), card(2, "Stardew Valley")])
+    write(tmp_path, [card(2, "Stardew Valley 2")], deleted=[0])
+
+    store = CardStore(str(tmp_path))
+    assert len(store) == 3
+    assert store.get(0) is None and store.get(1) is None and store.get(3) is None
+    assert store.get(2)["title"] == "Stardew Valley 2"
+    assert [c["id"] for c in store.get_many([2, 1, 0, 2])] == [2, 2]
+
+
+def test_compact_keeps_live_cards_only(tmp_path, monkeypatch):
+    monkeypatch.setattr(cardstore, "COMPACT_MIN", 10**9)        # kein automatisches Aufräumen
+    write(tmp_path, [card(i, f"Spiel {i}") for i in range(10)])
+    write(tmp_path, [card(i, f"Neu {i}") for i in range(5)], deleted=[9])
+    total, live = card_usage(str(tmp_path))
+    assert live < total
+
+    before, after = compact_cards(str(tmp_path))
+
+    assert (before, after) == (total, live)
+    assert os.path.getsize(tmp_path / CARDS_FILE) == live
+    assert card_usage(str(tmp_path)) == (live, live)
+    store = CardStore(str(tmp_path))
+    assert [c["title"] for c in store.get_many(range(10))] == [f"Neu {i}" for i in range(5)] + [f"Spiel {i}" for i in range(5, 9)]
+    assert not [name for name in os.listdir(tmp_path) if name.endswith(".tmp")]
+
+
+def test_writer_compacts_when_dead_share_is_high(tmp_path, monkeypatch):
+    monkeypatch.setattr(cardstore, "COMPACT_MIN", 0)
+    write(tmp_path, [card(0, "Raft")])
+    for i in range(3):
+        write(tmp_path, [card(0, f"Raft {i}")])
+    total, live = card_usage(str(tmp_path))
+    assert total <= 2 * live             # höchstens halb tot, ohne Aufräumen wären es 4 Kopien
+    assert CardStore(str(tmp_path)).get(0)["title"] == "Raft 2"
+
+
+def test_get_rejects_cards_of_another_id(tmp_path):
+    write(tmp_path, [card(0, "Raft"), card(1, "Stardew Valley")])
+    # Offsets aus einem anderen Stand: id 1 zeigt auf die Karte von id 0, id 0 mitten in eine Zeile
+    offsets = (tmp_path / OFFSETS_FILE).read_bytes()
+    (tmp_path / OFFSETS_FILE).write_bytes(struct.pack("=qq", 3, 0) + offsets[16:])
+
+    store = CardStore(str(tmp_path))
+    assert store.get(0) is None         # kein gültiges JSON
+    assert store.get(1) is None         # Karte einer anderen id
+    assert store.get_many([0, 1]) == []
+
+
+def test_readers_reload_after_cards_are_published(search_index, monkeypatch):
+    monkeypatch.setattr(searchindex, "RELOAD_CHECK", 0.0)
+    shared = searchindex.SharedIndex(search_index)
+    generation = shared.current().generation
+
+    compact_cards(search_index)         # neue Offset-Tabelle, Index unverändert
+
+    snapshot = shared.current()
+    assert snapshot.generation == generation + 1
+    assert len(snapshot.cards) == len(shared.snapshot.cards) > 0
@@ -0,0 +1,84 @@
+import pytest
+
+import delta
+from delta import (BALD, DAY, MAX_RETRY, OHNE_DATEN, RECENT_INTERVAL, RETRY, SWEEP_MIN_AGE, CrawlState, plan,
+                   refresh, retry_wait)
+from getjason import WEG
+from indexing import fields_hash
+from rawstore import RawStore
+
+NOW = 1_800_000_000
+TODAY = NOW // DAY
+
+
+@pytest.fixture
+def state(tmp_path):
+    with CrawlState(str(tmp_path / delta.STATE_FILE)) as state:
+        yield state
+
+
+def test_retry_wait_doubles_up_to_the_limit():
+    assert [retry_wait(n) for n in (1, 2, 3)] == [RETRY, 2 * RETRY, 4 * RETRY]
+    assert retry_wait(30) == MAX_RETRY
+
+
+def test_plan_orders_by_priority_and_age(state):
+    state.set(1, (NOW - 3 * DAY, 0, "h", TODAY - 5, 0))             # aktuell, fällig
+    state.set(2, (NOW - RECENT_INTERVAL + 60, 0, "h", BALD, 0))     # angekündigt, noch nicht fällig
+    state.set(3, (NOW - 4 * DAY, 0, "h", TODAY - 1000, 0))          # beliebt
+    state.set(4, (NOW - SWEEP_MIN_AGE - 10, 0, "h", TODAY - 1000, 0))
+    state.set(5, (NOW - SWEEP_MIN_AGE - 20, 0, "h", TODAY - 1000, 0))
+    state.set(6, (NOW - SWEEP_MIN_AGE - 30, 0, "h", OHNE_DATEN, 0))  # success=false: erst nach NO_DATA_MIN_AGE
+    state.set(7, (NOW - DAY, 0, "", 0, 0))                          # noch nie erfolgreich
+
+    queue, counts = plan([4, 5, 6, 3, 2, 1, 7, 8, 8], state, popular={3}, budget=100, now=NOW)
+
+    assert queue == [(8, "neu"), (7, "neu"), (1, "aktuell"), (3, "beliebt"), (5, "sweep"), (4, "sweep")]
+    assert counts == {"neu": 2, "aktuell": 1, "beliebt": 1, "sweep": 2}
+
+
+def test_plan_respects_the_budget(state):
+    queue, counts = plan(list(range(10)), state, set(), budget=3, now=NOW)
+    assert [app_id for app_id, _ in queue] == [0, 1, 2]
+    assert counts["neu"] == 10
+
+
+@pytest.mark.parametrize("fails, wait", [(1, RETRY), (3, 4 * RETRY), (9, MAX_RETRY)])
+def test_plan_backs_off_failed_ids(state, fails, wait):
+    state.set(1, (NOW - wait + 60, 0, "h", TODAY - 1000, fails))
+    assert plan([1], state, set(), budget=10, now=NOW)[0] == []
+
+    state.set(1, (NOW - wait, 0, "h", TODAY - 1000, fails))
+    assert plan([1], state, set(), budget=10, now=NOW)[0] == [(1, "sweep")]
+
+
+def test_fields_hash_ignores_volatile_fields(app_line):
+    line = app_line(10, "Raft", recommendations={"total": 100}, price_overview={"final": 1999})
+    same = app_line(10, "Raft", recommendations={"total": 120}, price_overview={"final": 999})
+    renamed = app_line(10, "Raft 2", recommendations={"total": 100}, price_overview={"final": 1999})
+
+    assert fields_hash("10", line) == fields_hash("10", same)
+    assert fields_hash("10", line) != fields_hash("10", renamed)
+    assert fields_hash("10", app_line(10, success=False)) != fields_hash("10", line)
+
+
+def test_refresh_stores_only_changed_responses(tmp_path, state, monkeypatch, app_line):
+    answers = {1: app_line(1, "Raft", price_overview={"final": 999}), 2: app_line(2, "Sea of Thieves"), 3: WEG}
+
+    def fetch_many(app_ids, threads, rate, api, max_versuche, desc):
+        assert max_versuche == 2
+        return [(app_id, answers[app_id]) for app_id in app_ids]
+
+    monkeypatch.setattr(delta, "fetch_many", fetch_many)
+    with RawStore(str(tmp_path / "raw")) as store:
+        store.put(1, app_line(1, "Raft", price_overview={"final": 1999}))
+        store.put(2, app_line(2, "Sea of Thieves: Beta"))
+        state.adopt(store)
+        state.set(3, (0, 0, "h", 0, 1))
+
+        stats = refresh([(1, "sweep"), (2, "sweep"), (3, "sweep")], store, state, max_versuche=2)
+
+        assert stats == {"neu": 0, "geändert": 1, "unverändert": 1, "fehler": 1}
+        assert '"final": 1999' in store.get(1)          # nur der Preis hat sich geändert
+        assert store.get(2) == answers[2]
+        assert state.get(3)[4] == 2
@@ -0,0 +1,56 @@
+import pytest
+from tantivy import Occur, Query
+
+import search
+import searchindex
+from facets import bits_from_ids, facet_paths, filter_ids, genre_query, ids_from_bits
+from releasedate import year_query
+
+OPTIONS = ["Action", "Adventure", "Casual", "Indie", "Racing", "RPG", "Simulation", "Strategy",
+           "Multiplayer", "Free to play"]
+
+
+def engine_count(snapshot, query) -> int:
+    return snapshot.searcher.search(query, 1, count=True).count
+
+
+def phrase_count(snapshot, genres, extra=()) -> int:
+    """Trefferzahl wie früher: Phrasensuche im Feld "genres" (UND über alle gewählten Pills)."""
+    parts = [(Occur.Must, snapshot.index.parse_query(f'"{genre}"', ["genres"])) for genre in genres]
+    return engine_count(snapshot, Query.boolean_query(parts + [(Occur.Must, q) for q in extra]))
+
+
+def test_bitset_helpers():
+    ids = [0, 3, 8, 9, 64, 1000]
+    bits = bits_from_ids(ids + [None, -1])
+    assert bits.bit_count() == len(ids)
+    assert ids_from_bits(bits) == ids
+    assert ids_from_bits(bits, offset=2, limit=3) == [8, 9, 64]
+    assert filter_ids(bits, [1000, 5, 3, 64]) == [1000, 3, 64]
+
+
+def test_facet_paths_are_word_sequences():
+    assert facet_paths("Massively Multiplayer") == ["/massively", "/massively multiplayer", "/multiplayer"]
+    assert "/free to play" in facet_paths("Free To Play")
+
+
+@pytest.mark.parametrize("selected", [[], ["Indie"], ["Action", "Adventure"], ["Free to play"]])
+def test_pill_counts_match_the_engine(search_index, selected):
+    snapshot = searchindex.get()
+    facets = snapshot.facets
+    counts = facets.counts(facets.filter(selected), OPTIONS)
+
+    for option in OPTIONS:
+        expected = phrase_count(snapshot, [*selected, option])
+        assert counts[option] == expected, option
+        facet_query = Query.boolean_query([(Occur.Must, genre_query(snapshot.index, g)) for g in [*selected, option]])
+        assert engine_count(snapshot, facet_query) == expected, option
+    assert sum(counts.values()) > 0
+
+
+def test_facet_counts_with_text_and_years(search_index):
+    snapshot = searchindex.get()
+    counts = search.facet_counts("", ["Indie"], [], OPTIONS, (2010, 2020))
+    years = year_query(snapshot.index.schema, (2010, 2020))
+    for option in OPTIONS:
+        assert counts[option] == phrase_count(snapshot, ["Indie", option], [years]), option
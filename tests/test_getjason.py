@@ -0,0 +1,106 @@
+import json
+
+import pytest
+
+import getjason
+from getjason import WEG, Checkpoint, crawl, fetch_many
+from rawstore import RawStore
+
+RATE = 1000.0       # der Token-Bucket soll in den Tests nicht bremsen
+
+
+def answer(app_id: int) -> tuple[int, dict, bytes]:
+    return 200, {"Content-Type": "application/json"}, json.dumps({str(app_id): {"success": True}}).encode()
+
+
+@pytest.fixture
+def waits(monkeypatch):
+    """Zeichnet die Backoff-Pausen auf, statt zu schlafen (kurze Pausen des Token-Buckets fallen weg)."""
+    recorded = []
+
+    def sleep(seconds: float):
+        if seconds >= 0.5:
+            recorded.append(seconds)
+
+    monkeypatch.setattr(getjason.time, "sleep", sleep)
+    return recorded
+
+
+def fetch_all(stub, app_ids, **kwargs):
+    return dict(fetch_many(app_ids, threads=2, rate=RATE, api=stub.url + "/api?appids=", desc="test", **kwargs))
+
+
+def test_retries_server_errors_with_backoff(stub, waits):
+    stub.route("/api?appids=10", (503, {}, b""), (502, {}, b""), answer(10))
+    stub.route("/api?appids=11", answer(11))
+
+    results = fetch_all(stub, [10, 11])
+
+    assert json.loads(results[10]) == {"10": {"success": True}}
+    assert results[11] is not None
+    assert stub.hits("/api?appids=10") == 3
+    assert stub.hits("/api?appids=11") == 1
+    assert len(waits) == 2 and 1 <= waits[0] < 2 <= waits[1] < 3      # 2**versuch plus Jitter
+
+
+def test_retry_after_has_priority(stub, waits):
+    stub.route("/api?appids=20", (429, {"Retry-After": "7"}, b""), answer(20))
+
+    assert fetch_all(stub, [20])[20] is not None
+    assert waits == [7]
+
+
+def test_gives_up_after_max_versuche_and_on_client_errors(stub, waits):
+    stub.route("/api?appids=30", (503, {}, b""))
+    stub.route("/api?appids=31", (403, {}, b""))
+
+    results = fetch_all(stub, [30, 31], max_versuche=3)
+
+    assert results == {30: None, 31: WEG}
+    assert stub.hits("/api?appids=30") == 3
+    assert len(waits) == 2                          # nach dem letzten Versuch wird nicht mehr gewartet
+    assert stub.hits("/api?appids=31") == 1        # kein Retry-Status: sofort aufgeben
+
+
+def test_crawl_resumes_from_checkpoint(stub, waits, tmp_path):
+    ausgabe, checkpoint = str(tmp_path / "rohdaten"), str(tmp_path / "checkpoint.txt")
+    stub.route("/api?appids=1", answer(1))
+    stub.route("/api?appids=2", (404, {}, b""))
+
+    stats = crawl([1, 2], ausgabe, checkpoint, threads=1, rate=RATE, api=stub.url + "/api?appids=")
+    assert stats == {"ok": 1, "fail": 0, "weg": 1, "offen": 2}
+
+    # Zweiter Lauf: fertige IDs werden übersprungen, IDs ohne Antwort der API kommen zuletzt
+    stub.route("/api?appids=2", answer(2))
+    stub.route("/api?appids=3", answer(3))
+    stub.requests.clear()
+    stats = crawl([1, 2, 3], ausgabe, checkpoint, threads=1, rate=RATE, api=stub.url + "/api?appids=")
+
+    assert stats == {"ok": 2, "fail": 0, "weg": 0, "offen": 2}
+    assert stub.requests == ["/api?appids=3", "/api?appids=2"]
+    with RawStore(ausgabe) as store:
+        assert sorted(store.entries) == [1, 2, 3]
+        assert json.loads(store.get(2)) == {"2": {"success": True}}
+    resumed = Checkpoint(checkpoint)
+    assert resumed.done == {1, 2, 3} and not resumed.failed and not resumed.gone
+    resumed.close()
+
+
+def test_checkpoint_ignores_torn_last_line(tmp_path):
+    path = tmp_path / "checkpoint.txt"
+    path.write_text("ok 1\nfail 2\nfail 1\nok 2\nfail 3\nok 4\nok", encoding="UTF-8")
+
+    checkpoint = Checkpoint(str(path))
+    assert checkpoint.done == {1, 2, 4} and checkpoint.failed == {3}
+    assert getjason.plan_work([4, 5, 1, 6], checkpoint, legacy=(7,)) == [3, 7, 5, 6]
+    checkpoint.close()
+
+
+def test_failed_ids_first_gone_ids_last(tmp_path):
+    path = tmp_path / "checkpoint.txt"
+    path.write_text("fail 5\nweg 6\nweg 2\nfail 2\nfail 8\nweg 8\nok 1\nweg 1\n", encoding="UTF-8")
+
+    checkpoint = Checkpoint(str(path))
+    assert checkpoint.failed == {2, 5} and checkpoint.gone == {6, 8} and checkpoint.done == {1}
+    assert getjason.plan_work([1, 3, 6, 4, 8], checkpoint, legacy=(7,)) == [2, 5, 7, 3, 4, 6, 8]
+    checkpoint.close()
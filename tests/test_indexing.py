@@ -0,0 +1,86 @@
+import json
+
+import pytest
+from tantivy import Query
+
+import indexing
+from cardstore import CardStore
+
+
+def write_source(path, lines):
+    path.write_text("".join(line + "\n" for line in lines), encoding="UTF-8")
+    return str(path)
+
+
+def index_run(quelle, index_path, voll=False, **kwargs):
+    return indexing.run(quelle, index_path, voll=voll, worker=1, quiet=True, **kwargs)
+
+
+def indexed(index_path) -> dict[int, str]:
+    """Steam-ID -> Titel aller Dokumente im Index."""
+    index = indexing.register_tokenizers(indexing.Index.open(index_path))
+    index.reload()
+    searcher = index.searcher()
+    docs = [searcher.doc(addr) for _, addr in searcher.search(Query.all_query(), 100).hits]
+    return {doc["steamId"][0]: doc["title"][0] for doc in docs}
+
+
+def cards(index_path) -> dict[int, str]:
+    store = CardStore(index_path)
+    return {card["steamId"]: card["title"] for card in map(store.get, range(len(store))) if card}
+
+
+@pytest.fixture
+def built(tmp_path, app_line):
+    index_path = str(tmp_path / "index")
+    source = write_source(tmp_path / "data.txt", [app_line(10, "Raft"), app_line(20, "Stardew Valley"),
+                                                 app_line(30, "Overcooked"), app_line(40, success=False)])
+    stats = index_run(source, index_path, voll=True)
+    assert stats == {"neu": 3, "geändert": 0, "unverändert": 0, "gelöscht": 0, "fehler": 0}
+    return index_path
+
+
+def test_incremental_run_only_rewrites_changed_apps(built, tmp_path, app_line):
+    source = write_source(tmp_path / "data.txt", [app_line(10, "Raft"), app_line(20, "Stardew Valley 2"),
+                                                 app_line(30, success=False), app_line(40, success=False),
+                                                 app_line(50, "Sea of Thieves"), "kaputt"])
+    stats = index_run(source, built)
+
+    assert stats == {"neu": 1, "geändert": 1, "unverändert": 2, "gelöscht": 1, "fehler": 0}
+    expected = {10: "Raft", 20: "Stardew Valley 2", 50: "Sea of Thieves"}
+    assert indexed(built) == expected
+    assert cards(built) == expected
+
+    # Bekannte Spiele behalten ihre id, das neue bekommt die nächste freie
+    with open(f"{built}/{indexing.STATE_FILE}", encoding="UTF-8") as f:
+        apps = json.load(f)["apps"]
+    assert [apps[k][0] for k in ("10", "20", "30", "50")] == [0, 1, None, 3]
+
+    assert index_run(source, built)["unverändert"] == 5
+
+
+def test_partial_source_keeps_the_rest(built, tmp_path, app_line):
+    source = write_source(tmp_path / "teil.txt", [app_line(20, "Stardew Valley 2")])
+
+    stats = index_run(source, built)
+
+    assert stats["geändert"] == 1 and stats["gelöscht"] == 0
+    assert indexed(built) == {10: "Raft", 20: "Stardew Valley 2", 30: "Overcooked"}
+    assert cards(built) == indexed(built)
+
+
+def test_entfernen_deletes_apps_missing_from_the_source(built, tmp_path, app_line):
+    source = write_source(tmp_path / "data.txt", [app_line(10, "Raft"), app_line(30, "Overcooked")])
+
+    stats = index_run(source, built, entfernen=True)
+
+    assert stats["gelöscht"] == 1
+    assert indexed(built) == cards(built) == {10: "Raft", 30: "Overcooked"}
+    with open(f"{built}/{indexing.STATE_FILE}", encoding="UTF-8") as f:
+        assert sorted(json.load(f)["apps"]) == ["10", "30"]
+
+
+def test_empty_source_deletes_nothing(built, tmp_path):
+    stats = index_run(write_source(tmp_path / "leer.txt", []), built, entfernen=True)
+    assert stats["gelöscht"] == 0
+    assert len(indexed(built)) == 3
@@ -0,0 +1,67 @@
+import gzip
+
+from rawstore import INDEX_FILE, RawStore, app_id_of, import_text, read_lines
+
+
+def test_round_trip_and_latest_wins(tmp_path, app_line):
+    with RawStore(str(tmp_path)) as store:
+        store.put(10, app_line(10, "Raft"))
+        store.put(20, app_line(20, "Stardew Valley") + "\n")
+        store.put(10, app_line(10, "Raft 2"))
+
+        assert len(store) == 2 and 10 in store and 30 not in store
+        assert store.get(10) == app_line(10, "Raft 2")
+        assert store.get(20) == app_line(20, "Stardew Valley")
+        assert store.get(30) is None
+        # Nur der letzte Stand, in der Reihenfolge der Ablage
+        assert [app_id for app_id, _ in store.iter_records()] == [20, 10]
+
+
+def test_reopen_and_new_shards(tmp_path, app_line):
+    with RawStore(str(tmp_path), shard_size=200) as store:
+        for app_id in range(1, 6):
+            store.put(app_id, app_line(app_id))
+    assert len(RawStore(str(tmp_path)).shards()) > 1
+
+    with RawStore(str(tmp_path), shard_size=200) as store:
+        assert len(store) == 5
+        store.put(3, app_line(3, "Neu"))
+    reopened = RawStore(str(tmp_path))
+    assert [app_id_of(line) for line in read_lines(str(tmp_path))] == [1, 2, 4, 5, 3]
+    assert reopened.get(3) == app_line(3, "Neu")
+
+
+def test_torn_last_index_line(tmp_path, app_line):
+    with RawStore(str(tmp_path)) as store:
+        store.put(10, app_line(10, "Raft"))
+        store.put(20, app_line(20))
+    index_path = tmp_path / INDEX_FILE
+    lines = index_path.read_text(encoding="UTF-8").splitlines(keepends=True)
+    # Abbruch mitten in der Länge der zweiten Zeile: die Zahl wäre gültig, aber falsch
+    index_path.write_text(lines[0] + lines[1][:-2], encoding="UTF-8")
+
+    with RawStore(str(tmp_path)) as store:
+        assert 20 not in store and store.get(10) == app_line(10, "Raft")
+        store.put(30, app_line(30))
+
+    assert index_path.read_text(encoding="UTF-8").endswith("\n")
+    reopened = RawStore(str(tmp_path))
+    assert sorted(reopened.entries) == [10, 30]
+    assert reopened.get(30) == app_line(30)
+
+
+def test_members_are_single_gzip_records(tmp_path, app_line):
+    with RawStore(str(tmp_path)) as store:
+        store.put(10, app_line(10))
+        shard, offset, length = store.entries[10]
+    with open(store.shard_path(shard), "rb") as f:
+        f.seek(offset)
+        assert gzip.decompress(f.read(length)).decode("UTF-8") == app_line(10)
+
+
+def test_import_text_skips_lines_without_id(tmp_path, app_line):
+    path = tmp_path / "data.txt"
+    path.write_text(f"{app_line(10)}\nkaputt\n{app_line(20)}\n{app_line(10, 'Neu')}\n", encoding="UTF-8")
+    with RawStore(str(tmp_path / "store")) as store:
+        assert import_text(store, str(path)) == 3
+        assert len(store) == 2 and store.get(10) == app_line(10, "Neu")
@@ -0,0 +1,66 @@
+from datetime import datetime, timezone
+
+import pytest
+
+import searchindex
+from releasedate import MAX_YEAR, MIN_YEAR, make_date, parse_release_date, year_query
+
+
+def day(year, month, day=1):
+    return datetime(year, month, day, tzinfo=timezone.utc)
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("12 Jan, 2019", day(2019, 1, 12)),
+    ("Jan 12, 2019", day(2019, 1, 12)),
+    ("12. Jan. 2019", day(2019, 1, 12)),
+    ("12. März 2019", day(2019, 3, 12)),
+    ("12 janv. 2019", day(2019, 1, 12)),
+    ("12 févr. 2019", day(2019, 2, 12)),
+    ("12 ene. 2019", day(2019, 1, 12)),
+    ("12 ago 2019", day(2019, 8, 12)),
+    ("12 paź 2019", day(2019, 10, 12)),
+    ("12 янв. 2019 г.", day(2019, 1, 12)),
+    ("2019年1月12日", day(2019, 1, 12)),
+    ("2019년 1월 12일", day(2019, 1, 12)),
+    ("2019-01-12", day(2019, 1, 12)),
+    ("12.01.2019", day(2019, 1, 12)),
+    ("31 Feb, 2019", day(2019, 2, 1)),
+    ("Q3 2026", day(2026, 7, 1)),
+    ("Summer 2026", day(2026, 6, 1)),
+    ("2027", day(2027, 1, 1)),
+])
+def test_parse_release_date(text, expected):
+    assert parse_release_date(text) == expected
+
+
+@pytest.mark.parametrize("text", ["", None, "Coming soon", "To be announced", "12 Jan, 1850", "12 Jan, 2150"])
+def test_parse_release_date_without_year(text):
+    assert parse_release_date(text) is None
+
+
+def test_make_date_bounds():
+    assert make_date(MIN_YEAR) == day(MIN_YEAR, 1)
+    assert make_date(MAX_YEAR, 12, 31) == day(MAX_YEAR, 12, 31)
+    assert make_date(MAX_YEAR + 1) is None
+    assert make_date(2019, 13) is None
+
+
+def test_year_query_clamps_to_the_supported_years(search_index):
+    snapshot = searchindex.get()
+    count = lambda query: snapshot.searcher.search(query, 1, count=True).count
+    schema = snapshot.index.schema
+
+    dated = snapshot.release.in_years((MIN_YEAR, MAX_YEAR)).bit_count()
+    assert 0 < dated < snapshot.searcher.num_docs      # "Coming soon" ohne Datum
+    assert count(year_query(schema, (1000, 9999))) == dated
+    assert count(year_query(schema, (MIN_YEAR, MAX_YEAR))) == dated
+    assert count(year_query(schema, (MAX_YEAR, 9999))) == 0
+    assert count(year_query(schema, (1000, MIN_YEAR - 1))) == 0
+
+
+@pytest.mark.parametrize("years", [(2015, 2015), (2000, 2010), (2019, 2030)])
+def test_year_query_matches_the_year_bitsets(search_index, years):
+    snapshot = searchindex.get()
+    engine = snapshot.searcher.search(year_query(snapshot.index.schema, years), 1, count=True).count
+    assert engine == snapshot.release.in_years(years).bit_count()
@@ -0,0 +1,90 @@
+import asyncio
+import json
+import os
+import socket
+import threading
+import time
+
+import pytest
+
+import search
+from searchd import SearchClient, SearchDaemon, SearchError
+
+
+def wait_for(path: str):
+    for _ in range(200):
+        if os.path.exists(path):
+            return
+        time.sleep(0.02)
+    raise TimeoutError(path)
+
+
+@pytest.fixture(scope="module")
+def daemon(search_index, tmp_path_factory):
+    address = str(tmp_path_factory.mktemp("searchd") / "searchd.sock")
+    server = SearchDaemon(search_index, worker=2)
+    threading.Thread(target=asyncio.run, args=(server.serve(address),), daemon=True).start()
+    wait_for(address)
+    return address
+
+
+@pytest.fixture
+def stalled(tmp_path):
+    """Ein Socket, der Verbindungen annimmt und nie antwortet (hängender Dienst)."""
+    address = str(tmp_path / "haengt.sock")
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    server.bind(address)
+    server.listen(8)
+    yield address
+    server.close()
+
+
+def as_json(value):
+    return json.loads(json.dumps(value))
+
+
+def test_batch_round_trip_matches_local_search(daemon):
+    client = SearchClient(daemon)
+    options = ["Action", "RPG", "Indie"]
+    results = client.batch([
+        ("search_cards", ["witcher", ["RPG"], [], 5, 5, None, False, False]),
+        ("facet_counts", ["", ["Indie"], [], options, [2015, 2020], False]),
+        ("ids_for_steam", [[9_000_030, 1]]),
+    ])
+
+    assert results == [
+        as_json(search.search_cards("witcher", ["RPG"], [], 5, 5)),
+        as_json(search.facet_counts("", ["Indie"], [], options, (2015, 2020))),
+        search.ids_for_steam([9_000_030]),
+    ]
+    cards, total = results[0]
+    assert cards[0]["title"] == "The Witcher 3: Wild Hunt" and total >= 1
+    assert client.generation == search.generation()
+
+
+def test_errors_are_reported_per_call(daemon):
+    client = SearchClient(daemon)
+    with pytest.raises(SearchError, match="unbekannter Aufruf"):
+        client.call("gibt_es_nicht")
+    assert client.call("release_years") == list(search.release_years())     # Verbindung bleibt nutzbar
+
+
+def test_stalled_daemon_times_out(stalled):
+    client = SearchClient(stalled, timeout=0.2)
+    start = time.monotonic()
+    with pytest.raises(TimeoutError):
+        client.call("release_years")
+    assert time.monotonic() - start < 1.0           # kein zweiter Versuch nach einer Zeitüberschreitung
+    assert not client.available
+
+
+def test_search_falls_back_to_local_index(stalled, search_index, monkeypatch):
+    monkeypatch.setattr(search, "client", SearchClient(stalled, timeout=0.2))
+    local = [search.facet_counts("raft", [], [], ["Indie"]), search.search_cards("raft", limit=3)]
+    monkeypatch.setattr(search, "client", SearchClient(stalled, timeout=0.2))
+
+    start = time.monotonic()
+    assert search.batch([("facet_counts", ("raft", [], [], ["Indie"])),
+                         ("search_cards", ("raft", [], [], 3))]) == local
+    assert search.get_cards(search.ids_for_steam([9_000_030]))[0]["title"] == "Raft"
+    assert time.monotonic() - start < 1.0           # nach dem ersten Ausfall nicht mehr beim Dienst
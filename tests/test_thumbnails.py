@@ -0,0 +1,103 @@
+import io
+import os
+import time
+
+from PIL import Image
+
+import thumbnails
+from thumbnails import SIZES, STATIC_URL, ThumbnailCache, thumb_name
+
+
+def png(width: int = 460, height: int = 215) -> bytes:
+    out = io.BytesIO()
+    Image.new("RGB", (width, height), (5, 223, 165)).save(out, "PNG")
+    return out.getvalue()
+
+
+def test_store_writes_scaled_webp(stub, tmp_path):
+    stub.route("/header.jpg?t=1", (200, {"Content-Type": "image/png"}, png()))
+    thumbs = ThumbnailCache(str(tmp_path), fetch=False)
+    url = stub.url + "/header.jpg?t=1"
+
+    assert thumbs.src(url) == url            # noch keine Kopie: die Original-URL
+    size = thumbs.store(url)
+
+    path = tmp_path / thumb_name(url)
+    assert size == path.stat().st_size > 0
+    with Image.open(path) as image:
+        assert image.format == "WEBP"
+        assert image.size == (SIZES["karte"], 150)
+    assert thumbs.src(url) == f"{STATIC_URL}/{thumb_name(url)}"
+
+    assert thumbs.store(url) == size         # vorhandene Kopie wird nicht neu geladen
+    assert stub.hits("/header.jpg?t=1") == 1
+
+
+def test_small_images_are_not_enlarged(stub, tmp_path):
+    stub.route("/small.png", (200, {}, png(200, 100)))
+    thumbs = ThumbnailCache(str(tmp_path), fetch=False)
+    thumbs.store(stub.url + "/small.png", "poster")
+    with Image.open(tmp_path / thumb_name(stub.url + "/small.png", "poster")) as image:
+        assert image.size == (200, 100)
+
+
+def test_missing_and_broken_images_are_cached_negatively(stub, tmp_path):
+    stub.route("/kaputt.jpg", (200, {}, b"kein Bild"))
+    thumbs = ThumbnailCache(str(tmp_path), fetch=True, threads=1)
+    missing, broken = stub.url + "/fehlt.jpg", stub.url + "/kaputt.jpg"
+
+    assert thumbs.store(missing) == 0
+    assert thumbs.store(broken) == 0
+    assert not list(tmp_path.rglob("*.webp"))
+    for url in (missing, broken):
+        assert thumbs.failed[url] > time.time() + thumbnails.RETRY_NO_IMAGE - 60
+
+    # Solange der Fehler gemerkt ist, wird nichts mehr im Hintergrund geholt
+    assert thumbs.src(missing) == missing
+    thumbs.pool.shutdown(wait=True)
+    assert stub.hits("/fehlt.jpg") == 1
+
+
+def test_background_fetch_after_server_error(stub, tmp_path):
+    stub.route("/header.jpg", (500, {}, b""), (200, {}, png()))
+    thumbs = ThumbnailCache(str(tmp_path), fetch=True, threads=1)
+    url = stub.url + "/header.jpg"
+
+    thumbs.schedule(url)
+    thumbs.pool.shutdown(wait=True)
+    assert thumbs.failed[url] > time.time() + thumbnails.RETRY_ERROR - 60
+    assert not thumbs.pending
+
+    thumbs.failed.clear()
+    assert thumbs.store(url) > 0
+    assert stub.hits("/header.jpg") == 2
+
+
+def test_evict_removes_least_recently_used_first(tmp_path):
+    thumbs = ThumbnailCache(str(tmp_path), fetch=False)
+    now = time.time()
+    for i, name in enumerate(["alt", "mittel", "neu", "neuer"]):
+        path = tmp_path / "ab" / f"{name}.webp"
+        path.parent.mkdir(exist_ok=True)
+        path.write_bytes(b"x" * 1000)
+        os.utime(path, (now - 1000 + i * 100, now - 1000 + i * 100))
+    (tmp_path / "ab" / "andere.txt").write_bytes(b"x" * 5000)      # keine Kopie, zählt nicht
+
+    assert thumbs.disk_usage() == 4000
+    removed, freed = thumbs.evict(max_bytes=3000)       # Ziel: 90 % von 3000 Bytes
+    assert (removed, freed) == (2, 2000)
+    assert sorted(p.name for p in (tmp_path / "ab").glob("*.webp")) == ["neu.webp", "neuer.webp"]
+    assert thumbs.size == 2000
+
+
+def test_growing_past_the_limit_evicts(stub, tmp_path):
+    stub.route("/a.png", (200, {}, png()))
+    stub.route("/b.png", (200, {}, png()))
+    thumbs = ThumbnailCache(str(tmp_path), fetch=False)
+    first = thumbs.store(stub.url + "/a.png")
+    os.utime(tmp_path / thumb_name(stub.url + "/a.png"), (time.time() - 3600,) * 2)
+
+    thumbs.max_bytes = first * 3 // 2    # die zweite Kopie passt nicht mehr daneben
+    thumbs.store(stub.url + "/b.png")
+    assert not (tmp_path / thumb_name(stub.url + "/a.png")).exists()
+    assert (tmp_path / thumb_name(stub.url + "/b.png")).exists()
@@ -0,0 +1,48 @@
+import pytest
+
+import search
+import searchindex
+from titlesearch import TitleDictionary, title_query, title_trigrams
+
+RECALL = 10
+TYPOS = [
+    ("witchr 3 wild hunt", 9_000_010),
+    ("the wicher 3", 9_000_010),
+    ("stardw valey", 9_000_020),
+    ("sea of theives", 9_000_040),
+    ("overcoked", 9_000_050),
+    ("raft", 9_000_030),
+]
+
+
+def test_short_words_get_padded_trigrams():
+    assert title_trigrams("Raft 2") == {" ra", "raf", "aft", "ft ", " 2 "}
+    assert title_trigrams("") == set()
+
+
+def test_dictionary_ranks_the_closest_title_first():
+    titles = TitleDictionary({0: "Sea of Thieves", 1: "Sea of Stars", 2: "Thief Simulator", 3: "The Witcher 3: Wild Hunt"})
+    assert titles.search("sea of theives")[0] == 0
+    assert titles.search("witc")[0] == 3
+    assert titles.search("xyz") == []
+
+
+@pytest.mark.parametrize("text, steam_id", TYPOS)
+def test_typo_recall(search_index, text, steam_id):
+    snapshot = searchindex.get()
+    (doc_id,) = search.ids_for_steam([steam_id])
+    # Der Bench-Katalog enthält ähnliche Titel ("Witch", "Overcooked"): unter den ersten RECALL reicht
+    assert doc_id in snapshot.titles.search(text)[:RECALL]
+
+    # Die Engine-Query (Indizes ohne Karten-Datei) findet denselben Titel
+    hits = snapshot.searcher.search(title_query(snapshot.index.schema, text), 1000).hits
+    assert doc_id in {snapshot.searcher.doc(address)["id"][0] for _, address in hits}
+
+
+def test_engine_query_matches_the_dictionary(search_index):
+    snapshot = searchindex.get()
+    for text, _ in TYPOS:
+        hits = snapshot.searcher.search(title_query(snapshot.index.schema, text), 10_000).hits
+        engine = {snapshot.searcher.doc(address)["id"][0] for _, address in hits}
+        assert engine == set(snapshot.titles.search(text)), text
+
@@ -0,0 +1,286 @@
+"""
+Lokale Vorschaubilder der Steam-Header, ausgeliefert über das Static-Serving von Streamlit.
+
+Karten im Raster, Editor's picks und das Poster der Detailseite (ohne Trailer) zeigen das
+header_image von Steam: 460×215 JPEG von einem fremden Server, bei 100 Karten mehrere MB pro
+Seite. Jedes Bild wird hier einmal geladen, auf die angezeigte Breite verkleinert (SIZES), als
+WebP gespeichert und danach als app/static/thumbs/... vom Streamlit-Server selbst ausgeliefert
+(server.enableStaticServing in .streamlit/config.toml, Ordner static/ neben web.py).
+
+Der Dateiname ist ein Hash aus Bild-URL und Breite. Steam versioniert die URL (?t=...), ein
+geändertes Bild bekommt also eine neue Datei; vorhandene Dateien ändern sich nie und werden nie
+ungültig. Fehlt eine Kopie, zeigt die Karte noch die Steam-URL und die Kopie wird im Hintergrund
+geholt (höchstens MAX_PENDING gleichzeitig). Mit dem nächsten Rerun ist sie da. Mit THUMBNAILS=0
+werden nur vorhandene Kopien benutzt (Benchmarks, Lasttests).
+
+Der Ordner ist auf MAX_BYTES begrenzt. Benutzte Dateien bekommen höchstens einmal pro Tag eine
+neue mtime, beim Aufräumen fallen die am längsten nicht benutzten zuerst weg.
+
+Alle Karten-Bilder vorab laden (z. B. nach indexing.py) bzw. nur aufräumen:
+    python thumbnails.py --threads 8
+    python thumbnails.py --aufraeumen --max-mb 500
+"""
+
+import argparse
+import hashlib
+import io
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from PIL import Image
+from tqdm.auto import tqdm
+
+THUMB_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static", "thumbs")
+STATIC_URL = "app/static/thumbs"
+SIZES = {"karte": 320, "poster": 460}      # Breite in Pixel
+QUALITY = 80
+MAX_BYTES = 1_500_000_000       # Obergrenze des Ordners (128k Karten à ~10 KB passen hinein)
+FETCH_THREADS = 4               # Downloads im Hintergrund pro Server-Prozess
+MAX_PENDING = 256               # mehr offene Downloads werden nicht eingereiht
+TIMEOUT = 10
+RECHECK = 60.0                  # Sekunden, die eine gefundene Datei als vorhanden gilt
+MISS_RECHECK = 5.0              # ... und eine fehlende als fehlend (andere Prozesse laden auch)
+TOUCH = 24 * 3600               # mtime benutzter Dateien höchstens so oft erneuern
+MAX_SEEN = 50_000               # gemerkte Ergebnisse pro Prozess
+RETRY_ERROR = 300               # nach einem Netzwerkfehler frühestens so spät erneut laden
+RETRY_NO_IMAGE = 24 * 3600      # URL ohne Bild (404, kein Bildformat)
+FETCH = os.environ.get("THUMBNAILS", "1") not in ("", "0")      # 0: nur vorhandene Kopien nutzen
+
+
+def thumb_name(url: str, size: str = "karte") -> str:
+    """Relativer Pfad der Kopie, z. B. "3f/3f2a...-320.webp"."""
+    width = SIZES[size]
+    digest = hashlib.blake2b(url.encode("UTF-8"), digest_size=16).hexdigest()
+    return f"{digest[:2]}/{digest}-{width}.webp"
+
+
+def make_thumbnail(data: bytes, width: int) -> bytes:
+    """Verkleinert ein Bild auf `width` Pixel Breite (nie vergrößert) und kodiert es als WebP."""
+    with Image.open(io.BytesIO(data)) as image:
+        image = image.convert("RGB")
+        if image.width > width:
+            image = image.resize((width, max(1, round(image.height * width / image.width))), Image.LANCZOS)
+        out = io.BytesIO()
+        image.save(out, "WEBP", quality=QUALITY, method=4)
+        return out.getvalue()
+
+
+class ThumbnailCache:
+    """Der Ordner mit den Kopien; von allen Sessions eines Prozesses geteilt."""
+
+    def __init__(self, path: str = THUMB_DIR, max_bytes: int = MAX_BYTES, fetch: bool = FETCH,
+                 threads: int = FETCH_THREADS):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.fetch = fetch
+        self.threads = threads
+        self.lock = threading.Lock()
+        self.seen: dict[str, tuple[float, bool]] = {}      # Name -> (Zeitpunkt des Nachsehens, vorhanden)
+        self.pending: set[str] = set()
+        self.failed: dict[str, float] = {}       # URL -> frühester neuer Versuch
+        self.size: int | None = None             # Bytes im Ordner (Schätzung dieses Prozesses)
+        self._pool = None
+        self._session = None
+
+    @property
+    def pool(self) -> ThreadPoolExecutor:
+        if self._pool is None:
+            with self.lock:
+                if self._pool is None:
+                    self._pool = ThreadPoolExecutor(self.threads, thread_name_prefix="thumbs")
+        return self._pool
+
+    @property
+    def session(self) -> requests.Session:
+        if self._session is None:
+            with self.lock:
+                if self._session is None:
+                    session = requests.Session()
+                    adapter = requests.adapters.HTTPAdapter(pool_connections=self.threads, pool_maxsize=self.threads)
+                    session.mount("http://", adapter)
+                    session.mount("https://", adapter)
+                    self._session = session
+        return self._session
+
+    def src(self, url: str, size: str = "karte") -> str:
+        """Adresse für <img src>: die lokale Kopie, sonst die Steam-URL (die Kopie wird dann im Hintergrund geholt)."""
+        if not url:
+            return url
+        name = thumb_name(url, size)
+        now = time.time()
+        seen = self.seen.get(name)
+        if seen is None or now - seen[0] >= (RECHECK if seen[1] else MISS_RECHECK):
+            if len(self.seen) >= MAX_SEEN:
+                self.seen.clear()
+            seen = self.seen[name] = now, self._exists(name, now)
+        if seen[1]:
+            return f"{STATIC_URL}/{name}"
+        if self.fetch:
+            self.schedule(url, size)
+        return url
+
+    def _exists(self, name: str, now: float) -> bool:
+        path = os.path.join(self.path, name)
+        try:
+            mtime = os.stat(path).st_mtime
+        except OSError:
+            return False
+        if now - mtime > TOUCH:
+            try:
+                os.utime(path)      # benutzt: beim Aufräumen hinten anstellen
+            except OSError:
+                pass
+        return True
+
+    def schedule(self, url: str, size: str = "karte"):
+        """Holt die Kopie im Hintergrund, sofern sie nicht schon unterwegs ist oder fehlgeschlagen war."""
+        key = f"{size}:{url}"
+        with self.lock:
+            if key in self.pending or len(self.pending) >= MAX_PENDING or self.failed.get(url, 0) > time.time():
+                return
+            self.pending.add(key)
+        self.pool.submit(self._background, key, url, size)
+
+    def _background(self, key: str, url: str, size: str):
+        try:
+            self.store(url, size)
+        except Exception:
+            self.failed[url] = time.time() + RETRY_ERROR
+        finally:
+            with self.lock:
+                self.pending.discard(key)
+
+    def store(self, url: str, size: str = "karte") -> int:
+        """Lädt ein Bild, legt die Kopie ab und gibt ihre Größe in Bytes zurück (0: kein Bild unter der URL)."""
+        path = os.path.join(self.path, thumb_name(url, size))
+        if os.path.exists(path):
+            return os.path.getsize(path)
+        response = self.session.get(url, timeout=TIMEOUT)
+        if response.status_code == 404:
+            self.failed[url] = time.time() + RETRY_NO_IMAGE
+            return 0
+        response.raise_for_status()
+        try:
+            data = make_thumbnail(response.content, SIZES[size])
+        except (OSError, ValueError, Image.DecompressionBombError):
+            self.failed[url] = time.time() + RETRY_NO_IMAGE
+            return 0
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+        self.seen[thumb_name(url, size)] = time.time(), True
+        self._grow(len(data))
+        return len(data)
+
+    def _grow(self, added: int):
+        with self.lock:
+            if self.size is None:
+                self.size = self.disk_usage()
+            else:
+                self.size += added
+            full = self.size > self.max_bytes
+        if full:
+            self.evict()
+
+    def files(self) -> list[tuple[float, int, str]]:
+        """(mtime, Bytes, Pfad) aller Kopien."""
+        result = []
+        if not os.path.isdir(self.path):
+            return result
+        for sub in os.scandir(self.path):
+            if not sub.is_dir():
+                continue
+            for entry in os.scandir(sub.path):
+                if entry.name.endswith(".webp"):
+                    try:
+                        st = entry.stat()
+                    except OSError:
+                        continue
+                    result.append((st.st_mtime, st.st_size, entry.path))
+        return result
+
+    def disk_usage(self) -> int:
+        return sum(size for _, size, _ in self.files())
+
+    def evict(self, max_bytes: int | None = None) -> tuple[int, int]:
+        """Löscht die am längsten nicht benutzten Kopien, bis der Ordner unter 90 % der Grenze liegt."""
+        limit = (self.max_bytes if max_bytes is None else max_bytes) * 0.9
+        files = sorted(self.files())
+        total = sum(size for _, size, _ in files)
+        removed = freed = 0
+        for _, size, path in files:
+            if total <= limit:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            removed += 1
+            freed += size
+        with self.lock:
+            self.size = total
+            self.seen.clear()
+        return removed, freed
+
+
+cache = ThumbnailCache()
+
+
+def src(url: str, size: str = "karte") -> str:
+    """<img src> zu einer Steam-Bild-URL über den gemeinsamen Cache (siehe ThumbnailCache.src)."""
+    return cache.src(url, size)
+
+
+def prefetch(urls: list[str], thumbs: ThumbnailCache, threads: int, quiet: bool = False) -> dict[str, int]:
+    """Holt die Kopien zu allen `urls` parallel (vorhandene werden übersprungen)."""
+    stats = {"geholt": 0, "vorhanden": 0, "ohne_bild": 0, "fehler": 0, "bytes": 0}
+    todo = [url for url in urls if url]
+    with ThreadPoolExecutor(threads) as pool, tqdm(total=len(todo), desc="Vorschaubilder", disable=quiet) as bar:
+        def one(url: str):
+            if os.path.exists(os.path.join(thumbs.path, thumb_name(url))):
+                return "vorhanden", 0
+            try:
+                size = thumbs.store(url)
+            except (requests.RequestException, OSError):
+                return "fehler", 0
+            return ("geholt", size) if size else ("ohne_bild", 0)
+
+        for result, size in pool.map(one, todo):
+            stats[result] += 1
+            stats["bytes"] += size
+            bar.update(1)
+    return stats
+
+
+def main():
+    from cardstore import CardStore
+    from indexing import INDEX_PATH
+
+    parser = argparse.ArgumentParser(description="Lädt die Vorschaubilder aller Karten bzw. räumt den Ordner auf.")
+    parser.add_argument("--index", default=INDEX_PATH, help="Index-Ordner mit der Karten-Datei")
+    parser.add_argument("--ordner", default=THUMB_DIR)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--max-mb", type=int, default=MAX_BYTES // 1_000_000, help="Obergrenze des Ordners in MB")
+    parser.add_argument("--aufraeumen", action="store_true", help="nur aufräumen, nichts laden")
+    parser.add_argument("--quiet", action="store_true")
+    args = parser.parse_args()
+
+    thumbs = ThumbnailCache(args.ordner, args.max_mb * 1_000_000, fetch=False)
+    if not args.aufraeumen:
+        cards = CardStore(args.index)
+        urls = list(dict.fromkeys(card["image"] for card in map(cards.get, range(len(cards))) if card))
+        stats = prefetch(urls, thumbs, args.threads, args.quiet)
+        print(", ".join(f"{v} {k}" for k, v in stats.items()))
+    removed, freed = thumbs.evict()
+    print(f"{removed} Dateien gelöscht ({freed / 1e6:.1f} MB), {thumbs.size / 1e6:.1f} MB im Ordner.")
+
+
+if __name__ == "__main__":
+    main()
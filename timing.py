@@ -0,0 +1,242 @@
+"""
+Zeitmessung der Reruns: Spans um die teuren Schritte, Histogramme und Prometheus-Export.
+
+Die Seiten und search.py legen Spans um Index öffnen, Query bauen, Suche, Dokument- und
+Kartenabrufe und das Bauen des HTML:
+
+    with timing.span("karten_html"):
+        grid = render.grid_html(...)
+
+Gemessen wird nur, wenn es eingeschaltet ist: für eine Session mit dem Query-Parameter ?debug=1
+oder für alle Reruns über die Umgebungsvariablen unten. Ohne Messung liefert `span` einen festen
+Null-Kontext, es bleibt ein Attribut-Lookup pro Span.
+
+    TIMING_DEBUG=1          Debug-Sidebar in allen Sessions
+    TIMING_FILE=pfad        Histogramme regelmäßig als Prometheus-Textdatei schreiben
+    TIMING_PORT=9464        Histogramme unter http://localhost:9464/metrics anbieten
+
+web.py startet und beendet jeden Rerun (`start_rerun`/`end_rerun`), die Spans eines Reruns
+hängen am Thread, in dem Streamlit das Skript ausführt. Seiten, die vorzeitig aufhören, rufen
+`timing.stop()` statt `st.stop()`, damit die Sidebar vorher noch gezeichnet wird.
+"""
+
+import contextlib
+import os
+import threading
+import time
+from bisect import bisect_left
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+METRIC = "videogames_span_seconds"
+# Obergrenzen der Histogramm-Buckets in Sekunden
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+EXPORT_INTERVAL = 5.0       # Sekunden zwischen zwei Schreibvorgängen der Textdatei
+
+DEBUG = os.environ.get("TIMING_DEBUG", "") not in ("", "0")
+EXPORT_FILE = os.environ.get("TIMING_FILE") or None
+EXPORT_PORT = int(os.environ.get("TIMING_PORT") or 0)
+ALWAYS = DEBUG or EXPORT_FILE is not None or EXPORT_PORT > 0
+
+_local = threading.local()
+_NOOP = contextlib.nullcontext()
+
+
+class Histogram:
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)      # letzter Eintrag: über dem größten Bucket
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds: float):
+        self.counts[bisect_left(self.buckets, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+        self.max = max(self.max, seconds)
+
+    def quantile(self, q: float) -> float:
+        """Obergrenze des Buckets, in dem das Quantil liegt (wie histogram_quantile, ohne Interpolation)."""
+        rank = q * self.count
+        seen = 0
+        for bound, n in zip(self.buckets, self.counts):
+            seen += n
+            if seen >= rank:
+                return bound
+        return self.max
+
+
+class Registry:
+    """Histogramme pro Span-Name, von allen Sessions des Prozesses geteilt."""
+
+    def __init__(self):
+        self.histograms: dict[str, Histogram] = {}
+        self.lock = threading.Lock()
+
+    def observe(self, name: str, seconds: float):
+        with self.lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = Histogram()
+            histogram.observe(seconds)
+
+    def summary(self) -> list[dict]:
+        """Kennzahlen aller Spans in Millisekunden, für die Sidebar."""
+        with self.lock:
+            return [{"span": name, "anzahl": h.count, "mittel_ms": round(h.sum / h.count * 1000, 2),
+                     "p95_ms": round(h.quantile(0.95) * 1000, 2), "max_ms": round(h.max * 1000, 2)}
+                    for name, h in sorted(self.histograms.items())]
+
+    def prometheus(self) -> str:
+        """Alle Histogramme im Textformat von Prometheus."""
+        lines = [f"# HELP {METRIC} Duration of instrumented stages of a Streamlit rerun.",
+                 f"# TYPE {METRIC} histogram"]
+        with self.lock:
+            for name, h in sorted(self.histograms.items()):
+                cumulative = 0
+                for bound, n in zip(h.buckets, h.counts):
+                    cumulative += n
+                    lines.append(f'{METRIC}_bucket{{span="{name}",le="{bound}"}} {cumulative}')
+                lines.append(f'{METRIC}_bucket{{span="{name}",le="+Inf"}} {h.count}')
+                lines.append(f'{METRIC}_sum{{span="{name}"}} {h.sum:.6f}')
+                lines.append(f'{METRIC}_count{{span="{name}"}} {h.count}')
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+
+class Span:
+    __slots__ = ("name", "start", "spans", "depth")
+
+    def __init__(self, name: str, spans: list):
+        self.name = name
+        self.spans = spans
+
+    def __enter__(self):
+        self.depth = _local.depth
+        _local.depth = self.depth + 1
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        seconds = time.perf_counter() - self.start
+        _local.depth = self.depth
+        registry.observe(self.name, seconds)
+        self.spans.append((self.start, self.depth, self.name, seconds))
+        return False
+
+
+def span(name: str):
+    """Kontext, der die Dauer des Blocks unter `name` misst (oder nichts tut, wenn nicht gemessen wird)."""
+    spans = getattr(_local, "spans", None)
+    if spans is None:
+        return _NOOP
+    return Span(name, spans)
+
+
+def start_rerun(debug: bool = False) -> bool:
+    """Beginnt einen Rerun; gemessen wird mit ?debug=1 oder wenn eine der Umgebungsvariablen gesetzt ist."""
+    active = debug or ALWAYS
+    _local.debug = debug
+    _local.spans = [] if active else None
+    _local.depth = 1        # Tiefe 0 ist der Rerun selbst
+    _local.start = time.perf_counter()
+    if EXPORT_PORT:
+        serve(EXPORT_PORT)
+    return active
+
+
+def finish_rerun() -> list[tuple[int, str, float]] | None:
+    """Beendet den Rerun und liefert seine Spans (Tiefe, Name, Sekunden) in Start-Reihenfolge."""
+    spans = getattr(_local, "spans", None)
+    _local.spans = None
+    if spans is None:
+        return None
+    seconds = time.perf_counter() - _local.start
+    registry.observe("rerun", seconds)
+    spans.append((_local.start, 0, "rerun", seconds))
+    if EXPORT_FILE:
+        export_file(EXPORT_FILE)
+    return [(depth, name, seconds) for _, depth, name, seconds in sorted(spans)]
+
+
+def end_rerun():
+    """Beendet den Rerun und zeigt im Debug-Modus seine Spans in der Sidebar."""
+    spans = finish_rerun()
+    if spans is not None and _local.debug:
+        sidebar(spans)
+
+
+def stop():
+    """Wie st.stop(); die Messung wird vorher beendet, weil Streamlit danach nichts mehr zeichnet."""
+    import streamlit as st
+
+    end_rerun()
+    st.stop()
+
+
+_exported = 0.0
+_export_lock = threading.Lock()
+
+
+def export_file(path: str, interval: float = EXPORT_INTERVAL):
+    """Schreibt die Histogramme (höchstens alle `interval` Sekunden) atomar als Textdatei."""
+    global _exported
+    now = time.monotonic()
+    if now - _exported < interval:
+        return
+    with _export_lock:
+        if now - _exported < interval:
+            return
+        _exported = now
+        with open(path + ".tmp", "w", encoding="UTF-8") as f:
+            f.write(registry.prometheus())
+        os.replace(path + ".tmp", path)
+
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = registry.prometheus().encode("UTF-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+_server = None
+_server_lock = threading.Lock()
+
+
+def serve(port: int):
+    """Startet einmal pro Prozess den /metrics-Endpunkt auf localhost."""
+    global _server
+    if _server is not None:
+        return
+    with _server_lock:
+        if _server is None:
+            try:
+                _server = ThreadingHTTPServer(("127.0.0.1", port), MetricsHandler)
+            except OSError:
+                _server = False         # Port belegt, z. B. durch einen zweiten Server-Prozess
+                return
+            threading.Thread(target=_server.serve_forever, name="metrics", daemon=True).start()
+
+
+def sidebar(spans):
+    """Debug-Sidebar: Spans des aktuellen Reruns und die Histogramme aller Reruns seit dem Start."""
+    import streamlit as st
+
+    with st.sidebar:
+        st.subheader("Timing")
+        if spans:
+            st.code("\n".join(f"{'  ' * depth}{name:<{24 - 2 * depth}} {seconds * 1000:9.2f} ms"
+                              for depth, name, seconds in spans), language=None)
+        st.dataframe(registry.summary(), hide_index=True)
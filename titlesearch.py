@@ -0,0 +1,130 @@
+"""
+Fehlertolerante Titelsuche über ein Titel-Wörterbuch im Speicher.
+
+Statt jedes Trigramm eines Suchworts per AND zu verlangen (ein Tippfehler = keine Treffer), wird
+jeder Titel danach bewertet, wie viele Trigramme er mit der Anfrage teilt:
+
+1) Anfrage wie beim Indizieren bereinigen und in Trigramme zerlegen. Wörter werden mit Leerzeichen
+   aufgefüllt, damit auch Wörter mit 1-2 Buchstaben Trigramme ergeben (" ab", "ab ").
+2) Über die Trigramm-Postings (NumPy-Arrays mit Titel-Nummern) zählen, wie viele Trigramme jeder
+   Titel trifft; Kandidaten müssen mindestens MIN_SHOULD_MATCH der Anfrage-Trigramme enthalten.
+3) Kandidaten nach Dice-Ähnlichkeit sortieren und die besten RERANK per Edit-Distanz der Wörter
+   neu ordnen (Tippfehler und angefangene Wörter wie "witc" -> "Witcher").
+
+Das Wörterbuch wird einmal pro Index-Generation aus der Karten-Datei gebaut (siehe searchindex.py).
+Für die Engine (ältere Indizes ohne Karten-Datei) baut `title_query` dieselbe Logik als Query-Objekt.
+"""
+
+import math
+
+import numpy as np
+from tantivy import Occur, Query
+
+from indexing import clean_title, title_ngram_analyzer, title_ngram_values
+
+MIN_SHOULD_MATCH = 0.5      # Anteil der Anfrage-Trigramme, die ein Titel mindestens enthalten muss
+RERANK = 50                 # so viele Kandidaten werden per Edit-Distanz neu sortiert
+MAX_RESULTS = 5000          # längere Ergebnislisten werden abgeschnitten
+
+
+def normalize_title(text: str) -> str:
+    return " ".join(clean_title(text).lower().split())
+
+
+def title_trigrams(text: str) -> set[str]:
+    """Trigramme eines (bereinigten) Titels bzw. einer Anfrage, Wörter mit Leerzeichen aufgefüllt."""
+    grams = set()
+    for word in normalize_title(text).split():
+        padded = f" {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+def levenshtein(a: str, b: str) -> int:
+    if len(a) < len(b):
+        a, b = b, a
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb)))
+        previous = current
+    return previous[-1]
+
+
+def word_distance(query_words: list[str], title_words: list[str]) -> int:
+    """Summe der kleinsten Edit-Distanzen jedes Anfrage-Worts zu einem Titel-Wort (oder dessen Anfang)."""
+    if not title_words:
+        return sum(len(w) for w in query_words)
+    total = 0
+    for qw in query_words:
+        total += min(min(levenshtein(qw, tw), levenshtein(qw, tw[:len(qw)]) + 1) for tw in title_words)
+    return total
+
+
+class TitleDictionary:
+    """Alle Titel eines Snapshots mit Trigramm-Postings."""
+
+    def __init__(self, titles: dict[int, str]):
+        self.ids = np.fromiter(titles.keys(), dtype=np.int64, count=len(titles))
+        self.titles = [normalize_title(t) for t in titles.values()]
+        self.lengths = np.zeros(len(self.titles), dtype=np.int32)
+
+        postings: dict[str, list[int]] = {}
+        for pos, title in enumerate(self.titles):
+            grams = title_trigrams(title)
+            self.lengths[pos] = len(grams)
+            for gram in grams:
+                postings.setdefault(gram, []).append(pos)
+        self.postings = {gram: np.array(p, dtype=np.int32) for gram, p in postings.items()}
+
+    def __len__(self) -> int:
+        return len(self.titles)
+
+    def search(self, text: str, limit: int = MAX_RESULTS) -> list[int]:
+        """Nach Ähnlichkeit sortierte ids der passenden Titel."""
+        grams = title_trigrams(text)
+        lists = [self.postings[g] for g in grams if g in self.postings]
+        if not grams or not lists:
+            return []
+
+        counts = np.bincount(np.concatenate(lists), minlength=len(self.titles))
+        need = max(1, math.ceil(len(grams) * MIN_SHOULD_MATCH))
+        candidates = np.flatnonzero(counts >= need)
+        if not len(candidates):
+            return []
+
+        dice = 2 * counts[candidates] / (len(grams) + self.lengths[candidates])
+        order = candidates[np.argsort(-dice, kind="stable")][:limit]
+
+        # Die besten Kandidaten per Edit-Distanz der Wörter neu sortieren
+        query = normalize_title(text)
+        query_words = query.split()
+        head = sorted(order[:RERANK], key=lambda pos: (word_distance(query_words, self.titles[pos].split()),
+                                                       query not in self.titles[pos]))
+        return [int(i) for i in self.ids[np.concatenate([np.array(head, dtype=np.int64), order[RERANK:]])]]
+
+
+def build_title_dictionary(snapshot) -> TitleDictionary:
+    cards = snapshot.cards
+    titles = {}
+    for doc_id in snapshot.id_map:
+        card = cards.get(doc_id)
+        if card is not None:
+            titles[doc_id] = card["title"]
+    return TitleDictionary(titles)
+
+
+def title_query(schema, text: str):
+    """Dieselbe Titelsuche als Engine-Query: Trigramme als SHOULD mit Mindestanzahl an Treffern.
+
+    Die Trigramme kommen vom selben Analyzer, mit dem das Feld title_ngrams indiziert wird, und
+    wie dort pro aufgefülltem Wort: dieselben Trigramme und dieselbe Schwelle wie title_trigrams.
+    """
+    grams = dict.fromkeys(gram for value in title_ngram_values(normalize_title(text))
+                          for gram in title_ngram_analyzer.analyze(value))
+    if not grams:
+        return Query.all_query()
+    subqueries = [(Occur.Should, Query.term_query(schema, "title_ngrams", gram)) for gram in grams]
+    need = max(1, math.ceil(len(subqueries) * MIN_SHOULD_MATCH))
+    return Query.boolean_query(subqueries, minimum_number_should_match=need)
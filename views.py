@@ -0,0 +1,77 @@
+"""
+Aufrufe der Detailseiten pro Spiel, für die Prioritäten der Aktualisierung (delta.py).
+
+Jeder Aufruf einer Detailseite zählt im Speicher des Server-Prozesses hoch; höchstens alle FLUSH
+Sekunden (und beim Beenden) werden die Zähler als Zeilen "Tag<TAB>Steam-ID<TAB>Anzahl" an
+VIEWS_FILE angehängt. Mehrere Server-Prozesse schreiben in dieselbe Datei (kurze Zeilen im
+Append-Modus), delta.py summiert die letzten Tage.
+"""
+
+import atexit
+import os
+import threading
+import time
+from datetime import datetime, timezone
+
+VIEWS_FILE = os.environ.get("VIEWS_FILE", "views.tsv")
+FLUSH = 60.0        # Sekunden zwischen zwei Schreibvorgängen
+
+
+def today() -> str:
+    return datetime.now(timezone.utc).strftime("%Y-%m-%d")
+
+
+class ViewLog:
+    """Zähler pro Steam-ID, gesammelt an die Datei angehängt."""
+
+    def __init__(self, path: str = VIEWS_FILE, flush_every: float = FLUSH):
+        self.path = path
+        self.flush_every = flush_every
+        self.counts: dict[int, int] = {}
+        self.last_flush = time.monotonic()
+        self.lock = threading.Lock()
+
+    def record(self, steam_id: int):
+        with self.lock:
+            self.counts[steam_id] = self.counts.get(steam_id, 0) + 1
+            due = time.monotonic() - self.last_flush >= self.flush_every
+        if due:
+            self.flush()
+
+    def flush(self):
+        with self.lock:
+            counts, self.counts = self.counts, {}
+            self.last_flush = time.monotonic()
+        if not counts:
+            return
+        day = today()
+        try:
+            with open(self.path, "a", encoding="UTF-8") as f:
+                f.write("".join(f"{day}\t{steam_id}\t{n}\n" for steam_id, n in counts.items()))
+        except OSError:
+            pass        # Zähler sind nur ein Hinweis, die Seite soll davon nie abhängen
+
+
+def read_views(path: str = VIEWS_FILE, days: int = 7) -> dict[int, int]:
+    """Aufrufe pro Steam-ID in den letzten `days` Tagen."""
+    views: dict[int, int] = {}
+    if not os.path.exists(path):
+        return views
+    since = datetime.fromtimestamp(time.time() - days * 86400, timezone.utc).strftime("%Y-%m-%d")
+    with open(path, "r", encoding="UTF-8") as f:
+        for line in f:
+            parts = line.split("\t")
+            if len(parts) != 3 or parts[0] < since or not parts[1].isdigit() or not parts[2].strip().isdigit():
+                continue
+            steam_id = int(parts[1])
+            views[steam_id] = views.get(steam_id, 0) + int(parts[2])
+    return views
+
+
+log = ViewLog()
+atexit.register(log.flush)
+
+
+def record(steam_id: int):
+    """Einen Aufruf der Detailseite zählen."""
+    log.record(steam_id)
@@ -1,11 +1,17 @@
 import streamlit as st
 
+import startup
+import timing
+
 
 st.set_page_config(
     page_title="Videogames",
     layout="wide"
 )
 
+# Einmal pro Prozess: CSS laden, Index öffnen und vorwärmen (sofort fertig, wenn startup.py den Server gestartet hat)
+startup.ensure()
+
 if "slider" not in st.session_state:
     st.session_state["slider"] = None
 if "pill" not in st.session_state:
@@ -26,14 +32,20 @@ pages_config = {
     "": [page1, page2]
 }
 
-with open("styles.html", "r") as f:
-    css = f.read()
-st.set_page_config(layout="wide")
-st.markdown(css, unsafe_allow_html=True)
+st.markdown(startup.css(), unsafe_allow_html=True)
 
 st.markdown("""<div class="header_title">Videogames</div>""", unsafe_allow_html=True)
 
+# Zeitmessung für diese Session mit ?debug=1 einschalten (bleibt beim Seitenwechsel erhalten)
+if "debug" in st.query_params:
+    st.session_state["debug"] = st.query_params["debug"] not in ("", "0")
+debug = timing.DEBUG or st.session_state.get("debug", False)
+
 navigation = st.navigation(pages_config, position="top")
-navigation.run()
+timing.start_rerun(debug)
+try:
+    navigation.run()
+finally:
+    timing.end_rerun()
 
 st.markdown("""<footer>Wintersemster 2025/26 - Usability Engineering - Talena Thielecke, Smilla Hill</footer>""", unsafe_allow_html=True)
\ No newline at end of file